@@ -1,5 +1,5 @@
 # app/__init__.py - CONFIGURATION COMPLÈTE
-from flask import Flask, request, Response
+from flask import Flask, request, Response, current_app, make_response
 from flask_jwt_extended import JWTManager, decode_token
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -8,11 +8,16 @@ from flask_caching import Cache
 # from flask_socketio import SocketIO, emit, send
 from dotenv import load_dotenv
 import os
+import json
+import time
+import uuid
+import hashlib
 import logging
+import threading
+from functools import wraps
 from logging.handlers import RotatingFileHandler
 from prometheus_flask_exporter import PrometheusMetrics
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-from flasgger import Swagger
 from datetime import timedelta
 
 # Charger les variables d'environnement
@@ -23,13 +28,45 @@ db = SQLAlchemy()
 migrate = Migrate()
 cors = CORS()
 cache = Cache()
+_extensions_lock = threading.Lock()
 # socketio = SocketIO(cors_allowed_origins="*")
 
 # Dictionnaire pour suivre les connexions WebSocket
 # connected_users = {}
 
-def create_app():
+class StartupProfile:
+    """Durée (ms) de chaque étape de create_app et des initialisations différées, exposée par /health/startup"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.steps = {}
+        self.deferred = {}
+
+    def mark(self, step):
+        now = time.perf_counter()
+        self.steps[step] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    def record_deferred(self, name, started):
+        self.deferred[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def as_dict(self):
+        return {
+            'total_ms': round((self._last - self.started) * 1000, 1),
+            'steps': self.steps,
+            'deferred': self.deferred
+        }
+
+
+def create_app(config=None):
+    """
+    Crée l'application. `config` (dict) est appliqué avant l'initialisation des
+    extensions (ex: base SQLite des tests).
+    """
+    profile = StartupProfile()
     app = Flask(__name__)
+    app.extensions['startup_profile'] = profile
 
     # ========== CONFIGURATION FLASK CORE ==========
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default_secret_key')
@@ -52,6 +89,7 @@ def create_app():
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 86400))
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 604800))
     app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 52428800))
+    app.config['MAX_MEDIA_FILE_SIZE'] = int(os.getenv('MAX_FILE_SIZE', 52428800))  # Par fichier joint
 
     app.config['JWT_TOKEN_LOCATION'] = ['headers']
     app.config['JWT_HEADER_NAME'] = os.getenv('JWT_HEADER_NAME', 'Authorization')
@@ -68,6 +106,11 @@ def create_app():
     app.config['CACHE_REDIS_DB'] = int(os.getenv('REDIS_DB', 0))
     app.config['CACHE_REDIS_URL'] = os.getenv('REDIS_URL')
     app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300))
+    # Durée de vie des réponses mises en cache par cached_view (invalidées par tag)
+    app.config['CACHE_VIEW_TIMEOUT'] = int(os.getenv('CACHE_VIEW_TIMEOUT', 900))
+    # Boîte de réception des notifications (Redis) : identifiants récents conservés et durée de vie des clés
+    app.config['NOTIFICATION_INBOX_SIZE'] = int(os.getenv('NOTIFICATION_INBOX_SIZE', 200))
+    app.config['NOTIFICATION_INBOX_TTL'] = int(os.getenv('NOTIFICATION_INBOX_TTL', 604800))
 
 
     # ========== CONFIGURATION SUPABASE ==========
@@ -76,85 +119,33 @@ def create_app():
     app.config['SUPABASE_SERVICE_ROLE_KEY'] = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
     app.config['SUPABASE_BUCKET_NAME'] = os.getenv('SUPABASE_BUCKET_NAME', 'signalements')
     
+    # ========== CONFIGURATION FILE DE TÂCHES ==========
+    # JOBS_EAGER=true : exécute les tâches immédiatement (tests / développement sans worker)
+    app.config['JOBS_EAGER'] = os.getenv('JOBS_EAGER', 'False').lower() == 'true'
+    # Délai de la passe d'indexation des notifications (une tâche en attente regroupe les envois)
+    app.config['SEARCH_INDEX_DELAY'] = int(os.getenv('SEARCH_INDEX_DELAY', 30))
+
     # ========== CONFIGURATION ONESIGNAL ==========
     app.config['ONESIGNAL_APP_ID'] = os.getenv('ONESIGNAL_APP_ID')
     app.config['ONESIGNAL_API_KEY'] = os.getenv('ONESIGNAL_API_KEY')
 
+    # ========== CONFIGURATION DÉMARRAGE ==========
+    # LAZY_EXTENSIONS=true : services externes créés à la première utilisation (démarrage sans appel réseau)
+    app.config['LAZY_EXTENSIONS'] = os.getenv('LAZY_EXTENSIONS', 'True').lower() == 'true'
+    # SWAGGER_ENABLED=false : pas de documentation /apidocs (workers de production, tests)
+    app.config['SWAGGER_ENABLED'] = os.getenv('SWAGGER_ENABLED', 'True').lower() == 'true'
+
+    if config:
+        app.config.from_mapping(config)
+    profile.mark('config')
+
     # ========== INITIALISATION SUPABASE MEDIA SERVICE ==========
-    media_service = None
-    supabase_module = None
-    
-    try:
-        # Import du module Supabase
-        import app.supabase_media_service as sms
-        supabase_module = sms
-        
-        # Vérification des variables critiques
-        required_vars = ['SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY']
-        missing_vars = [var for var in required_vars if not os.getenv(var)]
-        
-        if missing_vars:
-            raise ValueError(f"Variables Supabase manquantes: {', '.join(missing_vars)}")
-        
-        # Créer le service média
-        media_service = sms.get_media_service()
-        
-        # Créer le bucket (ignore les erreurs si existe déjà)
-        try:
-            media_service.create_bucket_if_not_exists()
-        except Exception as bucket_error:
-            app.logger.warning(f"⚠️ Bucket: {bucket_error}")
-        
-        # Stocker dans app.config
-        app.config['MEDIA_SERVICE'] = media_service
-        app.config['SUPABASE_MODULE'] = supabase_module
-        
-        app.logger.info("✅ Service Supabase initialisé")
-        
-    except ImportError:
-        # Fallback: Service basique
-        try:
-            from supabase import create_client
-            
-            class BasicSupabaseService:
-                def __init__(self):
-                    url = os.getenv('SUPABASE_URL')
-                    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-                    if url and key:
-                        self.supabase = create_client(url, key)
-                        self.bucket_name = os.getenv('SUPABASE_BUCKET_NAME', 'signalements')
-                        self.use_service_role = True
-                
-                def create_bucket_if_not_exists(self):
-                    try:
-                        buckets = self.supabase.storage.list_buckets()
-                        bucket_exists = any(b.name == self.bucket_name for b in buckets)
-                        if not bucket_exists:
-                            self.supabase.storage.create_bucket(self.bucket_name, {"public": True})
-                    except:
-                        pass  # Ignorer les erreurs bucket
-            
-            media_service = BasicSupabaseService()
-            media_service.create_bucket_if_not_exists()
-            
-            app.config['MEDIA_SERVICE'] = media_service
-            app.config['SUPABASE_MODULE'] = None
-            
-            app.logger.info("✅ Service Supabase basique créé")
-            
-        except Exception as e:
-            app.logger.warning(f"⚠️ Supabase non disponible: {e}")
-            app.config['MEDIA_SERVICE'] = None
-            app.config['SUPABASE_MODULE'] = None
-    
-    except Exception as e:
-        app.logger.error(f"❌ Erreur Supabase: {e}")
-        app.config['MEDIA_SERVICE'] = None
-        app.config['SUPABASE_MODULE'] = None
-    
-    # Stocker les états
-    app.config['SUPABASE_AVAILABLE'] = media_service is not None
-    app.config['SUPABASE_MODULE_AVAILABLE'] = supabase_module is not None
+    # Mode paresseux : client créé à la première utilisation, bucket vérifié par le premier upload
+    if app.config['LAZY_EXTENSIONS']:
+        app.logger.info("💤 Service Supabase initialisé à la première utilisation")
+    else:
+        init_media_service(app)
+    profile.mark('supabase')
 
     # ========== INITIALISATION DES EXTENSIONS ==========
     db.init_app(app)
@@ -162,18 +153,26 @@ def create_app():
     cors.init_app(app)
     cache.init_app(app)
     jwt = JWTManager(app)
-    Swagger(app)
+    if app.config['SWAGGER_ENABLED']:
+        # Import à la demande ; les specs sont construites au premier appel de /apispec_1.json
+        from flasgger import Swagger
+        Swagger(app)
+    profile.mark('extensions')
 
     # ========== CONFIGURATION LOGGING ==========
     setup_logging(app)
 
     # ========== CONFIGURATION PROMETHEUS ==========
     metrics = PrometheusMetrics(app)
-    metrics.info("flask_app", "Application Flask", version="1.0.0")
+    try:
+        metrics.info("flask_app", "Application Flask", version="1.0.0")
+    except ValueError:
+        pass  # Déjà enregistrée par une application précédente du processus (tests)
     
     @app.route('/metrics')
     def metrics_endpoint():
         return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+    profile.mark('monitoring')
 
     # ========== ROUTES DE MONITORING ==========
     
@@ -182,7 +181,7 @@ def create_app():
         """État général de l'application"""
         return {
             'status': 'healthy',
-            'supabase_available': app.config.get('SUPABASE_AVAILABLE', False),
+            'supabase_available': get_app_media_service(app) is not None,
             'onesignal_configured': bool(app.config.get('ONESIGNAL_APP_ID')),
             'database_configured': bool(app.config.get('SQLALCHEMY_DATABASE_URI')),
             'redis_configured': bool(app.config.get('REDIS_URL')),
@@ -191,19 +190,26 @@ def create_app():
     
     @app.route('/health/supabase')
     def supabase_health():
-        """État Supabase"""
+        """État Supabase (état du bucket mémorisé, revérifié après SUPABASE_BUCKET_CHECK_TTL)"""
         try:
-            media_service = app.config.get('MEDIA_SERVICE')
+            media_service = get_app_media_service(app)
             if not media_service:
                 return {'status': 'unavailable'}, 503
             
-            buckets = media_service.supabase.storage.list_buckets()
-            bucket_exists = any(b.name == media_service.bucket_name for b in buckets)
+            if not hasattr(media_service, 'bucket_status'):
+                # Service basique de secours : pas de mémorisation
+                buckets = media_service.supabase.storage.list_buckets()
+                return {
+                    'status': 'healthy',
+                    'bucket': media_service.bucket_name,
+                    'bucket_exists': any(b.name == media_service.bucket_name for b in buckets)
+                }, 200
             
+            bucket = media_service.bucket_status()
             return {
-                'status': 'healthy',
+                'status': 'healthy' if bucket['bucket_exists'] else 'degraded',
                 'bucket': media_service.bucket_name,
-                'bucket_exists': bucket_exists
+                **bucket
             }, 200
             
         except Exception as e:
@@ -221,6 +227,15 @@ def create_app():
             'api_key_present': bool(api_key)
         }, 200
 
+    @app.route('/health/startup')
+    def startup_profile():
+        """Durées du démarrage (étapes de create_app) et des initialisations différées"""
+        return {
+            'lazy_extensions': app.config['LAZY_EXTENSIONS'],
+            'swagger_enabled': app.config['SWAGGER_ENABLED'],
+            **profile.as_dict()
+        }, 200
+
     # ========== IMPORT DES MODÈLES ==========
     from app.models import (
         Appartenir, Groupe, CommentairePetition, CommentairePublication,
@@ -231,6 +246,7 @@ def create_app():
     
     # Import des modèles notifications
     from app.models import FCMToken, NotificationHistory
+    profile.mark('models')
 
     # ========== IMPORT ET ENREGISTREMENT DES ROUTES ==========
     from app.routes import (
@@ -266,6 +282,27 @@ def create_app():
     app.register_blueprint(tutoriel_bp, url_prefix='/api/tutoriel')
     app.register_blueprint(suivre_bp, url_prefix='/api/suivre')
     app.register_blueprint(notification_bp, url_prefix='/api/notification')
+    profile.mark('blueprints')
+
+    # ========== COMMANDES CLI ==========
+    from app.services.jobs.job_service import jobs_cli
+    from app.services.signal.signalement_service import signalements_cli
+    from app.services.notification.notification_analytics_service import notifications_cli
+    from app.services.search.search_service import search_cli
+    from app.services.stats.stats_service import stats_cli
+    from app.services.reaction.counter_service import reactions_cli
+    from app.services.schema.schema_service import schema_cli
+    from app.services.signal.media_store_service import media_cli
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(signalements_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(reactions_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(media_cli)
+    profile.mark('cli')
+    app.logger.info(f"🚀 Application créée en {profile.as_dict()['total_ms']} ms")
 
     # ========== GESTION DES CONNEXIONS WEBSOCKET ==========
     # @socketio.on("connect")
@@ -314,6 +351,103 @@ def create_app():
 
     return app
 
+def init_media_service(app, check_bucket=True):
+    """
+    Crée le service média Supabase de l'application et renseigne MEDIA_SERVICE,
+    SUPABASE_MODULE, SUPABASE_AVAILABLE et SUPABASE_MODULE_AVAILABLE.
+    check_bucket=False laisse la vérification du bucket au premier upload.
+    """
+    media_service = None
+    supabase_module = None
+
+    try:
+        # Import du module Supabase
+        import app.supabase_media_service as sms
+        supabase_module = sms
+
+        # Vérification des variables critiques
+        required_vars = ['SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY']
+        missing_vars = [var for var in required_vars if not os.getenv(var)]
+
+        if missing_vars:
+            raise ValueError(f"Variables Supabase manquantes: {', '.join(missing_vars)}")
+
+        # Créer le service média
+        media_service = sms.get_media_service()
+
+        # Créer le bucket (vérification mémorisée, réutilisée par les uploads)
+        if check_bucket:
+            try:
+                media_service.ensure_bucket()
+            except Exception as bucket_error:
+                app.logger.warning(f"⚠️ Bucket: {bucket_error}")
+
+        # Stocker dans app.config
+        app.config['MEDIA_SERVICE'] = media_service
+        app.config['SUPABASE_MODULE'] = supabase_module
+
+        app.logger.info("✅ Service Supabase initialisé")
+
+    except ImportError:
+        # Fallback: Service basique
+        try:
+            from supabase import create_client
+
+            class BasicSupabaseService:
+                def __init__(self):
+                    url = os.getenv('SUPABASE_URL')
+                    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+                    if url and key:
+                        self.supabase = create_client(url, key)
+                        self.bucket_name = os.getenv('SUPABASE_BUCKET_NAME', 'signalements')
+                        self.use_service_role = True
+
+                def create_bucket_if_not_exists(self):
+                    try:
+                        buckets = self.supabase.storage.list_buckets()
+                        bucket_exists = any(b.name == self.bucket_name for b in buckets)
+                        if not bucket_exists:
+                            self.supabase.storage.create_bucket(self.bucket_name, {"public": True})
+                    except:
+                        pass  # Ignorer les erreurs bucket
+
+            media_service = BasicSupabaseService()
+            if check_bucket:
+                media_service.create_bucket_if_not_exists()
+
+            app.config['MEDIA_SERVICE'] = media_service
+            app.config['SUPABASE_MODULE'] = None
+
+            app.logger.info("✅ Service Supabase basique créé")
+
+        except Exception as e:
+            app.logger.warning(f"⚠️ Supabase non disponible: {e}")
+            app.config['MEDIA_SERVICE'] = None
+            app.config['SUPABASE_MODULE'] = None
+
+    except Exception as e:
+        app.logger.error(f"❌ Erreur Supabase: {e}")
+        app.config['MEDIA_SERVICE'] = None
+        app.config['SUPABASE_MODULE'] = None
+
+    # Stocker les états
+    app.config['SUPABASE_AVAILABLE'] = media_service is not None
+    app.config['SUPABASE_MODULE_AVAILABLE'] = supabase_module is not None
+    app.extensions['media_service'] = media_service
+    return media_service
+
+
+def get_app_media_service(app=None):
+    """Service média de l'application, initialisé au premier appel (None si Supabase est indisponible)"""
+    app = app or current_app._get_current_object()
+    if 'media_service' not in app.extensions:
+        with _extensions_lock:
+            if 'media_service' not in app.extensions:
+                started = time.perf_counter()
+                init_media_service(app, check_bucket=False)
+                app.extensions['startup_profile'].record_deferred('supabase', started)
+    return app.extensions['media_service']
+
 def setup_logging(app):
     """Configuration du logging"""
     if not app.debug:
@@ -336,6 +470,82 @@ def setup_logging(app):
         app.logger.setLevel(getattr(logging, os.getenv('LOG_LEVEL', 'INFO')))
         app.logger.info('Application démarrage')
 
+# ========== CACHE DES VUES PAR PARAMÈTRES ET TAGS ==========
+CACHE_TAG_PREFIX = 'cache_tag::'
+
+
+def _cache_tag_versions(tags):
+    """Version courante de chaque tag (créée si absente)"""
+    if not tags:
+        return []
+
+    keys = [CACHE_TAG_PREFIX + tag for tag in tags]
+    versions = list(cache.get_many(*keys))
+    missing = {}
+    for i, version in enumerate(versions):
+        if version is None:
+            versions[i] = missing[keys[i]] = uuid.uuid4().hex[:12]
+    if missing:
+        cache.set_many(missing, timeout=0)
+    return versions
+
+
+def invalidate_tags(*tags):
+    """
+    Invalide toutes les réponses en cache portant l'un des tags
+    (ex: 'signalement:42', 'signalements'). Appelé par les services après écriture.
+    """
+    tags = [tag for tag in tags if tag]
+    if not tags:
+        return
+    try:
+        cache.set_many({CACHE_TAG_PREFIX + tag: uuid.uuid4().hex[:12] for tag in tags}, timeout=0)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"⚠️ Invalidation cache impossible {tags}: {e}")
+
+
+def cached_view(timeout=None, tags=()):
+    """
+    Met en cache la réponse d'une vue selon ses arguments d'URL et sa query string.
+
+    `tags` contient des modèles formatés avec les arguments de la vue
+    (ex: 'citoyen:{citoyen_id}') ; l'entrée devient obsolète dès qu'un de ses
+    tags est invalidé via invalidate_tags(). Seules les réponses 200 sont conservées.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                entry_tags = [tag.format(**kwargs) for tag in tags]
+                signature = json.dumps([
+                    sorted(kwargs.items()),
+                    sorted(request.args.items(multi=True)),
+                    _cache_tag_versions(entry_tags)
+                ], default=str)
+                key = f"view::{request.endpoint}::{hashlib.sha1(signature.encode()).hexdigest()}"
+                cached = cache.get(key)
+            except Exception as e:
+                current_app.logger.warning(f"⚠️ Cache indisponible pour {request.endpoint}: {e}")
+                return view(*args, **kwargs)
+
+            if cached is not None:
+                body, mimetype = cached
+                return current_app.response_class(body, status=200, mimetype=mimetype)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                try:
+                    cache.set(
+                        key,
+                        (response.get_data(), response.mimetype),
+                        timeout=timeout if timeout is not None else current_app.config.get('CACHE_VIEW_TIMEOUT')
+                    )
+                except Exception as e:
+                    current_app.logger.warning(f"⚠️ Écriture cache impossible pour {request.endpoint}: {e}")
+            return response
+        return wrapper
+    return decorator
+
 # if __name__ == "__main__":
 #     app = create_app()
 #     socketio.run(app, host="0.0.0.0", port=5000, debug=True)
@@ -21,6 +21,7 @@ from .reaction.vote_model import Vote
 from .signal.petition_model import Petition
 from .signal.publication_model import Publication
 from .signal.signalement_model import Signalement
+from .signal.media_object_model import MediaObject
 
 from .users.admin_model import Admin
 from .users.autorite_model import Authorite
@@ -30,7 +31,13 @@ from .users.user_model import User
 
 from .notification.notification_models import FCMToken, NotificationTemplate, NotificationAnalytics, NotificationPreferences, NotificationHistory
 
+from .jobs.job_model import BackgroundJob, DeadLetterJob
 
+from .search.search_model import SearchTerm
 
 
 
+
+
+
+from .stats.stat_counter_model import StatCounter
@@ -6,7 +6,11 @@ from datetime import datetime
 
 class Suivre(db.Model):
     __tablename__ = 'suivres'
-    __table_args__ = {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    __table_args__ = (
+        db.Index('ix_suivres_suiveur_suivis', 'suiveurID', 'suivisID', 'is_deleted'),
+        db.Index('ix_suivres_suivis', 'suivisID', 'is_deleted'),
+        {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    )
 
 
     IDsuivre = db.Column(db.Integer, primary_key=True)
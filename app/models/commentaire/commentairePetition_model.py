@@ -4,7 +4,10 @@ from app import db
 
 class CommentairePetition(db.Model):
     __tablename__ = 'commentairePetitions'
-    __table_args__ = {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    __table_args__ = (
+        db.Index('ix_commentaire_petitions_petition', 'petitionID', 'is_deleted'),
+        {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    )
     IDcommentaire = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.Text, nullable=False)
 
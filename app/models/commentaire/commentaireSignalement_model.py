@@ -3,7 +3,10 @@ from app import db
 
 class CommentaireSignalement(db.Model):
     __tablename__ = 'commentaireSignalements'
-    __table_args__ = {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    __table_args__ = (
+        db.Index('ix_commentaire_signalements_signalement', 'signalementID', 'is_deleted'),
+        {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    )
     IDcommentaire = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.Text, nullable=False)
 
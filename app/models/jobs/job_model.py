@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+from app import db
+
+
+class BackgroundJob(db.Model):
+    """Tâche asynchrone exécutée hors du cycle requête/réponse par le worker"""
+    __tablename__ = 'background_jobs'
+    __table_args__ = (
+        db.Index('ix_background_jobs_status_run_after', 'status', 'run_after'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # Nom du handler (ex: 'notification.send')
+    payload = db.Column(db.Text, nullable=True)  # Arguments JSON
+
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending | running | done
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    last_error = db.Column(db.Text, nullable=True)
+
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<BackgroundJob {self.id}: {self.name} ({self.status}, essai {self.attempts}/{self.max_attempts})>"
+
+    def get_payload(self):
+        return json.loads(self.payload or "{}")
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'payload': self.get_payload(),
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'last_error': self.last_error,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class DeadLetterJob(db.Model):
+    """Tâches abandonnées après épuisement des tentatives"""
+    __tablename__ = 'dead_letter_jobs'
+    __table_args__ = {'mysql_engine': 'InnoDB'}
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, nullable=True)  # ID d'origine dans background_jobs
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)  # Création de la tâche d'origine
+    failed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DeadLetterJob {self.id}: {self.name} après {self.attempts} essais>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_id': self.job_id,
+            'name': self.name,
+            'payload': json.loads(self.payload or "{}"),
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'failed_at': self.failed_at.isoformat() if self.failed_at else None
+        }
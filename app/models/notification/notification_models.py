@@ -6,7 +6,10 @@ from enum import Enum
 class FCMToken(db.Model):
     """Stockage des tokens FCM/OneSignal pour notifications push"""
     __tablename__ = 'fcm_tokens'
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        db.Index('ix_fcm_tokens_user_active', 'user_id', 'is_active'),
+        {'mysql_engine': 'InnoDB'}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.IDuser'), nullable=False)
@@ -40,7 +43,11 @@ class FCMToken(db.Model):
 class NotificationHistory(db.Model):
     """Historique des notifications envoyées"""
     __tablename__ = 'notification_history'
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        db.Index('ix_notification_history_user_created', 'user_id', 'created_at'),
+        db.Index('ix_notification_history_user_read', 'user_id', 'is_read'),
+        {'mysql_engine': 'InnoDB'}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.IDuser'), nullable=False)
@@ -83,6 +90,11 @@ class NotificationHistory(db.Model):
     def __repr__(self):
         return f"<NotificationHistory {self.id}: {self.title} -> User {self.user_id}>"
 
+    @classmethod
+    def unread_clause(cls):
+        """Condition SQL « non lue » : is_read faux ou NULL (lignes antérieures au défaut False)"""
+        return db.or_(cls.is_read == False, cls.is_read.is_(None))
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -204,9 +216,12 @@ class NotificationTemplate(db.Model):
         }
 
 class NotificationAnalytics(db.Model):
-    """Analytics des notifications pour métriques"""
+    """Agrégats journaliers des notifications (par catégorie, priorité et canal)"""
     __tablename__ = 'notification_analytics'
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        db.UniqueConstraint('date', 'category', 'priority', 'delivery_method', name='uq_notification_analytics_bucket'),
+        {'mysql_engine': 'InnoDB'}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
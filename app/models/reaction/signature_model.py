@@ -4,7 +4,12 @@ from app import db
 
 class Signature(db.Model):
     __tablename__ = 'signatures'
-    __table_args__ = {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    __table_args__ = (
+        # Une seule signature par citoyen et par pétition (une signature supprimée est restaurée)
+        db.UniqueConstraint('citoyenID', 'petitionID', name='uq_signatures_citoyen_petition'),
+        db.Index('ix_signatures_petition', 'petitionID', 'is_deleted'),
+        {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    )
     IDsignature = db.Column(db.Integer, primary_key=True)
     dateCreated = db.Column(db.DateTime, default=datetime.utcnow)  # Date de création
     # nbSignature = db.Column(db.Integer, nullable=True)  # Date de création
@@ -5,7 +5,12 @@ from datetime import datetime
 
 class Vote(db.Model):
     __tablename__ = 'votes'
-    __table_args__ = {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    __table_args__ = (
+        # Un seul vote par citoyen et par signalement (un vote supprimé est réactivé)
+        db.UniqueConstraint('citoyenID', 'signalementID', name='uq_votes_citoyen_signalement'),
+        db.Index('ix_votes_signalement', 'signalementID', 'is_deleted', 'types'),
+        {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    )
     IDvote = db.Column(db.Integer, primary_key=True)
     dateCreated = db.Column(db.DateTime, default=datetime.utcnow)  # Date de création
     types = db.Column(db.String(15), nullable=True)
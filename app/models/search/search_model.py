@@ -0,0 +1,26 @@
+from app import db
+
+
+class SearchTerm(db.Model):
+    """
+    Index inversé de la recherche plein texte : une ligne par (document, terme analysé).
+    `weight` cumule les occurrences du terme pondérées par champ (titre > description).
+    La contrainte unique (document, terme) empêche deux indexations concurrentes de
+    dupliquer une entrée (ce qui fausserait le score BM25).
+    """
+    __tablename__ = 'search_terms'
+    __table_args__ = (
+        db.Index('ix_search_terms_lookup', 'entity_type', 'term', 'owner_id'),
+        db.UniqueConstraint('entity_type', 'entity_id', 'term', name='uq_search_terms_entity_term'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # 'signalement', 'petition', 'notification'
+    entity_id = db.Column(db.Integer, nullable=False)
+    owner_id = db.Column(db.Integer, nullable=True)  # Destinataire (notifications), sinon NULL
+    term = db.Column(db.String(64), nullable=False)
+    weight = db.Column(db.Float, nullable=False, default=1.0)
+
+    def __repr__(self):
+        return f"<SearchTerm {self.entity_type}:{self.entity_id} '{self.term}'>"
@@ -0,0 +1,31 @@
+from datetime import datetime
+from app import db
+
+
+class MediaObject(db.Model):
+    """
+    Objet du stockage Supabase adressé par son contenu (SHA-256).
+    ref_count compte les éléments de signalements qui pointent vers storage_path :
+    un contenu déjà présent n'est pas ré-uploadé, et l'objet n'est supprimé du
+    bucket qu'à la libération de sa dernière référence.
+    """
+    __tablename__ = 'media_objects'
+    __table_args__ = (
+        db.UniqueConstraint('sha256', name='uq_media_objects_sha256'),
+        db.UniqueConstraint('storage_path', name='uq_media_objects_storage_path'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=True)  # NULL : objet antérieur à l'index (référencé, non dédupliqué)
+    storage_path = db.Column(db.String(500), nullable=False)
+    bucket = db.Column(db.String(100), nullable=False)
+    mimetype = db.Column(db.String(150), nullable=True)
+    size = db.Column(db.BigInteger, nullable=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=1)
+    derivatives = db.Column(db.Text, nullable=True)  # JSON des dérivés WebP (miniature, aperçu, affichage, poster)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MediaObject {self.storage_path} ({self.ref_count} réf.)>"
@@ -4,7 +4,11 @@ from datetime import datetime
 
 class Petition(db.Model):
     __tablename__ = 'petitions'
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        db.Index('ix_petitions_citoyen', 'citoyenID', 'is_deleted'),
+        db.Index('ix_petitions_feed', 'is_deleted', 'dateCreated'),
+        {'mysql_engine': 'InnoDB'}
+    )
     IDpetition = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(255), nullable=False)
     nbSignature = db.Column(db.Integer, nullable=True)
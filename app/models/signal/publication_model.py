@@ -4,7 +4,11 @@ import zlib
 
 class Publication(db.Model):
     __tablename__ = 'publications'
-    __table_args__ = {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    __table_args__ = (
+        db.Index('ix_publications_signalement', 'signalementID', 'is_deleted'),
+        db.Index('ix_publications_autorite', 'autoriteID', 'is_deleted'),
+        {'mysql_engine': 'InnoDB'}  # Définir explicitement InnoDB
+    )
 
     IDpublication = db.Column(db.Integer, primary_key=True)
     titre = db.Column(db.String(100), nullable=False)
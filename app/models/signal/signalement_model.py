@@ -1,7 +1,8 @@
+import copy
 from datetime import datetime
 import json
 from flask import current_app
-from app import db
+from app import db, get_app_media_service
 
 class Signalement(db.Model):
     __tablename__ = 'signalements'
@@ -12,6 +13,13 @@ class Signalement(db.Model):
     
     # Stockage des métadonnées Supabase au format JSON
     elements = db.Column(db.Text, nullable=True)
+
+    # Compteurs dénormalisés des médias (maintenus à chaque écriture de `elements`)
+    media_count = db.Column(db.Integer, nullable=True)
+    media_images = db.Column(db.Integer, nullable=True)
+    media_videos = db.Column(db.Integer, nullable=True)
+    media_audios = db.Column(db.Integer, nullable=True)
+    media_documents = db.Column(db.Integer, nullable=True)
     
     statut = db.Column(db.String(20), nullable=False, default='en_attente')  # ← MODIFICATION: default='en_attente | rejeter | valider ==> en_cours | terminer'
     nbVotePositif = db.Column(db.Integer, nullable=True, default=0)
@@ -34,6 +42,7 @@ class Signalement(db.Model):
     location_timestamp = db.Column(db.BigInteger, nullable=True)  # Timestamp de capture GPS
     location_address = db.Column(db.Text, nullable=True)  # Adresse formatée lisible
     has_location = db.Column(db.Boolean, default=False)  # Indicateur de présence GPS
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # Cellule geohash pour l'index spatial
     # ========== FIN AJOUT LOCALISATION ==========
     
     IDmoderateur = db.Column(db.Integer, nullable=True)
@@ -45,6 +54,21 @@ class Signalement(db.Model):
     
     citoyenID = db.Column(db.Integer, db.ForeignKey('citoyens.IDcitoyen'), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_signalements_lat_lng', 'latitude', 'longitude'),
+        db.Index('ix_signalements_feed', 'is_deleted', 'dateCreated', 'IDsignalement'),
+        db.Index('ix_signalements_statut', 'statut', 'is_deleted', 'dateCreated'),
+        db.Index('ix_signalements_citoyen', 'citoyenID', 'is_deleted', 'dateCreated'),
+    )
+
+    MEDIA_COUNTER_COLUMNS = {
+        'total': 'media_count',
+        'images': 'media_images',
+        'videos': 'media_videos',
+        'audios': 'media_audios',
+        'documents': 'media_documents'
+    }
+
     def __repr__(self):
         return f"<Signalement ID={self.IDsignalement}, Type={self.typeSignalement}>"
 
@@ -52,9 +76,51 @@ class Signalement(db.Model):
         """Enregistre les métadonnées des médias Supabase en JSON"""
         self.elements = json.dumps(media_list)
 
+    @db.validates('elements')
+    def _validate_elements(self, key, value):
+        # Toute écriture de `elements` invalide le cache et met à jour les compteurs
+        self._media_cache = None
+        for column, count in self.compute_media_counters(value).items():
+            setattr(self, column, count)
+        return value
+
+    @classmethod
+    def compute_media_counters(cls, raw_elements):
+        """Valeurs des colonnes compteurs pour un JSON `elements` (None si illisible)"""
+        try:
+            media_list = json.loads(raw_elements or "[]")
+        except (TypeError, ValueError):
+            media_list = None
+        if not isinstance(media_list, list):
+            # JSON invalide, null ou autre qu'une liste : illisible
+            return {column: None for column in cls.MEDIA_COUNTER_COLUMNS.values()}
+
+        media_list = [element for element in media_list if isinstance(element, dict)]
+        counters = {column: 0 for column in cls.MEDIA_COUNTER_COLUMNS.values()}
+        counters['media_count'] = len(media_list)
+        for element in media_list:
+            category = cls._determine_category_from_mimetype(element.get('mimetype') or '')
+            column = cls.MEDIA_COUNTER_COLUMNS.get(category)
+            if column and column != 'media_count':
+                counters[column] += 1
+        return counters
+
+    def _get_media_cache(self):
+        """Cache par instance du JSON décodé, reconstruit si `elements` a changé"""
+        raw = self.elements
+        cached = getattr(self, '_media_cache', None)
+        if cached is None or (cached['raw'] is not raw and cached['raw'] != raw):
+            cached = {'raw': raw, 'elements': json.loads(raw or "[]"), 'optimized': None}
+            self._media_cache = cached
+        return cached
+
     def get_elements(self):
-        """Récupère la liste des métadonnées depuis le JSON"""
-        return json.loads(self.elements or "[]")
+        """Récupère la liste des métadonnées depuis le JSON (copie : l'appelant peut la modifier)"""
+        return copy.deepcopy(self._get_media_cache()['elements'])
+
+    def has_media_counters(self):
+        """Indique si les compteurs dénormalisés sont renseignés"""
+        return self.media_count is not None
     
    
     def _get_file_icon(self, mimetype: str) -> str:
@@ -78,35 +144,17 @@ class Signalement(db.Model):
         """Récupère le service média depuis l'app context de manière sécurisée"""
         try:
             if current_app:
-                media_service = current_app.config.get('MEDIA_SERVICE')
+                # Service de l'application, créé au premier appel (mode LAZY_EXTENSIONS)
+                media_service = get_app_media_service()
                 if media_service:
                     return media_service
             
+            # Service partagé du processus (aucun client créé par instance de modèle)
             try:
                 import app.supabase_media_service as sms
                 return sms.get_media_service()
-            except ImportError:
-                pass
-            
-            try:
-                import os
-                from supabase import create_client
-                
-                url = os.getenv('SUPABASE_URL')
-                key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-                if url and key:
-                    client = create_client(url, key)
-                    
-                    class MinimalService:
-                        def __init__(self, client):
-                            self.supabase = client
-                            self.bucket_name = os.getenv('SUPABASE_BUCKET_NAME', 'signalements')
-                    
-                    return MinimalService(client)
-            except:
-                pass
-            
-            return None
+            except (ImportError, ValueError):
+                return None
             
         except Exception as e:
             print(f"❌ Erreur récupération service média: {e}")
@@ -158,6 +206,8 @@ class Signalement(db.Model):
     
     def get_media_count(self):
         """Retourne le nombre de médias associés"""
+        if self.has_media_counters():
+            return self.media_count
         try:
             return len(self.get_elements())
         except:
@@ -168,7 +218,11 @@ class Signalement(db.Model):
     def get_elements_optimized(self):
         """Récupère les éléments avec URLs optimisées ET catégorisation automatique"""
         try:
-            elements = self.get_elements()
+            media_cache = self._get_media_cache()
+            if media_cache['optimized'] is not None:
+                return copy.deepcopy(media_cache['optimized'])
+
+            elements = media_cache['elements']
             optimized_elements = []
             
             for element in elements:
@@ -205,19 +259,28 @@ class Signalement(db.Model):
                         optimized['preview_url'] = f"{base_url}?width=500&height=500&resize=contain"
                         optimized['full_url'] = base_url
                     
+                    # Dérivés WebP générés par le worker : prioritaires sur les transformations à la volée
+                    derivatives = element.get('derivatives') or {}
+                    for name, field in (('thumbnail', 'thumbnail_url'), ('preview', 'preview_url'),
+                                        ('display', 'display_url'), ('poster', 'poster_url')):
+                        if derivatives.get(name, {}).get('url'):
+                            optimized[field] = derivatives[name]['url']
+                    
                     # Informations d'affichage
                     optimized['can_preview'] = correct_category in ['images', 'videos']
                     optimized['icon'] = self._get_file_icon(mimetype)
                 
                 optimized_elements.append(optimized)
             
-            return optimized_elements
+            media_cache['optimized'] = optimized_elements
+            return copy.deepcopy(optimized_elements)
             
         except Exception as e:
             print(f"❌ Erreur get_elements_optimized: {e}")
             return self.get_elements()
 
-    def _determine_category_from_mimetype(self, mimetype: str) -> str:
+    @staticmethod
+    def _determine_category_from_mimetype(mimetype: str) -> str:
         """Détermine la catégorie correcte basée sur le mimetype"""
         if not mimetype:
             return 'others'
@@ -245,6 +308,16 @@ class Signalement(db.Model):
 
     def get_media_summary(self):
         """Retourne un résumé des médias avec catégorisation corrigée"""
+        if self.has_media_counters():
+            categorized = self.media_images + self.media_videos + self.media_documents + self.media_audios
+            return {
+                'total': self.media_count,
+                'images': self.media_images,
+                'videos': self.media_videos,
+                'documents': self.media_documents,
+                'audios': self.media_audios,
+                'others': self.media_count - categorized
+            }
         try:
             # Utiliser les éléments optimisés qui corrigent automatiquement les catégories
             elements = self.get_elements_optimized()
@@ -299,7 +372,7 @@ class Signalement(db.Model):
         return self.get_media_count() > 0
     
     def cleanup_media(self):
-        """Supprime tous les médias associés de Supabase"""
+        """Libère les médias associés ; les objets Supabase sans autre référence sont supprimés"""
         try:
             media_service = self._get_media_service()
             if not media_service:
@@ -313,11 +386,10 @@ class Signalement(db.Model):
             for element in elements:
                 if 'storage_path' in element:
                     try:
-                        response = media_service.supabase.storage.from_(media_service.bucket_name).remove([element['storage_path']])
-                        if hasattr(response, 'error') and response.error:
-                            print(f"❌ Erreur suppression {element['storage_path']}: {response.error}")
+                        if media_service.delete_media(element['storage_path']):
+                            print(f"✅ Libéré: {element['storage_path']}")
                         else:
-                            print(f"✅ Supprimé: {element['storage_path']}")
+                            print(f"❌ Erreur suppression {element['storage_path']}")
                     except Exception as e:
                         print(f"❌ Erreur suppression {element.get('filename', 'unknown')}: {e}")
             
@@ -338,6 +410,7 @@ class Signalement(db.Model):
             return False
             
         try:
+            self._remember_previous_location()
             self.latitude = location_data.get('latitude')
             self.longitude = location_data.get('longitude')
             self.accuracy = location_data.get('accuracy')
@@ -347,11 +420,38 @@ class Signalement(db.Model):
             self.location_timestamp = location_data.get('timestamp')
             self.location_address = location_data.get('address')
             self.has_location = True
+            self.geohash = self._compute_geohash()
             return True
         except Exception as e:
             print(f"❌ Erreur set_location_data: {e}")
             return False
     
+    def clear_location_data(self):
+        """Supprime toutes les données de localisation"""
+        self._remember_previous_location()
+        self.latitude = None
+        self.longitude = None
+        self.accuracy = None
+        self.altitude = None
+        self.heading = None
+        self.speed = None
+        self.location_timestamp = None
+        self.location_address = None
+        self.has_location = False
+        self.geohash = None
+
+    def _remember_previous_location(self):
+        """Mémorise la position avant déplacement (invalidation des tuiles de la carte)"""
+        if self.latitude is not None and self.longitude is not None:
+            self._previous_location = (float(self.latitude), float(self.longitude))
+
+    def _compute_geohash(self):
+        """Calcule la cellule geohash des coordonnées courantes"""
+        if self.latitude is None or self.longitude is None:
+            return None
+        from app.utils.geo import encode_geohash
+        return encode_geohash(float(self.latitude), float(self.longitude), precision=9)
+
     def get_location_data(self):
         """Retourne les données de localisation sous forme de dictionnaire"""
         if not self.has_location:
@@ -0,0 +1,24 @@
+from datetime import datetime
+from app import db
+
+
+class StatCounter(db.Model):
+    """
+    Compteur matérialisé des tableaux de bord : une ligne par (périmètre, clé).
+    Ex: ('signalement', 'statut:resolu'), ('petition', 'destinataire:Mairie').
+    Maintenu à chaque flush par le service de statistiques, recalculé par la réconciliation.
+    """
+    __tablename__ = 'stat_counters'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'name', name='uq_stat_counters_scope_name'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)  # 'signalement', 'petition'
+    name = db.Column(db.String(150), nullable=False)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<StatCounter {self.scope}:{self.name}={self.value}>"
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.autres.appartenir_service import (
     create_appartenir, get_appartenir_by_id, get_all_appartenirs,
     get_appartenirs_by_citoyen, get_appartenirs_by_groupe,
@@ -68,7 +68,7 @@ def add_appartenir():
 
 # Route pour obtenir un enregistrement par ID
 @appartenir_bp.route('/<int:appartenir_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_appartenir')
+@cached_view(tags=['appartenir:{appartenir_id}'])
 def get_appartenir(appartenir_id):
     """
     Récupère un enregistrement d'appartenance par son ID.
@@ -113,7 +113,7 @@ def get_appartenir(appartenir_id):
 
 # Route pour obtenir tous les enregistrements
 @appartenir_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_appartenirs')
+@cached_view(tags=['appartenirs'])
 def list_appartenirs():
     """
     Récupère tous les enregistrements d'appartenance.
@@ -150,7 +150,7 @@ def list_appartenirs():
 
 # Route pour obtenir les enregistrements par citoyen
 @appartenir_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_appartenirs_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_appartenirs_by_citoyen(citoyen_id):
     """
     Récupère les enregistrements d'appartenance pour un citoyen donné.
@@ -189,7 +189,7 @@ def list_appartenirs_by_citoyen(citoyen_id):
 
 # Route pour obtenir les enregistrements par groupe
 @appartenir_bp.route('/<int:groupe_id>/groupes', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_appartenirs_by_groupe')
+@cached_view(tags=['groupe:{groupe_id}'])
 def list_appartenirs_by_groupe(groupe_id):
     """
     Récupère les enregistrements d'appartenance pour un groupe donné.
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify # type: ignore
 import logging
-from app import cache
+from app import cached_view
 from app.services.autres.groupe_service import (
     create_groupe, get_groupe_by_id, get_all_groupes,
     update_groupe, delete_groupe
@@ -76,7 +76,7 @@ def add_groupe():
 
 # Route pour obtenir un enregistrement par ID
 @groupe_bp.route('/<int:groupe_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_groupe')
+@cached_view(tags=['groupe:{groupe_id}'])
 def get_groupe(groupe_id):
     """
     Récupère un groupe par son ID.
@@ -129,7 +129,7 @@ def get_groupe(groupe_id):
 
 # Route pour obtenir tous les enregistrements
 @groupe_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_groupes')
+@cached_view(tags=['groupes'])
 def list_groupes():
     """
     Récupère tous les groupes.
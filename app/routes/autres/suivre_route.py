@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.models.autres.suivre_model import Suivre
 from app.services.autres.suivre_service import (
     create_suivre, get_suivre_by_id, get_all_suivres,
@@ -83,7 +83,7 @@ def add_suivre():
 
 # Route pour obtenir un enregistrement par ID
 @suivre_bp.route('/<int:suivre_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_suivre')
+@cached_view(tags=['suivre:{suivre_id}'])
 def get_suivre(suivre_id):
     """
     Récupère un enregistrement de suivi par son ID.
@@ -128,7 +128,7 @@ def get_suivre(suivre_id):
 
 # Route pour obtenir tous les enregistrements
 @suivre_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_suivres')
+@cached_view(tags=['suivres'])
 def list_suivres():
     """
     Récupère tous les enregistrements de suivi.
@@ -171,7 +171,7 @@ def list_suivres():
 
 # Route pour obtenir les enregistrements par suivre
 @suivre_bp.route('/<int:suivis_id>/suiveurs', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_suivres_by_suivre')
+@cached_view(tags=['user:{suivis_id}'])
 def list_suiveur_by_suivis(suivis_id):
     """
     Récupère les enregistrements de suivi pour un utilisateur donné.
@@ -211,7 +211,7 @@ def list_suiveur_by_suivis(suivis_id):
 
 # Route pour obtenir les enregistrements par suivis
 @suivre_bp.route('/<int:suiveur_id>/suivis', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_suivres_by_suivis')
+@cached_view(tags=['user:{suiveur_id}'])
 def list_suivis_by_suiveur(suiveur_id):
     """
     Récupère les enregistrements de suivi pour un utilisateur donné.
@@ -344,7 +344,7 @@ def remove_suivre(suivre_id):
 
 # Route pour vérifier si un utilisateur suit un autre
 @suivre_bp.route('/check/<int:suiveur_id>/<int:suivis_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='check_suivre')
+@cached_view(tags=['user:{suiveur_id}'])
 def check_suivre(suiveur_id, suivis_id):
     """
     Vérifie si un utilisateur suit un autre utilisateur.
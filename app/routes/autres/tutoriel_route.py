@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify # type: ignore
 import logging
-from app import cache
+from app import cached_view
 
 from app.services.autres.tutoriel_service import(
     create_tutoriel,delete_tutoriel,get_all_tutoriels,get_tutoriel_by_id,get_tutoriels_by_citoyen,update_tutoriel
@@ -66,7 +66,7 @@ def add_tutoriel():
 
 # Route pour obtenir un enregistrement par ID
 @tutoriel_bp.route('/<int:tutoriel_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_tutoriel')
+@cached_view(tags=['tutoriel:{tutoriel_id}'])
 def get_tutoriel(tutoriel_id):
     """
     Récupère un enregistrement d'appartenance par son ID.
@@ -111,7 +111,7 @@ def get_tutoriel(tutoriel_id):
 
 # Route pour obtenir tous les enregistrements
 @tutoriel_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_tutoriels')
+@cached_view(tags=['tutoriels'])
 def list_tutoriels():
     """
     Récupère tous les enregistrements d'appartenance.
@@ -148,7 +148,7 @@ def list_tutoriels():
 
 # Route pour obtenir les enregistrements par citoyen
 @tutoriel_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_tutoriels_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_tutoriels_by_citoyen(citoyen_id):
     """
     Récupère les enregistrements d'appartenance pour un citoyen donné.
@@ -1,13 +1,14 @@
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.commentaire.commentairePetition_service import (
     create_commentaire, get_commentaire_by_id, get_all_commentaires,
     get_commentaires_by_citoyen, get_commentaires_by_petition,
     update_commentaire, delete_commentaire
 )
 from app.services.notification.supabase_notification_service import send_notification, send_to_multiple_users
+from app.utils.query_helpers import column_values
 
 # Configurer le logging
 logging.basicConfig(level=logging.INFO)
@@ -110,34 +111,31 @@ def add_commentaire():
                 
                 # Récupérer les IDs des autres commentateurs (actifs dans les 30 derniers jours)
                 thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-                other_commenters = CommentairePetition.query.filter(
+                commenter_ids = column_values(CommentairePetition.query.filter(
                     CommentairePetition.petitionID == data['petition_id'],
                     CommentairePetition.citoyenID != data['citoyen_id'],  # Pas l'auteur actuel
                     CommentairePetition.citoyenID != (petition.citoyenID if petition else None),  # Pas le créateur (déjà notifié)
                     CommentairePetition.dateCreated >= thirty_days_ago
-                ).distinct(CommentairePetition.citoyenID).all()
+                ), CommentairePetition.citoyenID)  # Identifiants distincts, sans charger les commentaires
                 
-                if other_commenters:
-                    commenter_ids = list(set([c.citoyenID for c in other_commenters]))  # Dédupliquer
+                if commenter_ids:
+                    send_to_multiple_users(
+                        user_ids=commenter_ids,
+                        title="💭 Nouveau commentaire",
+                        message=f"Un nouveau commentaire a été ajouté à une pétition que vous suivez",
+                        data={
+                            'comment_id': nouveau_commentaire.IDcommentaire,
+                            'petition_id': data['petition_id'],
+                            'petition_title': petition.titre[:50] + "..." if petition and len(petition.titre) > 50 else (petition.titre if petition else ""),
+                            'action': 'community_comment'
+                        },
+                        entity_type='petition',
+                        entity_id=data['petition_id'],
+                        priority='low',
+                        category='social'
+                    )
                     
-                    if commenter_ids:
-                        send_to_multiple_users(
-                            user_ids=commenter_ids,
-                            title="💭 Nouveau commentaire",
-                            message=f"Un nouveau commentaire a été ajouté à une pétition que vous suivez",
-                            data={
-                                'comment_id': nouveau_commentaire.IDcommentaire,
-                                'petition_id': data['petition_id'],
-                                'petition_title': petition.titre[:50] + "..." if petition and len(petition.titre) > 50 else (petition.titre if petition else ""),
-                                'action': 'community_comment'
-                            },
-                            entity_type='petition',
-                            entity_id=data['petition_id'],
-                            priority='low',
-                            category='social'
-                        )
-                        
-                        logger.info(f"Notification envoyée à {len(commenter_ids)} autres commentateurs")
+                    logger.info(f"Notification envoyée à {len(commenter_ids)} autres commentateurs")
                 
             except Exception as community_notif_error:
                 logger.warning(f"Erreur notifications communautaires: {community_notif_error}")
@@ -160,7 +158,7 @@ def add_commentaire():
 
 # Route pour obtenir un enregistrement par ID
 @commentaire_petition_bp.route('/<int:commentaire_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_commentaire')
+@cached_view(tags=['commentaire_petition:{commentaire_id}'])
 def get_commentaire(commentaire_id):
     """
     Récupère un commentaire spécifique via son ID.
@@ -191,7 +189,7 @@ def get_commentaire(commentaire_id):
 
 # Route pour obtenir tous les commentaires
 @commentaire_petition_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires')
+@cached_view(tags=['commentaires_petition'])
 def list_commentaires():
     """
     Récupère tous les commentaires enregistrés.
@@ -212,7 +210,7 @@ def list_commentaires():
 
 # Route pour obtenir les commentaires d'un citoyen
 @commentaire_petition_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_commentaires_by_citoyen(citoyen_id):
     """
     Récupère tous les commentaires d'un citoyen spécifique.
@@ -238,7 +236,7 @@ def list_commentaires_by_citoyen(citoyen_id):
 
 # Route pour obtenir les commentaires d'une pétition
 @commentaire_petition_bp.route('/<int:petition_id>/commentaires', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires_by_petition')
+@cached_view(tags=['petition:{petition_id}'])
 def list_commentaires_by_petition(petition_id):
     """
     Récupère tous les commentaires liés à une pétition spécifique.
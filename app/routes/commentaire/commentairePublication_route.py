@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.commentaire.commentairePublication_service import (
     create_commentaire_publication, get_commentaire_publication_by_id, get_all_commentaires_publication,
     get_commentaires_publication_by_citoyen, get_commentaires_publication_by_publication,
@@ -118,7 +118,7 @@ def add_commentaire_publication():
 
 # Route pour obtenir un enregistrement par ID
 @commentaire_publication_bp.route('/<int:commentaire_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_commentaire_publication')
+@cached_view(tags=['commentaire_publication:{commentaire_id}'])
 def get_commentaire_publication(commentaire_id):
     """
     Récupère un commentaire de publication spécifique via son ID.
@@ -149,7 +149,7 @@ def get_commentaire_publication(commentaire_id):
 
 # Route pour obtenir tous les commentaires de publication
 @commentaire_publication_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires_publication')
+@cached_view(tags=['commentaires_publication'])
 def list_commentaires_publication():
     """
     Récupère tous les commentaires de publication enregistrés.
@@ -170,7 +170,7 @@ def list_commentaires_publication():
 
 # Route pour obtenir les commentaires de publication d'un citoyen
 @commentaire_publication_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires_publication_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_commentaires_publication_by_citoyen(citoyen_id):
     """
     Récupère tous les commentaires de publication d'un citoyen spécifique.
@@ -196,7 +196,7 @@ def list_commentaires_publication_by_citoyen(citoyen_id):
 
 # Route pour obtenir les commentaires de publication d'une publication
 @commentaire_publication_bp.route('/<int:publication_id>/publications', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires_publication_by_publicationID')
+@cached_view(tags=['publication:{publication_id}'])
 def list_commentaires_publication_by_publication(publication_id):
     """
     Récupère tous les commentaires de publication liés à une publication spécifique.
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.commentaire.commentaireSignalement_service import (
     create_commentaire_signalement, get_commentaire_signalement_by_id, get_all_commentaires_signalement,
     get_commentaires_signalement_by_citoyen, get_commentaires_signalement_by_signalement,
@@ -94,7 +94,7 @@ def add_commentaire_signalement():
 
 # Route pour obtenir un enregistrement par ID
 @commentaire_signalement_bp.route('/<int:commentaire_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_commentaire_signalement')
+@cached_view(tags=['commentaire_signalement:{commentaire_id}'])
 def get_commentaire_signalement(commentaire_id):
     """
     Récupère un commentaire de signalement spécifique via son ID.
@@ -125,7 +125,7 @@ def get_commentaire_signalement(commentaire_id):
 
 # Route pour obtenir tous les commentaires de signalement
 @commentaire_signalement_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires_signalement')
+@cached_view(tags=['commentaires_signalement'])
 def list_commentaires_signalement():
     """
     Récupère tous les commentaires de signalement enregistrés.
@@ -146,7 +146,7 @@ def list_commentaires_signalement():
 
 # Route pour obtenir les commentaires de signalement d'un citoyen
 @commentaire_signalement_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_commentaires_signalement_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_commentaires_signalement_by_citoyen(citoyen_id):
     """
     Récupère tous les commentaires de signalement d'un citoyen spécifique.
@@ -12,6 +12,13 @@ from app.services.notification.supabase_notification_service import (
     get_notification_stats, update_user_preferences, send_to_multiple_users,
     send_notification
 )
+from app.services.notification.notification_analytics_service import get_notification_rollup, mark_notifications_read
+from app.services.notification.notification_inbox_service import (
+    get_recent_notification_ids, get_unread_count, inbox_all_read, inbox_marked_read,
+    inbox_notification_removed, load_notifications
+)
+from app.services.search.search_service import remove_document, search_notifications as search_notifications_index
+from app.utils.query_helpers import column_values
 import logging
 from datetime import datetime, timedelta
 
@@ -221,15 +228,14 @@ def mark_all_as_read():
         user_id = get_jwt_identity()
         
         try:
-            updated_count = NotificationHistory.query.filter_by(
-                user_id=user_id,
-                is_read=False
-            ).update({
-                'is_read': True,
-                'clicked_at': db.func.now()
-            })
+            # Verrou, UPDATE et agrégats dans la même transaction (non lues : is_read faux ou NULL)
+            updated_count = mark_notifications_read(
+                NotificationHistory.query.filter_by(user_id=user_id),
+                {'is_read': True, 'clicked_at': db.func.now()}
+            )
             
             db.session.commit()
+            inbox_all_read(user_id)
             
             logger.info(f"[MARK-ALL-READ] {updated_count} notifications marquées lues pour user {user_id}")
             
@@ -375,10 +381,7 @@ def count_unread():
     try:
         user_id = get_jwt_identity()
         
-        count = NotificationHistory.query.filter_by(
-            user_id=user_id,
-            is_read=False
-        ).count()
+        count = get_unread_count(user_id)
         
         return jsonify({
             'success': True,
@@ -408,8 +411,11 @@ def delete_notification(notification_id):
             return jsonify({'error': 'Notification non trouvée'}), 404
         
         try:
+            was_unread = not notification.is_read
             db.session.delete(notification)
             db.session.commit()
+            inbox_notification_removed(user_id, notification_id, was_unread)
+            remove_document('notification', notification_id)
             
             logger.info(f"[DELETE] Notification {notification_id} supprimée pour user {user_id}")
             
@@ -530,8 +536,7 @@ def broadcast_notification():
         if user_types and user_types != ['all']:
             query = query.filter(User.type_user.in_(user_types))
         
-        active_users = query.all()
-        user_ids = [user.IDuser for user in active_users]
+        user_ids = column_values(query, User.IDuser, distinct=False)
         
         # Envoyer les notifications
         success_count = send_to_multiple_users(
@@ -592,8 +597,7 @@ def send_bulk_by_role():
         
         # Récupérer utilisateurs du rôle cible
         from app.models import User
-        users = User.query.filter_by(type_user=target_role, is_deleted=False).all()
-        user_ids = [user.IDuser for user in users]
+        user_ids = column_values(User.query.filter_by(type_user=target_role, is_deleted=False), User.IDuser, distinct=False)
         
         if not user_ids:
             return jsonify({
@@ -697,35 +701,31 @@ def admin_notification_stats():
         if user_role != 'admin':
             return jsonify({'error': 'Accès réservé aux administrateurs'}), 403
         
-        # Statistiques globales
-        total_notifications = NotificationHistory.query.count()
-        successful_notifications = NotificationHistory.query.filter_by(sent_successfully=True).count()
+        # Statistiques des notifications lues depuis les agrégats journaliers
+        all_time = get_notification_rollup()
+        last_30_days = get_notification_rollup(days=30)
+        total_notifications = all_time['total']
+        successful_notifications = all_time['successful']
         failed_notifications = total_notifications - successful_notifications
+        category_stats = {
+            cat: {'total': values['total'], 'successful': values['successful']}
+            for cat, values in last_30_days['by_category'].items()
+        }
         
-        # Statistiques des tokens
-        total_tokens = FCMToken.query.count()
-        active_tokens = FCMToken.query.filter_by(is_active=True).count()
-        
-        # Statistiques par type de device
-        android_tokens = FCMToken.query.filter_by(device_type='android', is_active=True).count()
-        ios_tokens = FCMToken.query.filter_by(device_type='ios', is_active=True).count()
-        web_tokens = FCMToken.query.filter_by(device_type='web', is_active=True).count()
-        
-        # Statistiques par catégorie (derniers 30 jours)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        recent_notifications = NotificationHistory.query.filter(
-            NotificationHistory.created_at >= thirty_days_ago
-        ).all()
-        
-        category_stats = {}
-        for notif in recent_notifications:
-            cat = notif.category or 'general'
-            if cat not in category_stats:
-                category_stats[cat] = {'total': 0, 'successful': 0}
-            category_stats[cat]['total'] += 1
-            if notif.sent_successfully:
-                category_stats[cat]['successful'] += 1
+        # Statistiques des tokens en une requête groupée
+        token_counts = db.session.query(
+            FCMToken.device_type, FCMToken.is_active, db.func.count()
+        ).group_by(FCMToken.device_type, FCMToken.is_active).all()
+        
+        total_tokens = sum(count for _, _, count in token_counts)
+        active_tokens = sum(count for _, is_active, count in token_counts if is_active)
+        active_by_platform = {device: 0 for device in ('android', 'ios', 'web')}
+        for device_type, is_active, count in token_counts:
+            if is_active and device_type in active_by_platform:
+                active_by_platform[device_type] += count
+        android_tokens = active_by_platform['android']
+        ios_tokens = active_by_platform['ios']
+        web_tokens = active_by_platform['web']
         
         return jsonify({
             'success': True,
@@ -1032,10 +1032,15 @@ def get_recent_notifications():
         # Dernières 24 heures
         twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
         
-        recent_notifications = NotificationHistory.query.filter(
-            NotificationHistory.user_id == user_id,
-            NotificationHistory.created_at >= twenty_four_hours_ago
-        ).order_by(NotificationHistory.created_at.desc()).limit(50).all()
+        # Identifiants depuis la boîte de réception Redis, SQL à défaut
+        recent_ids = get_recent_notification_ids(user_id, limit=50, since=twenty_four_hours_ago)
+        if recent_ids is not None:
+            recent_notifications = load_notifications(recent_ids)
+        else:
+            recent_notifications = NotificationHistory.query.filter(
+                NotificationHistory.user_id == user_id,
+                NotificationHistory.created_at >= twenty_four_hours_ago
+            ).order_by(NotificationHistory.created_at.desc()).limit(50).all()
         
         notifications_data = []
         for notif in recent_notifications:
@@ -1184,16 +1189,16 @@ def batch_mark_read():
             return jsonify({'error': 'Liste des IDs invalide'}), 400
         
         # Marquer comme lues
-        updated_count = NotificationHistory.query.filter(
-            NotificationHistory.id.in_(notification_ids),
-            NotificationHistory.user_id == user_id,
-            NotificationHistory.is_read == False
-        ).update({
-            'is_read': True,
-            'clicked_at': db.func.now()
-        }, synchronize_session=False)
+        updated_count = mark_notifications_read(
+            NotificationHistory.query.filter(
+                NotificationHistory.id.in_(notification_ids),
+                NotificationHistory.user_id == user_id
+            ),
+            {'is_read': True, 'clicked_at': db.func.now()}
+        )
         
         db.session.commit()
+        inbox_marked_read(user_id, updated_count)
         
         return jsonify({
             'success': True,
@@ -1218,20 +1223,20 @@ def search_notifications():
         if not query or len(query) < 2:
             return jsonify({'error': 'Requête de recherche trop courte'}), 400
         
-        # Recherche dans titre et message
-        notifications = NotificationHistory.query.filter(
-            NotificationHistory.user_id == user_id,
-            db.or_(
-                NotificationHistory.title.ilike(f'%{query}%'),
-                NotificationHistory.message.ilike(f'%{query}%')
-            )
-        ).order_by(NotificationHistory.created_at.desc()).limit(50).all()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
+        
+        # Recherche plein texte dans titre et message, classée par pertinence
+        results, total = search_notifications_index(int(user_id), query, page=page, per_page=per_page)
         
         return jsonify({
             'success': True,
             'query': query,
-            'results': [n.to_dict() for n in notifications],
-            'count': len(notifications)
+            'results': [{**n.to_dict(), 'score': round(score, 4)} for n, score in results],
+            'count': len(results),
+            'total': total,
+            'page': page,
+            'per_page': per_page
         }), 200
         
     except Exception as e:
@@ -1380,22 +1385,15 @@ def get_weekly_digest():
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=7)
         
-        # Statistiques de la semaine
-        stats = db.session.execute(text("""
-            SELECT 
-                category,
-                COUNT(*) as count,
-                COUNT(*) FILTER (WHERE priority = 'urgent') as urgent_count
-            FROM notification_history 
-            WHERE user_id = :user_id 
-            AND created_at BETWEEN :start_date AND :end_date
-            GROUP BY category
-            ORDER BY count DESC
-        """), {
-            'user_id': user_id,
-            'start_date': start_date,
-            'end_date': end_date
-        }).fetchall()
+        # Statistiques de la semaine (requête groupée bornée à l'utilisateur et à la période)
+        stats = db.session.query(
+            NotificationHistory.category.label('category'),
+            db.func.count().label('count'),
+            db.func.sum(db.case((NotificationHistory.priority == 'urgent', 1), else_=0)).label('urgent_count')
+        ).filter(
+            NotificationHistory.user_id == user_id,
+            NotificationHistory.created_at.between(start_date, end_date)
+        ).group_by(NotificationHistory.category).order_by(db.func.count().desc()).all()
         
         # Notifications les plus importantes de la semaine
         important_notifications = NotificationHistory.query.filter(
@@ -1413,7 +1411,7 @@ def get_weekly_digest():
                 {
                     'category': stat.category,
                     'count': stat.count,
-                    'urgent_count': stat.urgent_count
+                    'urgent_count': int(stat.urgent_count or 0)
                 } for stat in stats
             ],
             'important_notifications': [n.to_dict() for n in important_notifications],
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.partage.partagePetition_service import (
     create_partager_petition, get_partager_petition_by_id, get_all_partager_petitions,
     get_partager_petitions_by_citoyen, get_partager_petitions_by_petition,
@@ -73,7 +73,7 @@ def add_partager_petition():
 
 # Route pour obtenir un enregistrement par ID
 @partager_petition_bp.route('/<int:partager_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_partager_petition')
+@cached_view(tags=['partage_petition:{partager_id}'])
 def get_partager_petition(partager_id):
     """
     Récupère un partage de pétition par son ID.
@@ -122,7 +122,7 @@ def get_partager_petition(partager_id):
 
 # Route pour obtenir tous les enregistrements
 @partager_petition_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_petitions')
+@cached_view(tags=['partages_petition'])
 def list_partager_petitions():
     """
     Récupère tous les partages de pétition.
@@ -163,7 +163,7 @@ def list_partager_petitions():
 
 # Route pour obtenir les enregistrements par citoyen
 @partager_petition_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_petitions_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_partager_petitions_by_citoyen(citoyen_id):
     """
     Récupère les partages de pétition pour un citoyen donné.
@@ -206,7 +206,7 @@ def list_partager_petitions_by_citoyen(citoyen_id):
 
 # Route pour obtenir les enregistrements par pétition
 @partager_petition_bp.route('/<int:petition_id>/petitions', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_petitions_by_petition')
+@cached_view(tags=['petition:{petition_id}'])
 def list_partager_petitions_by_petition(petition_id):
     """
     Récupère les partages de pétition pour une pétition donnée.
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.partage.partagePublication_service import (
     create_partager_publication, get_partager_publication_by_id, get_all_partager_publications,
     get_partager_publications_by_citoyen, get_partager_publications_by_publication,
@@ -67,7 +67,7 @@ def add_partager_publication():
 
 # Route pour obtenir un enregistrement par ID
 @partager_publication_bp.route('/<int:partager_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_partager_publication')
+@cached_view(tags=['partage_publication:{partager_id}'])
 def get_partager_publication(partager_id):
     """
     Récupère un partage de publication spécifique via son ID.
@@ -98,7 +98,7 @@ def get_partager_publication(partager_id):
 
 # Route pour obtenir tous les partages de publication
 @partager_publication_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_publications')
+@cached_view(tags=['partages_publication'])
 def list_partager_publications():
     """
     Récupère tous les partages de publication enregistrés.
@@ -119,7 +119,7 @@ def list_partager_publications():
 
 # Route pour obtenir les partages de publication d'un citoyen
 @partager_publication_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_publications_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_partager_publications_by_citoyen(citoyen_id):
     """
     Récupère tous les partages de publication d'un citoyen spécifique.
@@ -145,7 +145,7 @@ def list_partager_publications_by_citoyen(citoyen_id):
 
 # Route pour obtenir les partages de publication d'une publication
 @partager_publication_bp.route('/<int:publication_id>/publications', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_publications_by_publication')
+@cached_view(tags=['publication:{publication_id}'])
 def list_partager_publications_by_publication(publication_id):
     """
     Récupère tous les partages de publication liés à une publication spécifique.
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.partage.partageSignalement_service import (
     create_partager_signalement, get_partager_signalement_by_id, get_all_partager_signalements,
     get_partager_signalements_by_citoyen, get_partager_signalements_by_signalement,
@@ -67,7 +67,7 @@ def add_partager_signalement():
 
 # Route pour obtenir un enregistrement par ID
 @partager_signalement_bp.route('/<int:partager_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_partager_signalement')
+@cached_view(tags=['partage_signalement:{partager_id}'])
 def get_partager_signalement(partager_id):
     """
     Récupère un partage de signalement spécifique via son ID.
@@ -98,7 +98,7 @@ def get_partager_signalement(partager_id):
 
 # Route pour obtenir tous les partages de signalement
 @partager_signalement_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_signalements')
+@cached_view(tags=['partages_signalement'])
 def list_partager_signalements():
     """
     Récupère tous les partages de signalement enregistrés.
@@ -119,7 +119,7 @@ def list_partager_signalements():
 
 # Route pour obtenir les partages de signalement d'un citoyen
 @partager_signalement_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_signalements_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_partager_signalements_by_citoyen(citoyen_id):
     """
     Récupère tous les partages de signalement d'un citoyen spécifique.
@@ -145,7 +145,7 @@ def list_partager_signalements_by_citoyen(citoyen_id):
 
 # Route pour obtenir les partages de signalement d'un signalement
 @partager_signalement_bp.route('/<int:signalement_id>/signalements', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_partager_signalements_by_signalement')
+@cached_view(tags=['signalement:{signalement_id}'])
 def list_partager_signalements_by_signalement(signalement_id):
     """
     Récupère tous les partages de signalement liés à un signalement spécifique.
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.reaction.appreciation_service import (
     create_appreciation, get_appreciation_by_id, get_all_appreciations,
     get_appreciations_by_citoyen, get_appreciations_by_publication,
@@ -95,7 +95,7 @@ def add_appreciation():
 
 # Route pour obtenir un enregistrement par ID
 @appreciation_bp.route('/<int:appreciation_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_appreciation')
+@cached_view(tags=['appreciation:{appreciation_id}'])
 def get_appreciation(appreciation_id):
     """
     Récupère une appréciation spécifique via son ID.
@@ -125,7 +125,7 @@ def get_appreciation(appreciation_id):
 
 # Route pour obtenir tous les enregistrements
 @appreciation_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_appreciations')
+@cached_view(tags=['appreciations'])
 def list_appreciations():
     """
     Récupère toutes les appréciations enregistrées.
@@ -145,7 +145,7 @@ def list_appreciations():
 
 # Route pour obtenir les enregistrements par citoyen
 @appreciation_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_appreciations_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_appreciations_by_citoyen(citoyen_id):
     """
     Récupère toutes les appréciations d'un citoyen spécifique.
@@ -170,7 +170,7 @@ def list_appreciations_by_citoyen(citoyen_id):
 
 # Route pour obtenir les enregistrements par publication
 @appreciation_bp.route('/<int:publication_id>/publications', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_appreciations_by_publication')
+@cached_view(tags=['publication:{publication_id}'])
 def list_appreciations_by_publication(publication_id):
     """
     Récupère toutes les appréciations liées à une publication spécifique.
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.reaction.signature_service import (
     create_signature, get_signature_by_id, get_all_signatures,
     get_signatures_by_citoyen, get_signatures_by_petition,
@@ -75,7 +75,7 @@ def add_signature():
     
 # Route pour obtenir un enregistrement par ID
 @signature_bp.route('/<int:signature_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_signature')
+@cached_view(tags=['signature:{signature_id}'])
 def get_signature(signature_id):
     """
     Récupère une signature spécifique via son ID.
@@ -106,7 +106,7 @@ def get_signature(signature_id):
 
 # Route pour obtenir tous les enregistrements
 @signature_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_signatures')
+@cached_view(tags=['signatures'])
 def list_signatures():
     """
     Récupère toutes les signatures enregistrées.
@@ -127,7 +127,7 @@ def list_signatures():
 
 # Route pour obtenir les enregistrements par citoyen
 @signature_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_signatures_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_signatures_by_citoyen(citoyen_id):
     """
     Récupère toutes les signatures d'un citoyen spécifique.
@@ -153,7 +153,7 @@ def list_signatures_by_citoyen(citoyen_id):
 
 # Route pour obtenir les enregistrements par pétition
 @signature_bp.route('/<int:petition_id>/signatures', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_signatures_by_petition')
+@cached_view(tags=['petition:{petition_id}'])
 def list_signatures_by_petition(petition_id):
     """
     Récupère toutes les signatures liées à une pétition spécifique.
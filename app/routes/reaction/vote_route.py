@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.reaction.vote_service import (
     create_vote, get_vote_by_id, get_all_votes,
     get_votes_by_citoyen, get_votes_by_signalement,
@@ -81,12 +81,6 @@ def add_vote():
                 'message': 'Vote déjà présent (même supprimé)'
             }), 409  # Cas 2 : vote existe déjà dans la DB (ex : soft-deleted)
 
-        # Nettoyage cache
-        try:
-            cache.delete(f'check_user_vote::{signalement_id}::{citoyen_id}')
-        except:
-            pass  # Pas bloquant
-
         return jsonify({
             'vote_id': vote.IDvote,
             'message': 'Vote créé avec succès'
@@ -98,7 +92,7 @@ def add_vote():
 
 
 @vote_bp.route('/<int:vote_id>', methods=['GET'])
-@cache.cached(timeout=0, key_prefix='get_vote')
+@cached_view(tags=['vote:{vote_id}'])
 def get_vote(vote_id):
     """
     Récupère un vote spécifique via son ID.
@@ -151,7 +145,7 @@ def list_votes():
 
 # Route pour obtenir les enregistrements par citoyen
 @vote_bp.route('/<int:citoyen_id>/votes', methods=['GET'])
-@cache.cached(timeout=0, key_prefix='list_votes_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_votes_by_citoyen(citoyen_id):
     """
     Récupère tous les votes d'un citoyen spécifique.
@@ -177,7 +171,7 @@ def list_votes_by_citoyen(citoyen_id):
 
 # Route pour obtenir les enregistrements par signalement
 @vote_bp.route('/<int:signalement_id>/votes', methods=['GET'])
-@cache.cached(timeout=0, key_prefix='list_votes_by_signalement')
+@cached_view(tags=['signalement:{signalement_id}'])
 def list_votes_by_signalement(signalement_id):
     """
     Récupère tous les votes liés à un signalement spécifique.
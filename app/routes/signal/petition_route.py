@@ -1,7 +1,7 @@
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 import logging
-from app import db, cache
+from app import db, cached_view
 from app.models import Petition
 from app.services import (
     create_petition,
@@ -11,6 +11,7 @@ from app.services import (
     update_petition,
     delete_petition,
     search_petition_by_keyword,
+    get_petition_statistics,
 )
 
 from app.services.notification.supabase_notification_service import send_notification, send_to_multiple_users
@@ -100,7 +101,7 @@ def add_petition():
         return jsonify({'message': 'Erreur interne', 'error': str(e)}), 500
 
 @petition_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_petitions')
+@cached_view(tags=['petitions'])
 def list_petitions():
     petitions = get_all_petitions()
     return jsonify([{
@@ -148,7 +149,7 @@ def get_petition(petition_id):
     })
 
 @petition_bp.route('/<int:citoyen_id>/citoyens', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_petitions_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_petitions_by_citoyen(citoyen_id):
     petitions = get_petitions_by_citoyen(citoyen_id)
     return jsonify([{
@@ -222,7 +223,11 @@ def search_petitions():
         return jsonify({'message': 'Paramètre "q" requis'}), 400
 
     try:
-        resultats = search_petition_by_keyword(query)
+        resultats = search_petition_by_keyword(
+            query,
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', 20, type=int)
+        )
         return jsonify([{
             'id': p.IDpetition,
             'titre': p.titre,
@@ -259,25 +264,7 @@ def get_petition_files(petition_id):
 @petition_bp.route('/stats', methods=['GET'])
 def get_petition_stats():
     try:
-        total_petitions = Petition.query.filter_by(is_deleted=False).count()
-        active_petitions = Petition.query.filter_by(is_deleted=False, statut='en_attente').count()
-        expired_petitions = Petition.query.filter(
-            Petition.is_deleted == False,
-            Petition.dateFin < datetime.utcnow()
-        ).count()
-        
-        # Stats par destinataire
-        destinataire_stats = db.session.query(
-            Petition.destinataire,
-            db.func.count(Petition.IDpetition).label('count')
-        ).filter_by(is_deleted=False).group_by(Petition.destinataire).all()
-        
-        return jsonify({
-            'total_petitions': total_petitions,
-            'active_petitions': active_petitions,
-            'expired_petitions': expired_petitions,
-            'destinataire_distribution': {stat.destinataire: stat.count for stat in destinataire_stats}
-        }), 200
+        return jsonify(get_petition_statistics()), 200
         
     except Exception as e:
         logger.error(f"Erreur GET /stats : {str(e)}")
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import logging
-from app import cache
+from app import cached_view
 from app.services.signal.publication_service import (
     create_publication, get_publication_by_id, get_all_publications,
     get_publications_by_autorite, get_publications_by_signalement,
@@ -103,7 +103,7 @@ def add_publication():
 
 # Route pour obtenir un enregistrement par ID
 @publication_bp.route('/<int:publication_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_publication')
+@cached_view(tags=['publication:{publication_id}'])
 def get_publication(publication_id):
     """
     Récupère une publication spécifique par son identifiant.
@@ -138,7 +138,7 @@ def get_publication(publication_id):
 
 # Route pour obtenir tous les enregistrements
 @publication_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_publications')
+@cached_view(tags=['publications'])
 def list_publications():
     """
     Récupère toutes les publications enregistrées.
@@ -163,7 +163,7 @@ def list_publications():
 
 # Route pour obtenir les enregistrements par autorité
 @publication_bp.route('/<int:autorite_id>/autorites', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_publications_by_autorite')
+@cached_view(tags=['authorite:{autorite_id}'])
 def list_publications_by_autorite(autorite_id):
     """
     Récupère toutes les publications associées à une autorité spécifique.
@@ -193,7 +193,7 @@ def list_publications_by_autorite(autorite_id):
 
 # Route pour obtenir les enregistrements par signalement
 @publication_bp.route('/<int:signalement_id>/signalements', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_publications_by_signalement')
+@cached_view(tags=['signalement:{signalement_id}'])
 def list_publications_by_signalement(signalement_id):
     """
     Récupère toutes les publications associées à un signalement spécifique.
@@ -1,12 +1,9 @@
-import base64
 from datetime import datetime
 import logging
-from flask import Blueprint, current_app, request, jsonify, send_file, abort
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, abort, stream_with_context
 from io import BytesIO
-import numpy as np
 from flask_jwt_extended import get_jwt_identity, jwt_required
-import requests
-from app import cache, db
+from app import db, cached_view
 from app.models import Signalement
 from app.models.users.admin_model import Admin
 from app.services import (
@@ -18,14 +15,26 @@ from app.services import (
     delete_signalement,
     search_signalements_by_keyword,
     get_signalement_with_fresh_urls,
-    export_signalements_geojson,
+    stream_signalements_export,
     get_advanced_signalement_stats,
     get_hotspots_analysis,
     get_signalements_by_status_with_location,
     get_user_signalement_stats,
-    get_signalements_with_location
+    get_signalements_with_location,
+    get_signalement_tile,
+    get_media_stats,
+    sync_spatial_index,
+    invalidate_signalement_cache,
+    get_signalements_by_location as find_signalements_by_location,
+    get_signalements_page,
+    enqueue_job
 )
-from app.supabase_media_service import SupabaseMediaService
+from app.services.search.search_service import search_signalements_near
+from app.services.signal.signalement_service import TILE_MAX_ZOOM
+from app.utils.query_helpers import interested_citizen_ids
+from app.services.signal.ai_validation_service import run_ai_validation, calculate_priority, release_media_payloads
+from app.supabase_media_service import get_media_service
+from app.utils.media_buffer import MediaBuffer, MediaTooLarge
 from app.services.notification.supabase_notification_service import send_notification, send_to_multiple_users
 from werkzeug.utils import secure_filename
 import uuid
@@ -34,16 +43,15 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 signalement_bp = Blueprint('signalement', __name__)
-media_service = SupabaseMediaService()
 
 @signalement_bp.route('/add', methods=['POST'])
 def add_signalement():
     """
     Crée un nouveau signalement avec validation IA, géolocalisation et médias
     """
+    media_list = []
     try:
         print("📝 === DÉBUT CRÉATION SIGNALEMENT ===")
-        media_list = []
         data = {}
 
         if request.content_type and 'application/json' in request.content_type:
@@ -55,18 +63,29 @@ def add_signalement():
                 return jsonify({'error': 'Données JSON vides'}), 400
         else:
             data = request.form.to_dict()
+            # Limite lue dans la configuration : ne dépend pas du client de stockage
+            max_file_size = current_app.config['MAX_MEDIA_FILE_SIZE']
             for key in request.files:
                 file = request.files[key]
                 if file and file.filename:
                     try:
-                        file_content = file.read()
-                        if len(file_content) > 0:
+                        # Copie par blocs : les gros fichiers sont déversés sur disque
+                        buffer = MediaBuffer.from_stream(file.stream, max_size=max_file_size)
+                        if buffer.size > 0:
                             media_list.append({
                                 'filename': secure_filename(file.filename),
                                 'mimetype': file.content_type or 'application/octet-stream',
-                                'data': file_content,
-                                'size': len(file_content)
+                                'data': buffer,
+                                'size': buffer.size
                             })
+                    except MediaTooLarge:
+                        # Fichier refusé : ne pas créer le signalement sans lui
+                        print(f"❌ Fichier trop volumineux: {file.filename}")
+                        return jsonify({
+                            'message': 'Fichier trop volumineux',
+                            'filename': file.filename,
+                            'max_size': max_file_size
+                        }), 413
                     except Exception as file_error:
                         print(f"❌ Erreur lecture fichier {file.filename}: {file_error}")
                         continue
@@ -130,338 +149,35 @@ def add_signalement():
         republier_par = int(data.get('republierPar')) if data.get('republierPar') else None
         id_moderateur = int(data.get('id_moderateur')) if data.get('id_moderateur') else None
 
-        type_signalement = None
-        ai_validation_results = {}
-        try:
-            print("🤖 Validation IA en cours...")
-            try:
-                text_response = requests.post(
-                    'http://localhost:5001/process_text',
-                    json={'text': data['description']},
-                    timeout=15
-                )
-                if text_response.status_code == 200:
-                    text_result = text_response.json()
-                    text_features = text_result.get('features')
-                    ai_validation_results['text_processing'] = {
-                        'success': True,
-                        'features_count': len(text_features) if text_features else 0,
-                        'text_length': text_result.get('text_length', 0)
-                    }
-                    print(f"✅ Analyse textuelle réussie: {len(text_features)} features")
-                else:
-                    print(f"⚠️ Erreur analyse textuelle: {text_response.status_code}")
-                    text_features = None
-                    ai_validation_results['text_processing'] = {
-                        'success': False,
-                        'error': f"HTTP {text_response.status_code}"
-                    }
-            except requests.exceptions.RequestException as text_error:
-                print(f"⚠️ Service IA texte indisponible: {text_error}")
-                text_features = None
-                ai_validation_results['text_processing'] = {
-                    'success': False,
-                    'error': str(text_error)
-                }
-
-            media_features_list = []
-            is_valid = True
-            ai_validation_results['media_processing'] = []
-            if media_list:
-                for i, media in enumerate(media_list):
-                    media_result = {'index': i, 'filename': media.get('filename', f'media_{i}')}
-
-                    try:
-                        media_payload = {}
-                        if 'data' in media and media['data']:
-                            if isinstance(media['data'], bytes):
-                                file_data = media['data']
-                            else:
-                                file_data = media['data'].encode() if isinstance(media['data'], str) else media['data']
-
-                            media_base64 = base64.b64encode(file_data).decode('utf-8')
-                            mime_type = media.get('mimetype', 'application/octet-stream')
-                            media_payload['base64'] = f"data:{mime_type};base64,{media_base64}"
-                            print(f"📤 Envoi média {i+1} en base64: {len(file_data)} bytes")
-                            media_result['method'] = 'base64_from_memory'
-                        elif 'filename' in media:
-                            filename = media['filename']
-                            possible_paths = [
-                                filename,
-                                os.path.join('uploads', filename),
-                                os.path.join('temp', filename),
-                                os.path.join('media', filename),
-                                os.path.join('static', 'uploads', filename),
-                                os.path.join('../uploads', filename),
-                            ]
-
-                            file_found = False
-                            for path in possible_paths:
-                                if os.path.exists(path):
-                                    try:
-                                        with open(path, 'rb') as f:
-                                            file_data = f.read()
-
-                                        media_base64 = base64.b64encode(file_data).decode('utf-8')
-                                        mime_type = media.get('mimetype', 'application/octet-stream')
-                                        media_payload['base64'] = f"data:{mime_type};base64,{media_base64}"
-                                        print(f"📁 Fichier trouvé: {path} ({len(file_data)} bytes)")
-                                        media_result['method'] = 'file_found'
-                                        media_result['found_path'] = path
-                                        file_found = True
-                                        break
-                                    except Exception as read_error:
-                                        print(f"⚠️ Erreur lecture {path}: {read_error}")
-                                        continue
-
-                            if not file_found:
-                                print(f"❌ Fichier non trouvé: {filename}")
-                                print(f"📂 Chemins recherchés: {possible_paths}")
-                                media_result.update({
-                                    'success': False,
-                                    'error': f'Fichier non trouvé: {filename}',
-                                    'searched_paths': possible_paths
-                                })
-                                ai_validation_results['media_processing'].append(media_result)
-                                continue
-                        else:
-                            media_result.update({'success': False, 'error': 'Aucune source de données'})
-                            ai_validation_results['media_processing'].append(media_result)
-                            continue
-
-                        if media['mimetype'].startswith('image'):
-                            endpoint = '/process_image'
-                            timeout = 30
-                        elif media['mimetype'].startswith('video'):
-                            endpoint = '/process_video'
-                            timeout = 120
-                        else:
-                            media_result.update({'success': False, 'error': 'Type de média non supporté'})
-                            ai_validation_results['media_processing'].append(media_result)
-                            continue
-
-                        print(f"🤖 Appel IA: {endpoint} pour {media.get('filename', f'media_{i}')}")
-                        media_response = requests.post(
-                            f'http://localhost:5001{endpoint}',
-                            json=media_payload,
-                            timeout=timeout,
-                            headers={'Content-Type': 'application/json'}
-                        )
-
-                        if media_response.status_code == 200:
-                            media_data = media_response.json()
-                            if 'features' in media_data:
-                                media_features_list.append(media_data['features'])
-                                media_result.update({
-                                    'success': True,
-                                    'features_count': len(media_data['features']),
-                                    'processing_info': {
-                                        'status': media_data.get('status'),
-                                        'image_size': media_data.get('image_size'),
-                                        'video_info': media_data.get('video_info')
-                                    }
-                                })
-                                print(f"✅ Média {i+1} traité avec succès: {len(media_data['features'])} features")
-                            else:
-                                media_result.update({'success': False, 'error': 'Pas de features retournées'})
-                                print(f"⚠️ Média {i+1}: pas de features dans la réponse")
-                        else:
-                            error_msg = f"HTTP {media_response.status_code}"
-                            try:
-                                error_detail = media_response.json().get('error', 'Erreur inconnue')
-                                error_msg += f": {error_detail}"
-                            except:
-                                try:
-                                    error_msg += f": {media_response.text[:200]}"
-                                except:
-                                    pass
-
-                            media_result.update({'success': False, 'error': error_msg})
-                            print(f"❌ Erreur IA média {i+1}: {error_msg}")
-
-                    except requests.exceptions.Timeout:
-                        media_result.update({'success': False, 'error': 'Timeout - traitement trop long'})
-                        print(f"⏱️ Timeout média {i+1}")
-
-                    except requests.exceptions.RequestException as media_error:
-                        media_result.update({'success': False, 'error': f'Erreur réseau: {str(media_error)}'})
-                        print(f"🌐 Erreur réseau média {i+1}: {media_error}")
-
-                    except Exception as unexpected_error:
-                        media_result.update({'success': False, 'error': f'Erreur inattendue: {str(unexpected_error)}'})
-                        print(f"💥 Erreur inattendue média {i+1}: {unexpected_error}")
-
-                    ai_validation_results['media_processing'].append(media_result)
-
-            if text_features and media_features_list:
-                try:
-                    media_features = np.mean(media_features_list, axis=0).tolist()
-                    validation_response = requests.post(
-                        'http://localhost:5001/validate',
-                        json={
-                            'text_features': text_features,
-                            'media_features': media_features,
-                            'mode': current_app.config.get('AI_VALIDATION_MODE', 'normal')
-                        },
-                        timeout=15
-                    )
-                    if validation_response.status_code == 200:
-                        validation_data = validation_response.json()
-                        is_valid = validation_data.get('is_valid', True)
-
-                        ai_validation_results['coherence_check'] = {
-                            'success': True,
-                            'is_valid': is_valid,
-                            'similarity_score': validation_data.get('similarity_score'),
-                            'confidence': validation_data.get('confidence'),
-                            'threshold_used': validation_data.get('threshold_used')
-                        }
-
-                        print(f"🔍 Validation cohérence: {'✅ Valide' if is_valid else '❌ Non valide'}")
-                        print(f"   Similarité: {validation_data.get('similarity_score', 'N/A')}")
-                        print(f"   Confiance: {validation_data.get('confidence', 'N/A')}")
-                    else:
-                        ai_validation_results['coherence_check'] = {
-                            'success': False,
-                            'error': f"HTTP {validation_response.status_code}"
-                        }
-                except Exception as validation_error:
-                    print(f"⚠️ Erreur validation cohérence: {validation_error}")
-                    ai_validation_results['coherence_check'] = {
-                        'success': False,
-                        'error': str(validation_error)
-                    }
-
-            if text_features and (not media_features_list or is_valid):
-                try:
-                    if media_features_list:
-                        combined_features = text_features + np.mean(media_features_list, axis=0).tolist()
-                    else:
-                        combined_features = text_features
-
-                    categorize_response = requests.post(
-                        'http://localhost:5001/categorize',
-                        json={
-                            'features': combined_features,
-                            'text': data['description']
-                        },
-                        timeout=15
-                    )
-
-                    if categorize_response.status_code == 200:
-                        categorize_data = categorize_response.json()
-                        type_signalement = categorize_data.get('category', 'Autres')
-
-                        ai_validation_results['categorization'] = {
-                            'success': True,
-                            'predicted_category': type_signalement,
-                            'confidence': categorize_data.get('confidence'),
-                            'all_scores': categorize_data.get('all_scores'),
-                            'feature_magnitude': categorize_data.get('feature_magnitude')
-                        }
-
-                        print(f"🎯 Catégorie IA: {type_signalement}")
-                        print(f"   Confiance: {categorize_data.get('confidence', 'N/A')}")
-                    else:
-                        ai_validation_results['categorization'] = {
-                            'success': False,
-                            'error': f"HTTP {categorize_response.status_code}"
-                        }
-                except Exception as categorize_error:
-                    print(f"⚠️ Erreur catégorisation: {categorize_error}")
-                    ai_validation_results['categorization'] = {
-                        'success': False,
-                        'error': str(categorize_error)
-                    }
-
-            if not type_signalement:
-                description_lower = data['description'].lower()
-
-                keyword_categories = {
-                    'Voirie & Transports': ['route', 'trou', 'circulation', 'transport', 'feu', 'signalisation', 'nid', 'poule'],
-                    'Propreté': ['déchet', 'ordure', 'sale', 'poubelle', 'nettoyer', 'caniveau'],
-                    'Sécurité': ['danger', 'sécurité', 'vol', 'éclairage', 'lampadaire', 'agression'],
-                    'Espaces Verts': ['arbre', 'parc', 'jardin', 'vert', 'fleur', 'herbe'],
-                    'Environnement': ['pollution', 'bruit', 'eau', 'air', 'environnement', 'nuisance'],
-                    'Services Publics': ['administration', 'mairie', 'service', 'public'],
-                    'Animalier': ['animal', 'chien', 'chat', 'errant', 'abandon'],
-                    'Urbanisme': ['construction', 'bâtiment', 'permis', 'urbanisme'],
-                    'Social & Solidarité': ['aide', 'social', 'solidarité', 'pauvreté']
-                }
-
-                for category, keywords in keyword_categories.items():
-                    if any(keyword in description_lower for keyword in keywords):
-                        type_signalement = category
-                        ai_validation_results['fallback_categorization'] = {
-                            'used': True,
-                            'method': 'keyword_matching',
-                            'category': category,
-                            'matched_keywords': [kw for kw in keywords if kw in description_lower]
-                        }
-                        print(f"🔍 Catégorie détectée par mots-clés: {category}")
-                        break
-
-                if not type_signalement:
-                    type_signalement = "Autres"
-                    ai_validation_results['fallback_categorization'] = {
-                        'used': True,
-                        'method': 'default',
-                        'category': 'Autres'
-                    }
-
-            strict_validation = current_app.config.get('STRICT_AI_VALIDATION', False)
-            if strict_validation and not is_valid:
-                ai_validation_results['strict_validation_failed'] = True
-                return jsonify({
-                    'message': 'La description et les médias ne correspondent pas selon l\'analyse IA.',
-                    'ai_validation': ai_validation_results,
-                    'strict_mode': True
-                }), 400
-
-        except Exception as ai_error:
-            print(f"⚠️ Service IA complètement indisponible: {ai_error}")
-            import traceback
-            print(f"Stack trace IA: {traceback.format_exc()}")
-
-            type_signalement = "Autres"
-            ai_validation_results = {
-                'service_available': False,
-                'error': str(ai_error),
-                'fallback_mode': True
-            }
-
-
-        # Calcul de la priorité
-        priority_data = {
-            'type_signalement': type_signalement,
-            'description': data['description'],
-            'media_list': []
-        }
+        ai_validation = run_ai_validation(
+            data['description'],
+            media_list,
+            mode=current_app.config.get('AI_VALIDATION_MODE', 'normal')
+        )
+        type_signalement = ai_validation['type_signalement']
+        ai_validation_results = ai_validation['results']
 
-        for media in media_list:
-            if 'data' in media and isinstance(media['data'], bytes):
-                # Convertir les données binaires en base64
-                media_base64 = base64.b64encode(media['data']).decode('utf-8')
-                priority_data['media_list'].append({
-                    'filename': media.get('filename'),
-                    'mimetype': media.get('mimetype'),
-                    'data': media_base64,  # Envoyer la version base64
-                    'size': media.get('size')
-                })
-            else:
-                priority_data['media_list'].append(media)
+        strict_validation = current_app.config.get('STRICT_AI_VALIDATION', False)
+        if strict_validation and not ai_validation['is_valid']:
+            ai_validation_results['strict_validation_failed'] = True
+            return jsonify({
+                'message': 'La description et les médias ne correspondent pas selon l\'analyse IA.',
+                'ai_validation': ai_validation_results,
+                'strict_mode': True
+            }), 400
 
-        # Envoyer les données converties
-        priority_response = requests.post(
-            'http://localhost:5002/calculate_priority',
-            json=priority_data,
-            timeout=15
+        # Calcul de la priorité (même budget de latence que la validation)
+        priority = calculate_priority(
+            type_signalement,
+            data['description'],
+            media_list,
+            deadline=ai_validation['deadline'],
+            default=None
         )
-
-        if priority_response.status_code == 200:
-            priority = priority_response.json().get('priority', 'Moyenne')
-        else:
+        priority_deferred = priority is None
+        if priority_deferred:
             priority = 'Moyenne'
+        release_media_payloads(media_list)
 
         result = create_signalement(
             citoyen_id=citoyen_id,
@@ -511,40 +227,48 @@ def add_signalement():
             response_data['warnings'] = f"{len(result['failed_uploads'])} médias n'ont pas pu être uploadés"
             response_data['failed_files'] = [f.get('filename', 'Fichier inconnu') for f in result['failed_uploads']]
 
+        # Effets de bord hors du chemin de la requête : notifications et recalcul de priorité
+        signalement_id = result['signalement'].IDsignalement
         try:
-            send_notification(
-                user_id=citoyen_id,
-                title="Signalement créé avec succès",
-                message=f"Votre signalement '{data['description'][:50]}...' a été enregistré",
-                entity_type='signalement',
-                entity_id=result['signalement'].IDsignalement,
-                priority='normal',
-                category='signalement'
-            )
-            print("✅ Notification utilisateur envoyée")
+            enqueue_job('notification.send', {
+                'user_id': citoyen_id,
+                'title': "Signalement créé avec succès",
+                'message': f"Votre signalement '{data['description'][:50]}...' a été enregistré",
+                'entity_type': 'signalement',
+                'entity_id': signalement_id,
+                'priority': 'normal',
+                'category': 'signalement'
+            })
+            print("✅ Notification utilisateur mise en file")
         except Exception as notif_error:
-            print(f"⚠️ Erreur notification utilisateur: {notif_error}")
+            print(f"⚠️ Erreur mise en file notification utilisateur: {notif_error}")
 
         try:
-            admins = Admin.query.filter_by(role='admin').all()
-            admin_ids = [admin.IDuser for admin in admins]
+            admin_ids = [admin.IDuser for admin in Admin.query.filter_by(role='admin').with_entities(Admin.IDuser)]
             if admin_ids:
                 admin_message = f"Signalement de type '{type_signalement}' créé par citoyen #{citoyen_id}"
                 if location_data:
                     admin_message += " (avec localisation GPS)"
 
-                send_to_multiple_users(
-                    user_ids=admin_ids,
-                    title="Nouveau signalement à modérer",
-                    message=admin_message,
-                    entity_type='signalement',
-                    entity_id=result['signalement'].IDsignalement,
-                    priority='high',
-                    category='moderation'
-                )
-                print(f"✅ Notifications admin envoyées à {len(admin_ids)} utilisateurs")
+                enqueue_job('notification.send_multiple', {
+                    'user_ids': admin_ids,
+                    'title': "Nouveau signalement à modérer",
+                    'message': admin_message,
+                    'entity_type': 'signalement',
+                    'entity_id': signalement_id,
+                    'priority': 'high',
+                    'category': 'moderation'
+                })
+                print(f"✅ Notifications admin mises en file pour {len(admin_ids)} utilisateurs")
         except Exception as admin_notif_error:
-            print(f"⚠️ Erreur notifications admin: {admin_notif_error}")
+            print(f"⚠️ Erreur mise en file notifications admin: {admin_notif_error}")
+
+        if priority_deferred:
+            try:
+                enqueue_job('signalement.recalculate_priority', {'signalement_id': signalement_id})
+                response_data['priority_pending'] = True
+            except Exception as job_error:
+                print(f"⚠️ Erreur mise en file recalcul priorité: {job_error}")
 
         print(f"✅ Signalement {result['signalement'].IDsignalement} créé avec succès")
         return jsonify(response_data), 201
@@ -564,6 +288,12 @@ def add_signalement():
             'error': str(e) if current_app.debug else 'Une erreur est survenue'
         }), 500
 
+    finally:
+        # Fichiers temporaires des médias reçus, y compris sur les retours anticipés (400, 413)
+        for media in media_list:
+            if isinstance(media.get('data'), MediaBuffer):
+                media['data'].close()
+
 
 
 @signalement_bp.route('/<int:signalement_id>/location', methods=['GET'])
@@ -731,53 +461,91 @@ def get_signalement_with_media_summary(signalement_id):
 # Dans votre route list_signalements_with_media, remplacez le return par :
 
 @signalement_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_signalements_with_media')
+@cached_view(tags=['signalements'])
 def list_signalements_with_media():
-    """Liste tous les signalements avec informations médias et localisation"""
-    signalements = get_all_signalements()
-    
+    """
+    Liste paginée des signalements (du plus récent au plus ancien).
+
+    Paramètres : limit (défaut 20, max 100), cursor (valeur next_cursor de la page
+    précédente), statut, type, priorite, include_media=true pour charger les médias
+    (sinon le résumé des médias provient des compteurs dénormalisés).
+    """
+    include_media = request.args.get('include_media', 'false').lower() == 'true'
+    filters = {
+        'statut': request.args.get('statut'),
+        'type': request.args.get('type'),
+        'priorite': request.args.get('priorite')
+    }
+
+    try:
+        signalements, next_cursor = get_signalements_page(
+            limit=request.args.get('limit', default=20, type=int),
+            cursor=request.args.get('cursor'),
+            statut=filters['statut'],
+            type_signalement=filters['type'],
+            priorite=filters['priorite'],
+            include_elements=include_media
+        )
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
     result = []
     for s in signalements:
-        if not s.is_deleted:
-            # Informations de base
-            signalement_data = {
-                'id': s.IDsignalement,
-                'typeSignalement': s.typeSignalement,
-                'description': s.description,
-                'statut': s.statut,
-                'anonymat': s.anonymat,
-                'nbVotePositif': s.nbVotePositif,
-                'nbVoteNegatif': s.nbVoteNegatif,
-                'cible': s.cible,
-                'republierPar': s.republierPar,
-                'IDmoderateur': s.IDmoderateur,
-                'citoyen_id': s.citoyenID,
-                'dateCreated': s.dateCreated.isoformat() if s.dateCreated else None,
-                'priorite': s.priorite,
-                'media_summary': s.get_media_summary(),
-                'has_media': s.has_media(),
-                'preview_image': s.get_images()[0] if s.get_images() else None,
-                'media_urls': {
-                    'all': f'/api/signalement/{s.IDsignalement}/fichiers',
-                    'images': f'/api/signalement/{s.IDsignalement}/images'
-                }
+        # Informations de base
+        signalement_data = {
+            'id': s.IDsignalement,
+            'typeSignalement': s.typeSignalement,
+            'description': s.description,
+            'statut': s.statut,
+            'anonymat': s.anonymat,
+            'nbVotePositif': s.nbVotePositif,
+            'nbVoteNegatif': s.nbVoteNegatif,
+            'cible': s.cible,
+            'republierPar': s.republierPar,
+            'IDmoderateur': s.IDmoderateur,
+            'citoyen_id': s.citoyenID,
+            'dateCreated': s.dateCreated.isoformat() if s.dateCreated else None,
+            'priorite': s.priorite,
+            'media_urls': {
+                'all': f'/api/signalement/{s.IDsignalement}/fichiers',
+                'images': f'/api/signalement/{s.IDsignalement}/images'
             }
-            
-            # ========== AJOUT LOCALISATION ==========
-            if s.has_location:
-                location_data = s.get_location_data()
-                signalement_data['location'] = {
-                    'has_location': True,
-                    'coordinates': location_data.get('coordinates_string'),
-                    'accuracy': location_data.get('accuracy'),
-                    'maps_url': s.get_google_maps_url()
-                }
-            else:
-                signalement_data['location'] = {'has_location': False}
-            
-            result.append(signalement_data)
-    
-    return jsonify(result)
+        }
+
+        if include_media:
+            images = s.get_images()
+            signalement_data['media_summary'] = s.get_media_summary()
+            signalement_data['has_media'] = s.has_media()
+            signalement_data['preview_image'] = images[0] if images else None
+        elif s.has_media_counters():
+            # Compteurs dénormalisés : pas besoin de charger `elements`
+            signalement_data['media_summary'] = s.get_media_summary()
+            signalement_data['has_media'] = s.media_count > 0
+
+        # ========== AJOUT LOCALISATION ==========
+        if s.has_location:
+            location_data = s.get_location_data()
+            signalement_data['location'] = {
+                'has_location': True,
+                'coordinates': location_data.get('coordinates_string'),
+                'accuracy': location_data.get('accuracy'),
+                'maps_url': s.get_google_maps_url()
+            }
+        else:
+            signalement_data['location'] = {'has_location': False}
+
+        result.append(signalement_data)
+
+    return jsonify({
+        'signalements': result,
+        'pagination': {
+            'count': len(result),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        },
+        'filters_applied': {key: value for key, value in filters.items() if value},
+        'include_media': include_media
+    })
 
 
 # ========== NOUVELLES ROUTES GÉOGRAPHIQUES ==========
@@ -805,7 +573,7 @@ def get_signalements_by_location():
         if radius_km > 100:
             radius_km = 100
         
-        signalements = get_signalements_by_location(latitude, longitude, radius_km)
+        signalements = find_signalements_by_location(latitude, longitude, radius_km)
         
         result = []
         for s in signalements:
@@ -898,48 +666,32 @@ def get_map_data():
     
     
 
+@signalement_bp.route('/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+@cached_view(tags=['tile:{z}/{x}/{y}'])
+def get_map_tile(z, x, y):
+    """Tuile de carte pré-agrégée : groupes avec centroïde, effectif et répartition par type/statut"""
+    if z > TILE_MAX_ZOOM:
+        return jsonify({'message': f'Niveau de zoom maximal: {TILE_MAX_ZOOM}'}), 400
+    if x >= 2 ** z or y >= 2 ** z:
+        return jsonify({'message': f'Tuile {z}/{x}/{y} inexistante'}), 400
+
+    try:
+        tile = get_signalement_tile(
+            z, x, y,
+            type_signalement=request.args.get('type'),
+            statut=request.args.get('statut')
+        )
+        return jsonify(tile), 200
+
+    except Exception as e:
+        return jsonify({'message': f'Erreur: {str(e)}'}), 500
+
+
 @signalement_bp.route('/media/stats', methods=['GET'])
 def get_media_statistics():
     """Statistiques globales des médias"""
     try:
-        signalements = get_all_signalements()
-        
-        stats = {
-            'total_signalements': len(signalements),
-            'signalements_with_media': 0,
-            'total_media': 0,
-            'by_category': {
-                'images': 0,
-                'videos': 0,
-                'documents': 0,
-                'audios': 0,
-                'others': 0
-            },
-            'by_type': {}
-        }
-        
-        for signalement in signalements:
-            if not signalement.is_deleted:
-                summary = signalement.get_media_summary()
-                
-                if summary['total'] > 0:
-                    stats['signalements_with_media'] += 1
-                
-                stats['total_media'] += summary['total']
-                
-                for category in stats['by_category']:
-                    stats['by_category'][category] += summary.get(category, 0)
-                
-                # Compter par type de signalement
-                type_sig = signalement.typeSignalement
-                if type_sig not in stats['by_type']:
-                    stats['by_type'][type_sig] = {'count': 0, 'with_media': 0}
-                
-                stats['by_type'][type_sig]['count'] += 1
-                if summary['total'] > 0:
-                    stats['by_type'][type_sig]['with_media'] += 1
-        
-        return jsonify(stats), 200
+        return jsonify(get_media_stats()), 200
         
     except Exception as e:
         return jsonify({'message': f'Erreur: {str(e)}'}), 500
@@ -1018,7 +770,7 @@ def delete_media(signalement_id, storage_path):
             return jsonify({'message': 'Signalement introuvable'}), 404
         
         # Supprimer de Supabase
-        success = media_service.delete_media(storage_path)
+        success = get_media_service().delete_media(storage_path)
         
         if success:
             # Mettre à jour les métadonnées en DB
@@ -1027,6 +779,7 @@ def delete_media(signalement_id, storage_path):
             signalement.set_elements(updated_list)
             
             db.session.commit()
+            invalidate_signalement_cache(signalement)
             
             return jsonify({'message': 'Média supprimé avec succès'}), 200
         else:
@@ -1040,7 +793,7 @@ def delete_media(signalement_id, storage_path):
 # Remplacez votre route list_signalements_by_citoyen par celle-ci :
 
 @signalement_bp.route('/<int:citoyen_id>/signalements', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_signalements_by_citoyen')
+@cached_view(tags=['citoyen:{citoyen_id}'])
 def list_signalements_by_citoyen(citoyen_id):
     """Liste les signalements d'un citoyen avec informations de localisation"""
     try:
@@ -1238,34 +991,25 @@ def search_signalements():
     longitude = request.args.get('lng', type=float)
     radius_km = request.args.get('radius', default=10, type=float)
     location_only = request.args.get('location_only', 'false').lower() == 'true'
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    geo_search = (latitude is not None and longitude is not None
+                  and -90 <= latitude <= 90 and -180 <= longitude <= 180)
 
     try:
-        # Recherche textuelle normale
-        resultats = search_signalements_by_keyword(query)
-        
-        # ========== FILTRAGE GÉOGRAPHIQUE ==========
-        if latitude and longitude and (-90 <= latitude <= 90) and (-180 <= longitude <= 180):
+        # ========== RECHERCHE TEXTE + GÉOGRAPHIQUE (une seule requête SQL) ==========
+        if geo_search:
             print(f"🗺️ Recherche géographique: {latitude}, {longitude} (rayon: {radius_km}km)")
             
-            # Filtrer les résultats par proximité géographique
-            resultats_geo = []
-            for signalement in resultats:
-                if signalement.has_location:
-                    try:
-                        distance = signalement.calculate_distance_from(latitude, longitude)
-                        distance_km = distance / 1000 if distance else float('inf')
-                        
-                        if distance_km <= radius_km:
-                            resultats_geo.append({
-                                'signalement': signalement,
-                                'distance_km': round(distance_km, 2),
-                                'distance_meters': round(distance) if distance else None
-                            })
-                    except:
-                        continue
-            
-            # Trier par distance
-            resultats_geo.sort(key=lambda x: x['distance_km'])
+            # Texte, boîte englobante, tri par distance et limite appliqués en base
+            proches, total_matches = search_signalements_near(
+                query, latitude, longitude, radius_km, page=page, per_page=per_page
+            )
+            resultats_geo = [{
+                'signalement': signalement,
+                'distance_km': round(distance_km, 2),
+                'distance_meters': round(distance_km * 1000)
+            } for signalement, distance_km in proches]
             
             # Formater la réponse avec distances
             response_data = []
@@ -1299,11 +1043,17 @@ def search_signalements():
                 'search_query': query,
                 'search_center': {'latitude': latitude, 'longitude': longitude},
                 'search_radius_km': radius_km,
+                'page': page,
+                'per_page': per_page,
                 'total_found': len(response_data),
+                'total_matches': total_matches,
                 'results': response_data
             }), 200
         
         # ========== RECHERCHE SANS GÉOLOCALISATION ==========
+        # Recherche plein texte classée par pertinence
+        resultats = search_signalements_by_keyword(query, page=page, per_page=per_page)
+        
         # Si on veut seulement les signalements avec localisation
         if location_only:
             resultats = [s for s in resultats if s.has_location]
@@ -1341,6 +1091,8 @@ def search_signalements():
         return jsonify({
             'search_query': query,
             'location_only': location_only,
+            'page': page,
+            'per_page': per_page,
             'total_found': len(response_data),
             'results': response_data
         }), 200
@@ -1353,6 +1105,7 @@ def search_signalements():
 @signalement_bp.route('/upload/republish', methods=['POST'])
 def upload_republish_file():
     """Endpoint pour uploader les fichiers lors d'une republication"""
+    file_content = None
     try:
         print("📤 === UPLOAD REPUBLICATION DEBUG ===")
         
@@ -1382,8 +1135,8 @@ def upload_republish_file():
         
         # Lire le contenu du fichier
         file.seek(0)  # ✅ IMPORTANT: Remettre le curseur au début
-        file_content = file.read()
-        file_size = len(file_content)
+        file_content = MediaBuffer.from_stream(file.stream)
+        file_size = file_content.size
         
         print(f"📊 Taille lue: {file_size} bytes")
         
@@ -1404,7 +1157,7 @@ def upload_republish_file():
         
         # Upload vers Supabase via le service média
         try:
-            metadata = media_service.upload_media(
+            metadata = get_media_service().upload_media(
                 file_data=file_content,
                 original_filename=original_filename,
                 mimetype=mimetype,
@@ -1461,6 +1214,11 @@ def upload_republish_file():
             'details': str(e)
         }), 500
 
+    finally:
+        # Fichier temporaire éventuel supprimé dès la réponse
+        if file_content is not None:
+            file_content.close()
+
 
 @signalement_bp.route('/debug/republication/<int:signalement_id>', methods=['GET'])
 def debug_republication_endpoint(signalement_id):
@@ -1694,22 +1452,8 @@ def update_signalement_status(signalement_id):
             # 🔥 NOTIFICATION SPÉCIALE: Si résolu, notifier aussi les abonnés
             if new_status == 'resolu':
                 try:
-                    # Récupérer les utilisateurs qui ont voté/commenté ce signalement
-                    from app.models.reaction.vote_model import Vote
-                    from app.models.commentaire.commentaireSignalement_model import CommentaireSignalement
-                    
-                    # IDs des utilisateurs intéressés (votants + commentateurs)
-                    interested_users = set()
-                    
-                    votes = Vote.query.filter_by(signalementID=signalement_id, is_deleted=False).all()
-                    for vote in votes:
-                        if vote.citoyenID != signalement.citoyenID:  # Pas le créateur
-                            interested_users.add(vote.citoyenID)
-                    
-                    comments = CommentaireSignalement.query.filter_by(signalementID=signalement_id).all()
-                    for comment in comments:
-                        if comment.citoyenID != signalement.citoyenID:  # Pas le créateur
-                            interested_users.add(comment.citoyenID)
+                    # IDs des utilisateurs intéressés (votants + commentateurs), hors créateur
+                    interested_users = interested_citizen_ids(signalement_id, exclude=[signalement.citoyenID])
                     
                     # Notifier les utilisateurs intéressés
                     if interested_users:
@@ -1739,14 +1483,7 @@ def update_signalement_status(signalement_id):
             logger.warning(f"Erreur système notifications: {notif_error}")
             # Les notifications ne doivent jamais faire échouer l'opération principale
         
-        # 8. Nettoyer le cache si utilisé
-        try:
-            cache.delete(f'get_signalement::{signalement_id}')
-            cache.delete('list_signalements')
-        except:
-            pass  # Cache optionnel
-        
-        # 9. Réponse de succès avec détails
+        # 8. Réponse de succès avec détails
         response_data = {
             'success': True,
             'message': 'Statut mis à jour avec succès',
@@ -1775,21 +1512,60 @@ def update_signalement_status(signalement_id):
 # Ajoutez cette route à la fin de votre fichier routes
 
 
+EXPORT_MIMETYPES = {
+    'geojson': ('application/geo+json', 'geojson'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+
+def _parse_export_filters(args):
+    """Filtres d'export : bbox=min_lng,min_lat,max_lng,max_lat, from/to (ISO), type"""
+    filters = {}
+
+    bbox = args.get('bbox')
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(','))
+        if not (-180 <= min_lng <= max_lng <= 180 and -90 <= min_lat <= max_lat <= 90):
+            raise ValueError('bbox invalide')
+        filters['bbox'] = (min_lng, min_lat, max_lng, max_lat)
+
+    if args.get('from'):
+        filters['date_from'] = datetime.fromisoformat(args['from'])
+    if args.get('to'):
+        filters['date_to'] = datetime.fromisoformat(args['to'])
+    if args.get('type'):
+        filters['type_signalement'] = args['type']
+
+    return filters
+
+
 @signalement_bp.route('/export/geojson', methods=['GET'])
 def export_geojson():
-    """Exporte les signalements au format GeoJSON"""
+    """
+    Exporte les signalements localisés en streaming (GeoJSON, NDJSON ou CSV).
+    Paramètres : format, include_private, bbox, from, to, type
+    """
+    include_private = request.args.get('include_private', 'false').lower() == 'true'
+    export_format = request.args.get('format', 'geojson').lower()
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({'message': f'Format non supporté: {export_format}', 'formats': list(EXPORT_MIMETYPES)}), 400
+
     try:
-        include_private = request.args.get('include_private', 'false').lower() == 'true'
-        
-        geojson_data = export_signalements_geojson(include_private)
-        
-        # Préparer la réponse avec les bons headers
-        response = jsonify(geojson_data)
-        response.headers['Content-Type'] = 'application/geo+json'
-        response.headers['Content-Disposition'] = f'attachment; filename=signalements_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.geojson'
-        
-        return response, 200
-        
+        filters = _parse_export_filters(request.args)
+    except ValueError as e:
+        return jsonify({'message': f'Filtre invalide: {str(e)}'}), 400
+
+    try:
+        mimetype, extension = EXPORT_MIMETYPES[export_format]
+        chunks = stream_signalements_export(export_format, include_private, **filters)
+
+        # Les premiers octets partent dès le premier lot lu en base
+        response = Response(stream_with_context(chunks), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename=signalements_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.{extension}'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
     except Exception as e:
         return jsonify({'message': f'Erreur export: {str(e)}'}), 500
 
@@ -1885,6 +1661,7 @@ def move_signalement_location(signalement_id):
         
         if success:
             db.session.commit()
+            sync_spatial_index(signalement)
             
             # Calculer la distance déplacée si ancienne position existe
             distance_moved = None
@@ -1955,17 +1732,10 @@ def remove_signalement_location(signalement_id):
         old_location = signalement.get_location_data()
         
         # Supprimer la localisation
-        signalement.latitude = None
-        signalement.longitude = None
-        signalement.accuracy = None
-        signalement.altitude = None
-        signalement.heading = None
-        signalement.speed = None
-        signalement.location_timestamp = None
-        signalement.location_address = None
-        signalement.has_location = False
+        signalement.clear_location_data()
         
         db.session.commit()
+        sync_spatial_index(signalement)
         
         print(f"🗑️ Localisation supprimée pour signalement {signalement_id}")
         print(f"   Ancienne position: {old_location.get('coordinates_string')}")
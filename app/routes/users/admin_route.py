@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 import logging
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
-from app import cache
+from app import cached_view
 from app.models.users.admin_model import Admin
 from app.services.users.admin_service import (
     create_admin, get_admin_by_id, get_all_admins,
@@ -88,7 +88,7 @@ def add_admin():
 
 # Route pour obtenir un enregistrement par ID
 @admin_bp.route('/<int:admin_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_admin')
+@cached_view(tags=['user:{admin_id}'])
 def get_admin(admin_id):
     """
     Récupère un administrateur spécifique via son ID.
@@ -124,7 +124,7 @@ def get_admin(admin_id):
 
 # Route pour obtenir tous les enregistrements
 @admin_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_admins')
+@cached_view(tags=['admins'])
 def list_admins():
     """
     Récupère tous les administrateurs enregistrés.
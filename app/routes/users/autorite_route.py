@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 import logging
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
-from app import cache
+from app import cached_view
 from app.models.users.autorite_model import Authorite
 from app.services.users.autorite_service import (
     create_authorite, get_authorite_by_id, get_all_authorites,
@@ -92,7 +92,7 @@ def add_authorite():
 
 # Route pour obtenir un enregistrement par ID
 @autorite_bp.route('/<int:authorite_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_authorite')
+@cached_view(tags=['user:{authorite_id}'])
 def get_authorite(authorite_id):
     """
     Récupère une autorité spécifique via son ID.
@@ -129,7 +129,7 @@ def get_authorite(authorite_id):
 
 # Route pour obtenir tous les enregistrements
 @autorite_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_authorites')
+@cached_view(tags=['authorites'])
 def list_authorites():
     """
     Récupère toutes les autorités enregistrées.
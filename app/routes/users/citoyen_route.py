@@ -3,7 +3,7 @@ from flask import Blueprint, request, jsonify
 # ✅ CORRECTIF: Import explicite pour éviter conflits
 from flask_jwt_extended import create_access_token as jwt_create_token, jwt_required, get_jwt_identity, get_jwt
 import logging
-from app import cache
+from app import cached_view
 from app.models.users.citoyen_model import Citoyen
 from app.services.users.citoyen_service import (
     create_citoyen, get_citoyen_by_id, get_all_citoyens,
@@ -292,7 +292,7 @@ def logout():
 # ============ ROUTES EXISTANTES OPTIMISÉES ============
 
 @citoyen_bp.route('/<int:citoyen_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_citoyen')
+@cached_view(tags=['user:{citoyen_id}'])
 def get_citoyen(citoyen_id):
     """Récupère un citoyen spécifique via son ID."""
     try:
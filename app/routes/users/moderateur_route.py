@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 import logging
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
-from app import cache
+from app import cached_view
 from app.models.users.moderateur_model import Moderateur
 from app.services.users.moderateur_service import (
     create_moderateur, get_moderateur_by_id, get_all_moderateurs,
@@ -83,7 +83,7 @@ def add_moderateur():
 
 # Route pour obtenir un enregistrement par ID
 @moderateur_bp.route('/<int:moderateur_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_moderateur')
+@cached_view(tags=['user:{moderateur_id}'])
 def get_moderateur(moderateur_id):
     """
     Récupère un modérateur spécifique via son ID.
@@ -120,7 +120,7 @@ def get_moderateur(moderateur_id):
 
 # Route pour obtenir tous les enregistrements
 @moderateur_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_moderateurs')
+@cached_view(tags=['moderateurs'])
 def list_moderateurs():
     """
     Récupère tous les modérateurs enregistrés.
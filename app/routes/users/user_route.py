@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 import logging
-from app import cache
+from app import cached_view
 from app.models.users.user_model import User
 from app.services.users.user_service import (
     create_user, get_user_by_id, get_all_users,
@@ -107,7 +107,7 @@ def add_user():
 # Remplacez cette partie dans votre user_route.py
 
 @user_bp.route('/<int:user_id>', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='get_user_by_id')  # ← Changé le key_prefix
+@cached_view(tags=['user:{user_id}'])
 def get_user_by_id_route(user_id):  # ← Changé le nom de la fonction
     """
     Récupère un utilisateur spécifique via son ID.
@@ -135,7 +135,7 @@ def get_user_by_id_route(user_id):  # ← Changé le nom de la fonction
 
 
 @user_bp.route('/check/<string:username>', methods=['GET'])  # ← Changé le chemin pour éviter conflit
-@cache.cached(timeout=60, key_prefix='check_user_by_username')
+@cached_view(tags=['users'])
 def check_user_by_username(username):
     """
     Vérifie l'existence d'un utilisateur et retourne son type.
@@ -201,7 +201,7 @@ def check_user_by_username(username):
 
 
 @user_bp.route('/all', methods=['GET'])
-@cache.cached(timeout=60, key_prefix='list_users')
+@cached_view(tags=['users'])
 def list_users():
     """
     Récupère tous les utilisateurs enregistrés.
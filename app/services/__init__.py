@@ -14,11 +14,13 @@ from .partage.partageSignalement_service import create_partager_signalement,dele
 
 from .reaction.appreciation_service import create_appreciation,delete_appreciation,get_appreciation_by_id,get_all_appreciations,get_appreciations_by_citoyen,get_appreciations_by_publication
 from .reaction.signature_service import create_signature,get_all_signatures,delete_signature,get_signature_by_id,get_signatures_by_citoyen,get_signatures_by_petition,update_signature
+from .reaction.counter_service import increment_counter,vote_counter_column,reconcile_reaction_counters,remove_duplicate_reactions
 from .reaction.vote_service import get_user_vote_for_signalement,create_vote,delete_vote,get_all_votes,get_votes_by_citoyen,get_vote_by_id,get_votes_by_signalement,update_vote
 
-from .signal.petition_service import search_petition_by_keyword,create_petition,delete_petition,get_all_petitions,get_petition_by_id,get_petitions_by_citoyen,update_petition
+from .signal.petition_service import search_petition_by_keyword,create_petition,delete_petition,get_all_petitions,get_petition_by_id,get_petitions_by_citoyen,update_petition,get_petition_statistics
 from .signal.publication_service import create_publication,get_all_publications,delete_publication,get_publication_by_id,get_publications_by_autorite,get_publications_by_signalement,update_publication
-from .signal.signalement_service import create_signalement,delete_signalement,get_all_signalements,get_signalement_by_id,get_signalements_by_citoyen,update_signalement,search_signalements_by_keyword,get_signalement_with_fresh_urls,get_location_statistics,get_signalements_by_location,get_signalements_with_location,get_signalements_by_status,get_user_signalement_stats,get_signalements_by_type,get_media_service,hard_delete_signalement,get_signalement_stats,export_signalements_geojson,get_hotspots_analysis,get_signalements_by_status_with_location,get_advanced_signalement_stats,get_signalements_nearby_count,update_signalement_location
+from .signal.signalement_service import create_signalement,delete_signalement,get_all_signalements,get_signalement_by_id,get_signalements_by_citoyen,update_signalement,search_signalements_by_keyword,get_signalement_with_fresh_urls,get_location_statistics,get_signalements_by_location,get_signalements_with_location,get_signalement_tile,get_signalements_by_status,get_user_signalement_stats,get_signalements_by_type,get_media_service,hard_delete_signalement,get_signalement_stats,get_media_stats,export_signalements_geojson,stream_signalements_export,iter_export_rows,get_hotspots_analysis,get_signalements_by_status_with_location,get_advanced_signalement_stats,get_signalements_nearby_count,update_signalement_location,rebuild_spatial_index,sync_spatial_index,invalidate_signalement_cache,get_signalements_page,backfill_media_counters
+from .signal.media_store_service import content_sha256,acquire_media,register_media,retain_media,release_media,rebuild_media_refcounts
 
 from .users.admin_service import authenticate_admin,create_admin,delete_admin,get_admin_by_id,get_all_admins,update_admin
 from .users.autorite_service import authenticate_authorite,create_authorite,update_authorite,delete_authorite,get_all_authorites,get_authorite_by_id
@@ -26,4 +28,12 @@ from .users.citoyen_service import update_citoyen_by_telephone,authenticate_cito
 from .users.moderateur_service import authenticate_moderateur,create_moderateur,delete_moderateur,get_all_moderateurs,get_moderateur_by_id,update_moderateur
 from .users.user_service import authenticate_user,delete_user,create_user,get_all_users,get_user_by_username,update_user,get_user_by_id
 
-from .notification.supabase_notification_service import send_notification, _get_onesignal_config, _send_push_notification, _get_supabase_client, _send_realtime_notification,cleanup_invalid_tokens,create_notification_from_template,deactivate_token,get_notification_history,get_notification_stats,get_user_tokens,mark_notification_read,register_token,send_test_notification,send_to_multiple_users,update_user_preferences
\ No newline at end of file
+from .notification.supabase_notification_service import send_notification, _get_onesignal_config, _send_push_notification, _get_supabase_client, _send_realtime_notification,cleanup_invalid_tokens,create_notification_from_template,deactivate_token,get_notification_history,get_notification_stats,get_user_tokens,mark_notification_read,register_token,send_test_notification,send_to_multiple_users,update_user_preferences
+from .notification.notification_analytics_service import record_notifications_sent,mark_notifications_read,record_notification_read,get_notification_rollup,backfill_notification_analytics
+from .notification.notification_inbox_service import get_unread_count,get_total_count,get_recent_notification_ids,load_notifications,inbox_notification_added,inbox_notifications_added,inbox_marked_read,inbox_all_read,inbox_notification_removed,forget_inbox
+
+from .stats.stats_service import get_stat_counters,counters_by_prefix,compute_stat_counters,reconcile_stat_counters
+
+from .search.search_service import index_document,remove_document,index_signalement,index_petition,index_new_notifications,search_ids,search_signalements,search_signalements_near,search_petitions,search_notifications,rebuild_search_index
+
+from .jobs.job_service import enqueue_job,process_jobs,retry_dead_letter_job,run_worker
@@ -2,11 +2,16 @@
 # from flask_migrate import Migrate
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
+from app import db, invalidate_tags
 
 from app.models import Appartenir
 from datetime import datetime
 
+
+def _cache_tags(appartenir):
+    """Tags de cache touchés par une écriture sur une appartenance"""
+    return [f'appartenir:{appartenir.IDappartenir}', 'appartenirs', f'citoyen:{appartenir.citoyenID}', f'groupe:{appartenir.groupeID}']
+
 # Service de Création
 def create_appartenir(citoyen_id, groupe_id):
     nouvel_appartenir = Appartenir(
@@ -16,6 +21,7 @@ def create_appartenir(citoyen_id, groupe_id):
     )
     db.session.add(nouvel_appartenir)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouvel_appartenir))
     return nouvel_appartenir
 
 # Service de Lecture
@@ -36,6 +42,7 @@ def update_appartenir(appartenir_id, citoyen_id=None, groupe_id=None):
     appartenir = Appartenir.query.get(appartenir_id)
     if not appartenir:
         return None
+    tags = _cache_tags(appartenir)
 
     if citoyen_id is not None:
         appartenir.citoyenID = citoyen_id
@@ -43,13 +50,16 @@ def update_appartenir(appartenir_id, citoyen_id=None, groupe_id=None):
         appartenir.groupeID = groupe_id
 
     db.session.commit()
+    invalidate_tags(*tags, *_cache_tags(appartenir))
     return appartenir
 
 # Service de Suppression
 def delete_appartenir(appartenir_id):
     appartenir = Appartenir.query.get(appartenir_id)
     if appartenir:
+        tags = _cache_tags(appartenir)
         db.session.delete(appartenir)
         db.session.commit()
+        invalidate_tags(*tags)
         return True
     return False
@@ -3,12 +3,17 @@
 
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
+from app import db, invalidate_tags
 
 
 from app.models import Groupe
 from datetime import datetime
 
+
+def _cache_tags(groupe):
+    """Tags de cache touchés par une écriture sur un groupe"""
+    return [f'groupe:{groupe.IDgroupe}', 'groupes']
+
 # Service de Création
 def create_groupe(nom, description, image, admin):
     nouveau_groupe = Groupe(
@@ -20,6 +25,7 @@ def create_groupe(nom, description, image, admin):
     )
     db.session.add(nouveau_groupe)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouveau_groupe))
     return nouveau_groupe
 
 # Service de Lecture
@@ -47,6 +53,7 @@ def update_groupe(groupe_id, nom=None, description=None, statut=None, image=None
         groupe.admin = admin
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(groupe))
     return groupe
 
 # Service de Suppression Logique
@@ -56,5 +63,6 @@ def delete_groupe(groupe_id):
         groupe.is_deleted = True
         groupe.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(groupe))
         return True
     return False
@@ -1,7 +1,12 @@
-from app import db
+from app import db, invalidate_tags
 from datetime import datetime
 from app.models import Suivre
 
+
+def _cache_tags(suivre):
+    """Tags de cache touchés par une écriture sur un suivi"""
+    return [f'suivre:{suivre.IDsuivre}', 'suivres', f'user:{suivre.suiveurID}', f'user:{suivre.suivisID}']
+
 # Service de Création
 def create_suivre(suiveur_id, suivis_id):
     nouvel_suivre = Suivre(
@@ -11,6 +16,7 @@ def create_suivre(suiveur_id, suivis_id):
     )
     db.session.add(nouvel_suivre)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouvel_suivre))
     return nouvel_suivre
 
 # Service de Lecture
@@ -31,6 +37,7 @@ def update_suivre(suivre_id,suiveur_id=None,  suivis_id=None):
     suivre = Suivre.query.get(suivre_id)
     if not suivre:
         return None
+    tags = _cache_tags(suivre)
 
     if suiveur_id is not None:
         suivre.suiveurID = suiveur_id
@@ -38,6 +45,7 @@ def update_suivre(suivre_id,suiveur_id=None,  suivis_id=None):
         suivre.suivisID = suivis_id
 
     db.session.commit()
+    invalidate_tags(*tags, *_cache_tags(suivre))
     return suivre
 
 # Service de Suppression
@@ -47,6 +55,7 @@ def delete_suivre(suivre_id):
         suivre.is_deleted = True
         suivre.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(suivre))
         return True
     return False
 
@@ -2,11 +2,16 @@
 # from flask_migrate import Migrate
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
+from app import db, invalidate_tags
 
 from app.models import Tutoriel
 from datetime import datetime
 
+
+def _cache_tags(tutoriel):
+    """Tags de cache touchés par une écriture sur un tutoriel"""
+    return [f'tutoriel:{tutoriel.IDtutoriel}', 'tutoriels', f'citoyen:{tutoriel.citoyenID}']
+
 # Service de Création
 def create_tutoriel(citoyen_id, groupe_id):
     nouvel_tutoriel = Tutoriel(
@@ -16,6 +21,7 @@ def create_tutoriel(citoyen_id, groupe_id):
     )
     db.session.add(nouvel_tutoriel)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouvel_tutoriel))
     return nouvel_tutoriel
 
 # Service de Lecture
@@ -36,6 +42,7 @@ def update_tutoriel(tutoriel_id, citoyen_id=None, suivis=None):
     tutoriel = Tutoriel.query.get(tutoriel_id)
     if not tutoriel:
         return None
+    tags = _cache_tags(tutoriel)
 
     if citoyen_id is not None:
         tutoriel.citoyenID = citoyen_id
@@ -43,13 +50,16 @@ def update_tutoriel(tutoriel_id, citoyen_id=None, suivis=None):
         tutoriel.suivis = suivis
 
     db.session.commit()
+    invalidate_tags(*tags, *_cache_tags(tutoriel))
     return tutoriel
 
 # Service de Suppression
 def delete_tutoriel(tutoriel_id):
     tutoriel = Tutoriel.query.get(tutoriel_id)
     if tutoriel:
+        tags = _cache_tags(tutoriel)
         db.session.delete(tutoriel)
         db.session.commit()
+        invalidate_tags(*tags)
         return True
     return False
@@ -2,12 +2,17 @@
 # from flask_migrate import Migrate
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
+from app import db, invalidate_tags
 
 
 from app.models import CommentairePublication
 from datetime import datetime
 
+
+def _cache_tags(commentaire):
+    """Tags de cache touchés par une écriture sur un commentaire"""
+    return [f'commentaire_publication:{commentaire.IDcommentaire}', 'commentaires_publication', f'citoyen:{commentaire.citoyenID}', f'publication:{commentaire.publicationID}']
+
 # Service de Création
 def create_commentaire_publication(description, citoyen_id, publication_id):
     nouveau_commentaire = CommentairePublication(
@@ -18,6 +23,7 @@ def create_commentaire_publication(description, citoyen_id, publication_id):
     )
     db.session.add(nouveau_commentaire)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouveau_commentaire))
     return nouveau_commentaire
 
 # Service de Lecture
@@ -43,6 +49,7 @@ def update_commentaire_publication(commentaire_id, description=None):
         commentaire.description = description
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(commentaire))
     return commentaire
 
 # Service de Suppression Logique
@@ -52,5 +59,6 @@ def delete_commentaire_publication(commentaire_id):
         commentaire.is_deleted = True
         commentaire.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(commentaire))
         return True
     return False
@@ -0,0 +1,67 @@
+"""Handlers des tâches asynchrones exécutées par le worker"""
+from app.services.jobs.job_service import job_handler
+
+
+class JobRetryError(Exception):
+    """Échec transitoire : la tâche sera retentée plus tard"""
+
+
+@job_handler('notification.send')
+def send_notification_job(**kwargs):
+    from app.services.notification.supabase_notification_service import send_notification
+    # Échec de livraison levé : la tâche est retentée puis placée en dead-letter
+    send_notification(**kwargs, raise_errors=True)
+
+
+@job_handler('notification.send_multiple')
+def send_to_multiple_users_job(**kwargs):
+    from app.services.notification.supabase_notification_service import send_to_multiple_users
+    send_to_multiple_users(**kwargs, raise_errors=True)
+
+
+@job_handler('signalement.recalculate_priority')
+def recalculate_priority_job(signalement_id):
+    from app.models import Signalement
+    from app.services.signal.ai_validation_service import AIDeadline, PRIORITY_TIMEOUT, calculate_priority
+    from app.services.signal.signalement_service import update_signalement
+
+    signalement = Signalement.query.get(signalement_id)
+    if not signalement or signalement.is_deleted:
+        return
+
+    # Les médias sont déjà stockés : on transmet leurs métadonnées (URLs)
+    priority = calculate_priority(
+        signalement.typeSignalement,
+        signalement.description,
+        signalement.get_elements(),
+        deadline=AIDeadline(PRIORITY_TIMEOUT),
+        default=None
+    )
+    if priority is None:
+        raise JobRetryError(f"Service priorité indisponible pour le signalement {signalement_id}")
+
+    update_signalement(signalement_id, priorite=priority)
+
+
+@job_handler('search.index_notifications')
+def index_notifications_job():
+    from app.services.search.search_service import index_new_notifications
+    index_new_notifications()
+
+
+@job_handler('stats.reconcile')
+def reconcile_stats_job(scope=None):
+    from app.services.stats.stats_service import reconcile_stat_counters
+    reconcile_stat_counters(scope)
+
+
+@job_handler('reactions.reconcile_counters')
+def reconcile_reaction_counters_job():
+    from app.services.reaction.counter_service import reconcile_reaction_counters
+    reconcile_reaction_counters()
+
+
+@job_handler('media.generate_derivatives')
+def generate_derivatives_job(signalement_id):
+    from app.services.signal.media_derivative_service import generate_signalement_derivatives
+    generate_signalement_derivatives(signalement_id)
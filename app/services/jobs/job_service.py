@@ -0,0 +1,216 @@
+import json
+import os
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+from app.models import BackgroundJob, DeadLetterJob
+
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', 600))  # Secondes avant de reprendre une tâche bloquée
+JOB_BACKOFF_BASE = int(os.getenv('JOB_BACKOFF_BASE', 10))
+JOB_BACKOFF_MAX = int(os.getenv('JOB_BACKOFF_MAX', 3600))
+
+_handlers = {}
+
+
+def job_handler(name):
+    """Décorateur d'enregistrement d'un handler de tâche"""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def _load_handlers():
+    # Import différé : les handlers dépendent des services applicatifs
+    from app.services.jobs import job_handlers  # noqa: F401
+
+
+def enqueue_job(name, payload=None, delay_seconds=0, max_attempts=None):
+    """
+    Ajoute une tâche à la file. Les routes n'appellent que cette fonction ;
+    l'exécution a lieu dans le worker (`flask jobs worker`).
+    En mode JOBS_EAGER (tests, développement), la tâche est exécutée immédiatement.
+    """
+    job = BackgroundJob(
+        name=name,
+        payload=json.dumps(payload or {}, default=str),
+        status='pending',
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds)
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    if current_app.config.get('JOBS_EAGER', False) and not delay_seconds:
+        _claim([job])
+        _execute(job)
+
+    return job
+
+
+def _claim(jobs):
+    now = datetime.utcnow()
+    for job in jobs:
+        job.status = 'running'
+        job.locked_at = now
+        job.attempts = (job.attempts or 0) + 1
+    db.session.commit()
+
+
+def _backoff_seconds(attempts):
+    return min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+
+
+def _execute(job):
+    """Exécute une tâche déjà réservée et enregistre son résultat"""
+    _load_handlers()
+    handler = _handlers.get(job.name)
+    job_id = job.id
+
+    try:
+        if not handler:
+            raise LookupError(f"Aucun handler pour la tâche '{job.name}'")
+
+        handler(**job.get_payload())
+
+        job = db.session.get(BackgroundJob, job_id)
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+        db.session.commit()
+        return True
+
+    except Exception as e:
+        error = f"{e}\n{traceback.format_exc()}"
+        print(f"❌ Tâche {job_id} ({job.name}) échouée: {e}")
+        db.session.rollback()
+
+        job = db.session.get(BackgroundJob, job_id)
+        if job.attempts >= job.max_attempts:
+            db.session.add(DeadLetterJob(
+                job_id=job.id,
+                name=job.name,
+                payload=job.payload,
+                attempts=job.attempts,
+                last_error=error,
+                created_at=job.created_at
+            ))
+            db.session.delete(job)
+            print(f"☠️ Tâche {job_id} déplacée en dead-letter après {job.attempts} essais")
+        else:
+            job.status = 'pending'
+            job.locked_at = None
+            job.last_error = error
+            job.run_after = datetime.utcnow() + timedelta(seconds=_backoff_seconds(job.attempts))
+        db.session.commit()
+        return False
+
+
+def process_jobs(batch_size=20):
+    """Réserve puis exécute un lot de tâches prêtes. Retourne le nombre de tâches traitées."""
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+
+    jobs = BackgroundJob.query.filter(
+        db.or_(
+            db.and_(BackgroundJob.status == 'pending', BackgroundJob.run_after <= now),
+            db.and_(BackgroundJob.status == 'running', BackgroundJob.locked_at < stale_before)
+        )
+    ).order_by(BackgroundJob.run_after).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    if not jobs:
+        db.session.commit()  # Libère les verrous éventuels
+        return 0
+
+    _claim(jobs)
+    for job in jobs:
+        _execute(job)
+
+    return len(jobs)
+
+
+def purge_finished_jobs(older_than_days=7):
+    """Supprime les tâches terminées anciennes"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    deleted = BackgroundJob.query.filter(
+        BackgroundJob.status == 'done',
+        BackgroundJob.finished_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def retry_dead_letter_job(dead_letter_id):
+    """Remet en file une tâche de la dead-letter"""
+    dead = db.session.get(DeadLetterJob, dead_letter_id)
+    if not dead:
+        return None
+
+    job = BackgroundJob(
+        name=dead.name,
+        payload=dead.payload,
+        status='pending',
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.delete(dead)
+    db.session.commit()
+    return job
+
+
+def run_worker(poll_interval=2.0, batch_size=20, max_iterations=None):
+    """Boucle du worker : traite les tâches en continu"""
+    print(f"👷 Worker de tâches démarré (poll={poll_interval}s, lot={batch_size})")
+    iterations = 0
+    last_purge = 0.0
+
+    while max_iterations is None or iterations < max_iterations:
+        iterations += 1
+        try:
+            processed = process_jobs(batch_size)
+            if time.monotonic() - last_purge > 3600:
+                purge_finished_jobs()
+                last_purge = time.monotonic()
+        except Exception as e:
+            print(f"❌ Erreur worker: {e}")
+            db.session.rollback()
+            processed = 0
+
+        if not processed:
+            time.sleep(poll_interval)
+
+
+# ========== COMMANDES CLI ==========
+
+jobs_cli = AppGroup('jobs', help="Gestion de la file de tâches asynchrones")
+
+
+@jobs_cli.command('worker')
+@click.option('--poll-interval', default=2.0, show_default=True, help="Attente (s) quand la file est vide")
+@click.option('--batch-size', default=20, show_default=True, help="Nombre de tâches réservées par lot")
+def worker_command(poll_interval, batch_size):
+    """Lance le worker de tâches"""
+    run_worker(poll_interval=poll_interval, batch_size=batch_size)
+
+
+@jobs_cli.command('run-once')
+@click.option('--batch-size', default=100, show_default=True)
+def run_once_command(batch_size):
+    """Traite un lot de tâches prêtes puis s'arrête"""
+    click.echo(f"{process_jobs(batch_size)} tâche(s) traitée(s)")
+
+
+@jobs_cli.command('retry-dead')
+@click.argument('dead_letter_id', type=int)
+def retry_dead_command(dead_letter_id):
+    """Remet en file une tâche de la dead-letter"""
+    job = retry_dead_letter_job(dead_letter_id)
+    click.echo(f"Tâche remise en file: {job.id}" if job else "Tâche dead-letter introuvable")
@@ -0,0 +1,224 @@
+# app/services/notification/notification_analytics_service.py
+"""Agrégats journaliers des notifications (table notification_analytics)"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db
+from app.models import NotificationAnalytics, NotificationHistory
+
+METRIC_COLUMNS = ('total_sent', 'total_delivered', 'total_read', 'total_clicked')
+
+
+def _bucket(created_at, category, priority, delivery_method):
+    """Clé d'agrégat : jour d'envoi, catégorie, priorité, canal"""
+    day = created_at.date() if isinstance(created_at, datetime) else (created_at or datetime.utcnow().date())
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    return (day, category or 'general', priority or 'normal', delivery_method or 'failed')
+
+
+def _apply_increments(increments):
+    """
+    Ajoute des compteurs aux agrégats, dans la transaction courante.
+    `increments` : {bucket: {colonne: delta}}. UPDATE atomique, puis INSERT
+    si la ligne n'existe pas encore (la contrainte unique arbitre les courses).
+    """
+    for (day, category, priority, delivery_method), deltas in increments.items():
+        deltas = {column: n for column, n in deltas.items() if n}
+        if not deltas:
+            continue
+
+        bucket_filter = (
+            NotificationAnalytics.date == day,
+            NotificationAnalytics.category == category,
+            NotificationAnalytics.priority == priority,
+            NotificationAnalytics.delivery_method == delivery_method
+        )
+        values = {
+            getattr(NotificationAnalytics, column): func.coalesce(getattr(NotificationAnalytics, column), 0) + n
+            for column, n in deltas.items()
+        }
+
+        updated = NotificationAnalytics.query.filter(*bucket_filter).update(values, synchronize_session=False)
+        if updated:
+            continue
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(NotificationAnalytics(
+                    date=day,
+                    category=category,
+                    priority=priority,
+                    delivery_method=delivery_method,
+                    **{column: deltas.get(column, 0) for column in METRIC_COLUMNS}
+                ))
+        except IntegrityError:
+            # Ligne créée entre-temps par une autre requête
+            NotificationAnalytics.query.filter(*bucket_filter).update(values, synchronize_session=False)
+
+
+def record_notifications_sent(rows):
+    """
+    Comptabilise des notifications enregistrées dans l'historique.
+    `rows` : objets NotificationHistory ou dicts (bulk_insert_mappings).
+    À appeler avant le commit qui persiste l'historique.
+    """
+    increments = {}
+    for row in rows:
+        get = row.get if isinstance(row, dict) else (lambda key, obj=row: getattr(obj, key, None))
+        bucket = _bucket(get('created_at'), get('category'), get('priority'), get('delivery_method'))
+        counters = increments.setdefault(bucket, Counter())
+        counters['total_sent'] += 1
+        if get('sent_successfully'):
+            counters['total_delivered'] += 1
+
+    _apply_increments(increments)
+
+
+def mark_notifications_read(query, values):
+    """
+    Marque lues les notifications non lues sélectionnées par `query` (UPDATE avec `values`)
+    et comptabilise les lectures au jour d'envoi, dans la transaction courante.
+    Les lignes sont verrouillées (FOR UPDATE) avant l'UPDATE : une requête concurrente
+    attend, puis ne trouve plus rien à marquer ni à compter. Retourne le nombre de
+    notifications marquées (rowcount de l'UPDATE).
+    """
+    rows = query.filter(NotificationHistory.unread_clause()).with_entities(
+        NotificationHistory.id,
+        NotificationHistory.created_at,
+        NotificationHistory.category,
+        NotificationHistory.priority,
+        NotificationHistory.delivery_method
+    ).with_for_update().all()
+    if not rows:
+        return 0
+
+    updated = NotificationHistory.query.filter(
+        NotificationHistory.id.in_([row.id for row in rows]),
+        NotificationHistory.unread_clause()
+    ).update(values, synchronize_session=False)
+
+    if updated == len(rows):
+        _apply_increments({
+            bucket: {'total_read': count}
+            for bucket, count in Counter(
+                _bucket(row.created_at, row.category, row.priority, row.delivery_method) for row in rows
+            ).items()
+        })
+    else:
+        # Base sans verrou de ligne : les notifications marquées ne sont pas identifiables
+        print(f"⚠️ Lectures non comptabilisées: {updated} marquée(s) sur {len(rows)} sélectionnée(s)")
+    return updated
+
+
+def record_notification_read(notification):
+    """
+    Comptabilise la lecture d'une notification, dans la transaction courante.
+    À appeler seulement si l'UPDATE conditionnel (is_read = false) l'a effectivement marquée lue.
+    """
+    bucket = _bucket(notification.created_at, notification.category, notification.priority,
+                     notification.delivery_method)
+    _apply_increments({bucket: {'total_read': 1}})
+
+
+def get_notification_rollup(days=None):
+    """Totaux et répartition par catégorie lus depuis les agrégats"""
+    totals_query = db.session.query(
+        func.coalesce(func.sum(NotificationAnalytics.total_sent), 0),
+        func.coalesce(func.sum(NotificationAnalytics.total_delivered), 0),
+        func.coalesce(func.sum(NotificationAnalytics.total_read), 0)
+    )
+    category_query = db.session.query(
+        NotificationAnalytics.category,
+        func.coalesce(func.sum(NotificationAnalytics.total_sent), 0),
+        func.coalesce(func.sum(NotificationAnalytics.total_delivered), 0),
+        func.coalesce(func.sum(NotificationAnalytics.total_read), 0)
+    ).group_by(NotificationAnalytics.category)
+
+    if days:
+        since = datetime.utcnow().date() - timedelta(days=days)
+        category_query = category_query.filter(NotificationAnalytics.date >= since)
+
+    sent, delivered, read = totals_query.one()
+    return {
+        'total': int(sent),
+        'successful': int(delivered),
+        'read': int(read),
+        'by_category': {
+            category: {'total': int(c_sent), 'successful': int(c_delivered), 'read': int(c_read)}
+            for category, c_sent, c_delivered, c_read in category_query.all()
+        }
+    }
+
+
+def backfill_notification_analytics(since=None):
+    """
+    Recalcule les agrégats depuis l'historique (à partir du jour `since`, ou tout l'historique).
+    Les lignes d'agrégat de la période sont remplacées.
+    """
+    day = func.date(NotificationHistory.created_at)
+    query = db.session.query(
+        day,
+        NotificationHistory.category,
+        NotificationHistory.priority,
+        NotificationHistory.delivery_method,
+        func.count(),
+        func.sum(case((NotificationHistory.sent_successfully == True, 1), else_=0)),
+        func.sum(case((NotificationHistory.is_read == True, 1), else_=0))
+    ).group_by(
+        day,
+        NotificationHistory.category,
+        NotificationHistory.priority,
+        NotificationHistory.delivery_method
+    )
+
+    delete_query = NotificationAnalytics.query
+    if since:
+        query = query.filter(NotificationHistory.created_at >= datetime.combine(since, datetime.min.time()))
+        delete_query = delete_query.filter(NotificationAnalytics.date >= since)
+
+    # Plusieurs groupes SQL peuvent tomber dans le même agrégat (catégorie NULL → 'general')
+    buckets = {}
+    for created_day, category, priority, delivery_method, sent, delivered, read in query.all():
+        counters = buckets.setdefault(_bucket(created_day, category, priority, delivery_method), Counter())
+        counters['total_sent'] += int(sent or 0)
+        counters['total_delivered'] += int(delivered or 0)
+        counters['total_read'] += int(read or 0)
+
+    deleted = delete_query.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(NotificationAnalytics, [
+        {
+            'date': bucket_day,
+            'category': category,
+            'priority': priority,
+            'delivery_method': delivery_method,
+            'total_sent': counters['total_sent'],
+            'total_delivered': counters['total_delivered'],
+            'total_read': counters['total_read'],
+            'total_clicked': 0,
+            'created_at': datetime.utcnow()
+        }
+        for (bucket_day, category, priority, delivery_method), counters in buckets.items()
+    ])
+    db.session.commit()
+
+    print(f"📊 Agrégats notifications: {deleted} ligne(s) remplacée(s) par {len(buckets)}")
+    return len(buckets)
+
+
+# ========== COMMANDES CLI ==========
+
+notifications_cli = AppGroup('notifications', help="Maintenance des notifications")
+
+
+@notifications_cli.command('backfill-analytics')
+@click.option('--since', default=None, help="Premier jour à recalculer (AAAA-MM-JJ), tout l'historique par défaut")
+def backfill_analytics_command(since):
+    """Reconstruit la table notification_analytics depuis l'historique"""
+    since_day = date.fromisoformat(since) if since else None
+    click.echo(f"{backfill_notification_analytics(since_day)} agrégat(s) écrit(s)")
@@ -1,6 +1,7 @@
 # app/services/notification_helper.py - CRÉER CE FICHIER
 from supabase_notification_service import send_notification
 from flask import current_app
+from app.utils.query_helpers import citizen_display_name
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,9 +16,7 @@ class NotificationHelper:
             if signalement.citoyenID == voteur_id:
                 return
                 
-            from app.models import Citoyen
-            voteur = Citoyen.query.get(voteur_id)
-            voteur_nom = f"{voteur.prenom} {voteur.nom}" if voteur else "Quelqu'un"
+            voteur_nom = citizen_display_name(voteur_id)
             
             vote_emoji = "👍" if vote.types == "positif" else "👎"
             
@@ -45,9 +44,7 @@ class NotificationHelper:
             if petition.citoyenID == signataire_id:
                 return
                 
-            from app.models import Citoyen
-            signataire = Citoyen.query.get(signataire_id)
-            signataire_nom = f"{signataire.prenom} {signataire.nom}" if signataire else "Quelqu'un"
+            signataire_nom = citizen_display_name(signataire_id)
             
             success = send_notification(
                 user_id=petition.citoyenID,
@@ -73,9 +70,7 @@ class NotificationHelper:
             if signalement.citoyenID == commenteur_id:
                 return
                 
-            from app.models import Citoyen
-            commenteur = Citoyen.query.get(commenteur_id)
-            commenteur_nom = f"{commenteur.prenom} {commenteur.nom}" if commenteur else "Quelqu'un"
+            commenteur_nom = citizen_display_name(commenteur_id)
             
             success = send_notification(
                 user_id=signalement.citoyenID,
@@ -101,9 +96,7 @@ class NotificationHelper:
             if petition.citoyenID == commenteur_id:
                 return
                 
-            from app.models import Citoyen
-            commenteur = Citoyen.query.get(commenteur_id)
-            commenteur_nom = f"{commenteur.prenom} {commenteur.nom}" if commenteur else "Quelqu'un"
+            commenteur_nom = citizen_display_name(commenteur_id)
             
             success = send_notification(
                 user_id=petition.citoyenID,
@@ -151,9 +144,7 @@ class NotificationHelper:
     def notify_new_follower(suivi_id, suiveur_id):
         """Notification pour nouveau suiveur"""
         try:
-            from app.models import Citoyen
-            suiveur = Citoyen.query.get(suiveur_id)
-            suiveur_nom = f"{suiveur.prenom} {suiveur.nom}" if suiveur else "Quelqu'un"
+            suiveur_nom = citizen_display_name(suiveur_id)
             
             success = send_notification(
                 user_id=suivi_id,
@@ -0,0 +1,328 @@
+# app/services/notification/notification_inbox_service.py
+"""
+Boîte de réception des notifications dans Redis (même instance que le cache).
+
+Par utilisateur :
+- inbox:{id}:ids    ensemble trié des identifiants récents (score = date de création)
+- inbox:{id}:unread nombre de notifications non lues
+- inbox:{id}:total  nombre total de notifications
+- inbox:{id}:version  incrémenté à chaque écriture
+
+notification_history reste la source de vérité : chaque écriture SQL est
+répercutée ici après le commit. Une clé absente est reconstruite depuis SQL à la
+première lecture ; les mises à jour ne touchent que les clés existantes (scripts
+Lua atomiques), donc une clé n'est jamais créée partielle. La reconstruction lit
+la version avant la requête SQL et n'enregistre le résultat que si elle n'a pas
+changé : une écriture commitée pendant la lecture SQL ne laisse pas de valeur
+périmée pour toute la durée du TTL. En cas d'erreur Redis les clés de
+l'utilisateur sont supprimées et la lecture retombe sur SQL.
+"""
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import NotificationHistory
+
+logger = logging.getLogger(__name__)
+
+# Ajoute un identifiant (si la boîte est chargée) et incrémente les compteurs existants
+_PUSH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[3]) - 1)
+end
+for i = 2, 3 do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('INCRBY', KEYS[i], ARGV[i + 2])
+    end
+end
+return 1
+"""
+
+# Ajoute `delta` à un compteur existant, sans descendre sous zéro
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+    redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+    value = 0
+end
+return value
+"""
+
+# Enregistre une clé reconstruite depuis SQL si aucune écriture n'a eu lieu depuis la lecture de la version
+# ARGV : version lue, TTL, puis la valeur (compteur) ou les couples score / identifiant (liste récente)
+_FILL_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] or redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+if #ARGV == 3 then
+    redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[2])
+else
+    redis.call('ZADD', KEYS[2], unpack(ARGV, 3))
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+
+def _keys(user_id) -> Tuple[str, str, str]:
+    prefix = f"inbox:{int(user_id)}"
+    return f"{prefix}:ids", f"{prefix}:unread", f"{prefix}:total"
+
+
+def _version_key(user_id) -> str:
+    return f"inbox:{int(user_id)}:version"
+
+
+def _get_redis():
+    """Client Redis de la boîte de réception (None si le cache n'est pas Redis)"""
+    if current_app.config.get('CACHE_TYPE') != 'RedisCache':
+        return None
+
+    inbox = current_app.extensions.get('notification_inbox')
+    if inbox is None:
+        import redis
+
+        options = {'socket_connect_timeout': 0.5, 'socket_timeout': 0.5}
+        url = current_app.config.get('CACHE_REDIS_URL')
+        if url:
+            client = redis.Redis.from_url(url, **options)
+        else:
+            client = redis.Redis(
+                host=current_app.config.get('CACHE_REDIS_HOST', 'localhost'),
+                port=current_app.config.get('CACHE_REDIS_PORT', 6379),
+                db=current_app.config.get('CACHE_REDIS_DB', 0),
+                **options
+            )
+        inbox = current_app.extensions['notification_inbox'] = {
+            'client': client,
+            'push': client.register_script(_PUSH_SCRIPT),
+            'adjust': client.register_script(_ADJUST_SCRIPT),
+            'fill': client.register_script(_FILL_SCRIPT)
+        }
+    return inbox
+
+
+def _inbox_size() -> int:
+    return current_app.config.get('NOTIFICATION_INBOX_SIZE', 200)
+
+
+def _inbox_ttl() -> int:
+    return current_app.config.get('NOTIFICATION_INBOX_TTL', 604800)
+
+
+def _score(created_at: Optional[datetime]) -> float:
+    return (created_at or datetime.utcnow()).timestamp()
+
+
+def _bump_versions(pipe, user_ids: Iterable[int]):
+    """Invalide les reconstructions en cours (lecture SQL antérieure à l'écriture)"""
+    for user_id in user_ids:
+        pipe.incr(_version_key(user_id))
+        pipe.expire(_version_key(user_id), _inbox_ttl())
+
+
+def forget_inbox(user_ids: Iterable[int]):
+    """Supprime les clés de boîte de réception (reconstruites depuis SQL à la prochaine lecture)"""
+    inbox = _get_redis()
+    user_ids = list(user_ids)
+    keys = [key for user_id in user_ids for key in _keys(user_id)]
+    if inbox is None or not keys:
+        return
+    try:
+        pipe = inbox['client'].pipeline(transaction=False)
+        pipe.delete(*keys)
+        _bump_versions(pipe, user_ids)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Boîte de réception: suppression impossible ({e}), expiration sous {_inbox_ttl()}s")
+
+
+def _write_through(user_ids: Iterable[int], operation):
+    """Exécute une mise à jour Redis ; en cas d'échec, invalide les boîtes concernées"""
+    inbox = _get_redis()
+    if inbox is None:
+        return
+    user_ids = list(user_ids)
+    try:
+        pipe = inbox['client'].pipeline(transaction=False)
+        _bump_versions(pipe, user_ids)
+        pipe.execute()
+        operation(inbox)
+    except Exception as e:
+        logger.warning(f"⚠️ Boîte de réception: mise à jour impossible ({e})")
+        forget_inbox(user_ids)
+
+
+# ========== ÉCRITURES (après commit SQL) ==========
+
+def inbox_notification_added(notification: NotificationHistory):
+    """Nouvelle notification enregistrée (envoi individuel)"""
+    unread = 0 if notification.is_read else 1
+
+    def push(inbox):
+        inbox['push'](
+            keys=list(_keys(notification.user_id)),
+            args=[_score(notification.created_at), notification.id, _inbox_size(), unread, 1]
+        )
+
+    _write_through([notification.user_id], push)
+
+
+def inbox_notifications_added(user_ids: List[int]):
+    """
+    Notifications insérées en masse : les identifiants ne sont pas connus
+    (bulk_insert_mappings), les compteurs sont incrémentés et la liste des
+    identifiants récents de chaque destinataire est reconstruite à la lecture.
+    """
+    def push_many(inbox):
+        pipe = inbox['client'].pipeline(transaction=False)
+        for user_id in user_ids:
+            ids_key, unread_key, total_key = _keys(user_id)
+            pipe.delete(ids_key)
+            inbox['adjust'](keys=[unread_key], args=[1], client=pipe)
+            inbox['adjust'](keys=[total_key], args=[1], client=pipe)
+        pipe.execute()
+
+    _write_through(user_ids, push_many)
+
+
+def inbox_marked_read(user_id: int, count: int):
+    """`count` notifications non lues viennent d'être marquées lues"""
+    if not count:
+        return
+    _write_through([user_id], lambda inbox: inbox['adjust'](keys=[_keys(user_id)[1]], args=[-count]))
+
+
+def inbox_all_read(user_id: int):
+    """Toutes les notifications de l'utilisateur sont lues"""
+    _write_through([user_id], lambda inbox: inbox['client'].set(_keys(user_id)[1], 0, ex=_inbox_ttl()))
+
+
+def inbox_notification_removed(user_id: int, notification_id: int, was_unread: bool):
+    """Notification supprimée : la liste récente est reconstruite (une page plus ancienne remonte)"""
+    def remove(inbox):
+        ids_key, unread_key, total_key = _keys(user_id)
+        pipe = inbox['client'].pipeline(transaction=False)
+        pipe.delete(ids_key)
+        inbox['adjust'](keys=[total_key], args=[-1], client=pipe)
+        if was_unread:
+            inbox['adjust'](keys=[unread_key], args=[-1], client=pipe)
+        pipe.execute()
+
+    _write_through([user_id], remove)
+
+
+# ========== LECTURES ==========
+
+def _count_from_sql(user_id: int, unread_only: bool) -> int:
+    query = db.session.query(func.count(NotificationHistory.id)).filter(NotificationHistory.user_id == user_id)
+    if unread_only:
+        query = query.filter(NotificationHistory.unread_clause())  # Même condition que le marquage comme lu
+    return query.scalar() or 0
+
+
+def _cached_count(user_id: int, key_index: int, unread_only: bool) -> int:
+    inbox = _get_redis()
+    key = _keys(user_id)[key_index]
+    version = None
+    if inbox is not None:
+        try:
+            value, version = inbox['client'].mget(key, _version_key(user_id))
+            if value is not None:
+                return int(value)
+        except Exception as e:
+            logger.warning(f"⚠️ Boîte de réception indisponible: {e}")
+            inbox = None
+
+    count = _count_from_sql(user_id, unread_only)
+    if inbox is not None:
+        try:
+            # Ignoré si une écriture a eu lieu depuis la lecture de la version (ou si la clé a été posée)
+            inbox['fill'](keys=[_version_key(user_id), key], args=[version or 0, _inbox_ttl(), count])
+        except Exception as e:
+            logger.warning(f"⚠️ Boîte de réception: compteur non enregistré ({e})")
+    return count
+
+
+def get_unread_count(user_id: int) -> int:
+    """Nombre de notifications non lues (Redis, SQL à défaut)"""
+    return _cached_count(int(user_id), 1, unread_only=True)
+
+
+def get_total_count(user_id: int) -> int:
+    """Nombre total de notifications de l'utilisateur (Redis, SQL à défaut)"""
+    return _cached_count(int(user_id), 2, unread_only=False)
+
+
+def _load_recent_ids(inbox, user_id: int):
+    """
+    Charge la boîte depuis SQL si elle est absente ; retourne False si l'utilisateur n'a aucune
+    notification, None si la boîte n'a pas pu être enregistrée (écriture concurrente)
+    """
+    client = inbox['client']
+    ids_key = _keys(user_id)[0]
+    pipe = client.pipeline(transaction=False)
+    pipe.exists(ids_key)
+    pipe.get(_version_key(user_id))
+    exists, version = pipe.execute()
+    if exists:
+        return True
+
+    rows = db.session.query(NotificationHistory.id, NotificationHistory.created_at).filter(
+        NotificationHistory.user_id == user_id
+    ).order_by(NotificationHistory.created_at.desc(), NotificationHistory.id.desc()).limit(_inbox_size()).all()
+    if not rows:
+        return False
+
+    members = [value for notification_id, created_at in rows for value in (_score(created_at), notification_id)]
+    if inbox['fill'](keys=[_version_key(user_id), ids_key], args=[version or 0, _inbox_ttl(), *members]):
+        return True
+    return True if client.exists(ids_key) else None
+
+
+def get_recent_notification_ids(user_id: int, offset: int = 0, limit: int = 20,
+                                since: Optional[datetime] = None) -> Optional[List[int]]:
+    """
+    Identifiants des notifications les plus récentes (ordre décroissant).
+    Retourne None si la boîte n'est pas disponible ou si la plage demandée
+    dépasse les identifiants conservés : l'appelant interroge alors SQL.
+    """
+    inbox = _get_redis()
+    if inbox is None:
+        return None
+
+    user_id = int(user_id)
+    try:
+        loaded = _load_recent_ids(inbox, user_id)
+        if loaded is None:
+            return None
+        if not loaded:
+            return []
+
+        client = inbox['client']
+        ids_key = _keys(user_id)[0]
+        if offset + limit > _inbox_size() and client.zcard(ids_key) >= _inbox_size():
+            return None  # Page au-delà des identifiants conservés
+
+        min_score = _score(since) if since else '-inf'
+        ids = client.zrevrangebyscore(ids_key, '+inf', min_score, start=offset, num=limit)
+        return [int(notification_id) for notification_id in ids]
+    except Exception as e:
+        logger.warning(f"⚠️ Boîte de réception indisponible: {e}")
+        return None
+
+
+def load_notifications(ids: List[int]) -> List[NotificationHistory]:
+    """Notifications par clé primaire, dans l'ordre de `ids`"""
+    if not ids:
+        return []
+    rows = {row.id: row for row in NotificationHistory.query.filter(NotificationHistory.id.in_(ids)).all()}
+    return [rows[notification_id] for notification_id in ids if notification_id in rows]
@@ -5,12 +5,68 @@ import requests
 import json
 from flask import current_app
 from app.models import db
-from app.models import FCMToken, NotificationHistory
+from app.models import FCMToken, NotificationHistory, NotificationPreferences
 from typing import List, Optional, Dict, Any
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
+from app.services.notification.notification_analytics_service import record_notification_read, record_notifications_sent
+from app.services.notification.notification_inbox_service import (
+    get_recent_notification_ids, get_total_count, inbox_marked_read, inbox_notification_added,
+    inbox_notifications_added, load_notifications
+)
 
 # Configuration
 ONESIGNAL_URL = "https://onesignal.com/api/v1/notifications"
+ONESIGNAL_MAX_PLAYER_IDS = 2000  # Limite OneSignal par requête
+SUPABASE_INSERT_CHUNK = 500
+SQL_IN_CHUNK = 1000
+
+
+class NotificationDeliveryError(Exception):
+    """Aucun canal tenté n'a livré la notification (levée seulement avec raise_errors=True)"""
+
+DEFAULT_PREFERENCES = {
+    'notifications_push': True,
+    'notifications_realtime': True,
+    'notifications_email': False,
+    'nouveaux_signalements': True,
+    'commentaires_signalements': True,
+    'nouvelles_petitions': True,
+    'commentaires_petitions': True,
+    'nouvelles_publications': True,
+    'commentaires_publications': True,
+    'votes_signatures': True,
+    'reponses_autorites': True,
+    'mentions': True,
+    'changements_statut': True,
+    'urgent_only': False,
+    'quiet_hours_enabled': False,
+    'location_based': True
+}
+
+
+def _schedule_search_indexing():
+    """
+    Indexation plein texte des nouvelles notifications, hors du chemin d'envoi.
+    Une seule tâche en attente : les envois suivants sont indexés par la même passe.
+    Le délai regroupe les envois et évite l'exécution immédiate en mode JOBS_EAGER.
+    """
+    try:
+        from app.models import BackgroundJob
+        from app.services.jobs.job_service import enqueue_job
+
+        already_pending = db.session.query(BackgroundJob.id).filter_by(
+            name='search.index_notifications', status='pending'
+        ).first()
+        if already_pending is None:
+            enqueue_job('search.index_notifications', delay_seconds=current_app.config.get('SEARCH_INDEX_DELAY', 30))
+    except Exception as e:
+        current_app.logger.warning(f"Indexation notifications non planifiée: {e}")
+
+
+def _chunks(items: List, size: int):
+    """Découpe une liste en sous-listes de taille maximale `size`"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 def _get_onesignal_config():
     """Récupère la configuration OneSignal"""
@@ -22,10 +78,10 @@ def _get_onesignal_config():
 def _get_supabase_client():
     """Récupère le client Supabase avec service role"""
     try:
-        from supabase import create_client
+        from app.supabase_media_service import get_supabase_client
         url = current_app.config.get('SUPABASE_URL')
         key = current_app.config.get('SUPABASE_SERVICE_ROLE_KEY')
-        return create_client(url, key) if url and key else None
+        return get_supabase_client(url, key) if url and key else None
     except ImportError:
         current_app.logger.error("Supabase client non disponible")
         return None
@@ -48,28 +104,45 @@ def _get_user_preferences(user_id: int) -> Dict:
             db.session.commit()
             
             # Retourner les valeurs par défaut
-            return {
-                'notifications_push': True,
-                'notifications_realtime': True,
-                'notifications_email': False,
-                'nouveaux_signalements': True,
-                'commentaires_signalements': True,
-                'nouvelles_petitions': True,
-                'commentaires_petitions': True,
-                'nouvelles_publications': True,
-                'commentaires_publications': True,
-                'votes_signatures': True,
-                'reponses_autorites': True,
-                'mentions': True,
-                'changements_statut': True,
-                'urgent_only': False,
-                'quiet_hours_enabled': False,
-                'location_based': True
-            }
+            return dict(DEFAULT_PREFERENCES)
     except Exception as e:
         current_app.logger.error(f"Erreur récupération préférences: {e}")
         return {}
 
+def _get_users_preferences(user_ids: List[int]) -> Dict[int, Dict]:
+    """
+    Récupère les préférences de plusieurs utilisateurs en une requête par lot.
+    Les préférences manquantes sont créées en une seule insertion groupée.
+    """
+    preferences = {}
+    try:
+        for chunk in _chunks(user_ids, SQL_IN_CHUNK):
+            rows = db.session.execute(text("""
+                SELECT * FROM notification_preferences WHERE user_id IN :user_ids
+            """).bindparams(bindparam('user_ids', expanding=True)), {'user_ids': chunk}).fetchall()
+            for row in rows:
+                row_dict = dict(row._mapping)
+                preferences[row_dict['user_id']] = row_dict
+
+        missing = [user_id for user_id in user_ids if user_id not in preferences]
+        if missing:
+            now = datetime.utcnow()
+            db.session.bulk_insert_mappings(NotificationPreferences, [
+                {'user_id': user_id, 'created_at': now, 'updated_at': now}
+                for user_id in missing
+            ])
+            db.session.commit()
+            for user_id in missing:
+                preferences[user_id] = dict(DEFAULT_PREFERENCES)
+
+    except Exception as e:
+        current_app.logger.error(f"Erreur récupération préférences groupées: {e}")
+        db.session.rollback()
+        for user_id in user_ids:
+            preferences.setdefault(user_id, dict(DEFAULT_PREFERENCES))
+
+    return preferences
+
 def _should_send_notification(category: str, priority: str, preferences: Dict) -> bool:
     """Vérifie si la notification doit être envoyée selon les préférences"""
     try:
@@ -113,11 +186,15 @@ def _is_quiet_hours(preferences: Dict) -> bool:
 
 def _send_push_notification(user_tokens: List[str], title: str, message: str, data: Dict = None) -> bool:
     """Envoie notification push via OneSignal"""
+    return _send_push_batch(user_tokens, title, message, data) > 0
+
+def _send_push_batch(user_tokens: List[str], title: str, message: str, data: Dict = None) -> int:
+    """Envoie une notification push OneSignal à un lot de player ids. Retourne le nombre de destinataires."""
     try:
         config = _get_onesignal_config()
         if not config['app_id'] or not config['api_key']:
             current_app.logger.warning("OneSignal non configuré")
-            return False
+            return 0
 
         headers = {
             'Authorization': f'Basic {config["api_key"]}',
@@ -140,14 +217,14 @@ def _send_push_notification(user_tokens: List[str], title: str, message: str, da
         if response.status_code == 200:
             result = response.json()
             current_app.logger.info(f"OneSignal: {result.get('recipients', 0)} notifications envoyées")
-            return result.get('recipients', 0) > 0
+            return result.get('recipients', 0) or 0
         else:
             current_app.logger.error(f"OneSignal error: {response.status_code} - {response.text}")
-            return False
+            return 0
 
     except Exception as e:
         current_app.logger.error(f"Erreur OneSignal: {e}")
-        return False
+        return 0
 
 def _send_realtime_notification(user_id: int, title: str, message: str, data: Dict = None, 
                                entity_type: str = None, entity_id: int = None, 
@@ -189,8 +266,13 @@ def send_notification(user_id: int,
                      entity_type: str = None,
                      entity_id: int = None,
                      priority: str = 'normal',
-                     category: str = 'general') -> bool:
-    """Envoie notification via Supabase Realtime + OneSignal push"""
+                     category: str = 'general',
+                     raise_errors: bool = False) -> bool:
+    """
+    Envoie notification via Supabase Realtime + OneSignal push.
+    raise_errors=True (tâches asynchrones) : une erreur, ou l'échec de tous les canaux
+    tentés, est levée avant l'écriture de l'historique pour que la tâche soit retentée.
+    """
     try:
         # Récupérer les préférences utilisateur
         preferences = _get_user_preferences(user_id)
@@ -207,10 +289,12 @@ def send_notification(user_id: int,
 
         success_realtime = False
         success_push = False
+        attempted = False
         delivery_methods = []
 
         # 1. Envoyer via Supabase Realtime si activé
         if preferences.get('notifications_realtime', True):
+            attempted = True
             success_realtime = _send_realtime_notification(
                 user_id=user_id,
                 title=title,
@@ -229,6 +313,7 @@ def send_notification(user_id: int,
             tokens = FCMToken.query.filter_by(user_id=user_id, is_active=True).all()
             
             if tokens:
+                attempted = True
                 player_ids = [token.token for token in tokens]
                 success_push = _send_push_notification(player_ids, title, message, data)
                 
@@ -238,6 +323,9 @@ def send_notification(user_id: int,
                     for token in tokens:
                         token.last_used = datetime.utcnow()
 
+        if raise_errors and attempted and not (success_realtime or success_push):
+            raise NotificationDeliveryError(f"Notification user {user_id} non livrée (Supabase / OneSignal)")
+
         # 3. Enregistrer dans l'historique Flask
         delivery_method = ','.join(delivery_methods) if delivery_methods else 'failed'
         
@@ -251,14 +339,17 @@ def send_notification(user_id: int,
             delivery_method=delivery_method,
             priority=priority,
             category=category,
-            metadata=json.dumps(data) if data else None
+            notification_metadata=json.dumps(data) if data else None
         )
         
         if success_push and delivery_methods:
             history.fcm_message_id = f"delivery_{len(delivery_methods)}_methods"
 
         db.session.add(history)
+        record_notifications_sent([history])
         db.session.commit()
+        inbox_notification_added(history)
+        _schedule_search_indexing()
 
         current_app.logger.info(f"Notification user {user_id}: realtime={success_realtime}, push={success_push}")
         return success_realtime or success_push
@@ -266,8 +357,31 @@ def send_notification(user_id: int,
     except Exception as e:
         current_app.logger.error(f"Erreur envoi notification user {user_id}: {e}")
         db.session.rollback()
+        if raise_errors:
+            raise
         return False
 
+def _send_realtime_batch(rows: List[Dict]) -> set:
+    """Insère un lot de notifications temps réel Supabase. Retourne les user_id livrés."""
+    delivered = set()
+    if not rows:
+        return delivered
+
+    supabase = _get_supabase_client()
+    if not supabase:
+        current_app.logger.warning("Client Supabase non disponible")
+        return delivered
+
+    for chunk in _chunks(rows, SUPABASE_INSERT_CHUNK):
+        try:
+            result = supabase.table('realtime_notifications').insert(chunk).execute()
+            if result.data:
+                delivered.update(row['user_id'] for row in chunk)
+        except Exception as e:
+            current_app.logger.error(f"Erreur Supabase realtime (lot de {len(chunk)}): {e}")
+
+    return delivered
+
 def send_to_multiple_users(user_ids: List[int],
                           title: str,
                           message: str,
@@ -275,25 +389,118 @@ def send_to_multiple_users(user_ids: List[int],
                           entity_type: str = None,
                           entity_id: int = None,
                           priority: str = 'normal',
-                          category: str = 'general') -> int:
-    """Envoie notification à plusieurs utilisateurs"""
-    success_count = 0
-    
-    for user_id in user_ids:
-        if send_notification(
-            user_id=user_id,
-            title=title,
-            message=message,
-            data=data,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            priority=priority,
-            category=category
-        ):
-            success_count += 1
+                          category: str = 'general',
+                          raise_errors: bool = False) -> int:
+    """
+    Envoie notification à plusieurs utilisateurs.
+    Préférences et tokens sont chargés en une requête par lot, le filtrage est fait
+    en mémoire, puis Supabase, OneSignal et l'historique sont alimentés par lots.
+    raise_errors=True (tâches asynchrones) : une erreur, ou aucune livraison alors que
+    des canaux ont été tentés, est levée avant l'historique ; une livraison partielle
+    est enregistrée telle quelle (la retenter notifierait deux fois les destinataires servis).
+    """
+    user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids if user_id is not None))
+    if not user_ids:
+        return 0
+
+    try:
+        preferences = _get_users_preferences(user_ids)
+
+        # 1. Filtrage en mémoire (catégorie, priorité, heures silencieuses)
+        recipients = []
+        for user_id in user_ids:
+            prefs = preferences.get(user_id, DEFAULT_PREFERENCES)
+            if not _should_send_notification(category, priority, prefs):
+                continue
+            if priority != 'urgent' and _is_quiet_hours(prefs):
+                continue
+            recipients.append(user_id)
+
+        filtered = len(user_ids) - len(recipients)
+        if filtered:
+            current_app.logger.info(f"Notifications groupées: {filtered} destinataire(s) filtré(s) par préférences")
+
+        # 2. Supabase Realtime : une insertion groupée
+        realtime_rows = [{
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'data': data or {},
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'priority': priority,
+            'category': category
+        } for user_id in recipients if preferences[user_id].get('notifications_realtime', True)]
+        realtime_delivered = _send_realtime_batch(realtime_rows)
+
+        # 3. Push OneSignal : une requête par lot de player ids
+        push_users = [user_id for user_id in recipients if preferences[user_id].get('notifications_push', True)]
+        tokens_by_player = {}
+        for chunk in _chunks(push_users, SQL_IN_CHUNK):
+            tokens = db.session.query(FCMToken.token, FCMToken.user_id).filter(
+                FCMToken.user_id.in_(chunk),
+                FCMToken.is_active == True
+            ).all()
+            tokens_by_player.update({token: user_id for token, user_id in tokens})
+
+        push_delivered = set()
+        delivered_tokens = []
+        player_ids = list(tokens_by_player)
+        for chunk in _chunks(player_ids, ONESIGNAL_MAX_PLAYER_IDS):
+            if _send_push_batch(chunk, title, message, data) > 0:
+                push_delivered.update(tokens_by_player[token] for token in chunk)
+                delivered_tokens.extend(chunk)
+
+        if raise_errors and (realtime_rows or player_ids) and not (realtime_delivered or push_delivered):
+            raise NotificationDeliveryError(f"Notifications groupées non livrées ({len(recipients)} destinataire(s))")
+
+        now = datetime.utcnow()
+        for chunk in _chunks(delivered_tokens, SQL_IN_CHUNK):
+            FCMToken.query.filter(FCMToken.token.in_(chunk)).update(
+                {'last_used': now}, synchronize_session=False
+            )
 
-    current_app.logger.info(f"Notifications groupées: {success_count}/{len(user_ids)} envoyées")
-    return success_count
+        # 4. Historique : une insertion groupée
+        metadata = json.dumps(data) if data else None
+        history_rows = []
+        for user_id in recipients:
+            methods = []
+            if user_id in realtime_delivered:
+                methods.append('supabase')
+            if user_id in push_delivered:
+                methods.append('onesignal')
+
+            history_rows.append({
+                'user_id': user_id,
+                'title': title,
+                'message': message,
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'sent_successfully': bool(methods),
+                'delivery_method': ','.join(methods) if methods else 'failed',
+                'fcm_message_id': f"delivery_{len(methods)}_methods" if user_id in push_delivered else None,
+                'priority': priority,
+                'category': category,
+                'notification_metadata': metadata,
+                'created_at': now
+            })
+
+        db.session.bulk_insert_mappings(NotificationHistory, history_rows)
+        record_notifications_sent(history_rows)
+        db.session.commit()
+        inbox_notifications_added(recipients)
+        _schedule_search_indexing()
+
+        success_count = len(realtime_delivered | push_delivered)
+        current_app.logger.info(f"Notifications groupées: {success_count}/{len(user_ids)} envoyées")
+        return success_count
+
+    except Exception as e:
+        current_app.logger.error(f"Erreur envoi notifications groupées: {e}")
+        db.session.rollback()
+        if raise_errors:
+            raise
+        return 0
 
 def create_notification_from_template(template_name: str,
                                     user_id: int,
@@ -495,11 +702,38 @@ def deactivate_token(user_id: int, token: str) -> bool:
     except:
         return False
 
-def get_notification_history(user_id: int, page: int = 1, per_page: int = 20) -> Dict:
+def get_notification_history(user_id: int, page: int = 1, per_page: int = 20,
+                             category: str = None, is_read: str = None) -> Dict:
+    """
+    Historique paginé. Sans filtre, les pages récentes sont servies par la boîte
+    de réception Redis (identifiants + total) et les lignes lues par clé primaire.
+    """
     try:
-        history = NotificationHistory.query.filter_by(user_id=user_id).order_by(
+        per_page = min(per_page, 100)
+
+        if not category and is_read is None:
+            ids = get_recent_notification_ids(user_id, offset=(page - 1) * per_page, limit=per_page)
+            if ids is not None:
+                total = get_total_count(user_id)
+                return {
+                    'notifications': [h.to_dict() for h in load_notifications(ids)],
+                    'pagination': {
+                        'page': page,
+                        'per_page': per_page,
+                        'total': total,
+                        'pages': -(-total // per_page)
+                    }
+                }
+
+        query = NotificationHistory.query.filter_by(user_id=user_id)
+        if category:
+            query = query.filter(NotificationHistory.category == category)
+        if is_read is not None:
+            query = query.filter(NotificationHistory.is_read == (str(is_read).lower() in ('true', '1')))
+
+        history = query.order_by(
             NotificationHistory.created_at.desc()
-        ).paginate(page=page, per_page=min(per_page, 100), error_out=False)
+        ).paginate(page=page, per_page=per_page, error_out=False)
         
         return {
             'notifications': [h.to_dict() for h in history.items],
@@ -516,11 +750,21 @@ def get_notification_history(user_id: int, page: int = 1, per_page: int = 20) ->
 def mark_notification_read(notification_id: int, user_id: int) -> bool:
     try:
         notification = NotificationHistory.query.filter_by(id=notification_id, user_id=user_id).first()
-        if notification:
-            notification.is_read = True
-            notification.clicked_at = datetime.utcnow()
-            db.session.commit()
-            return True
-        return False
+        if not notification:
+            return False
+
+        # UPDATE conditionnel : seule la requête qui fait passer la notification à lue
+        # compte la lecture et décrémente le compteur (requêtes simultanées, double clic)
+        marked = NotificationHistory.query.filter(
+            NotificationHistory.id == notification_id,
+            NotificationHistory.unread_clause()
+        ).update({'is_read': True, 'clicked_at': datetime.utcnow()}, synchronize_session=False)
+        if marked == 1:
+            record_notification_read(notification)
+        db.session.commit()
+        if marked == 1:
+            inbox_marked_read(user_id, 1)
+        return True
     except:
+        db.session.rollback()
         return False
\ No newline at end of file
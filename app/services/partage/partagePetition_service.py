@@ -2,12 +2,17 @@
 # from flask_migrate import Migrate
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
+from app import db, invalidate_tags
 
 
 from app.models import PartagerPetition
 from datetime import datetime
 
+
+def _cache_tags(partager):
+    """Tags de cache touchés par une écriture sur un partage"""
+    return [f'partage_petition:{partager.IDpartager}', 'partages_petition', f'citoyen:{partager.citoyenID}', f'petition:{partager.petitionID}']
+
 # Service de Création
 def create_partager_petition(citoyen_id, petition_id, nb_partage=0):
     nouveau_partage = PartagerPetition(
@@ -18,6 +23,7 @@ def create_partager_petition(citoyen_id, petition_id, nb_partage=0):
     )
     db.session.add(nouveau_partage)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouveau_partage))
     return nouveau_partage
 
 # Service de Lecture
@@ -43,13 +49,16 @@ def update_partager_petition(partager_id, nb_partage=None):
         partager.nbPartage = nb_partage
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(partager))
     return partager
 
 # Service de Suppression
 def delete_partager_petition(partager_id):
     partager = PartagerPetition.query.get(partager_id)
     if partager:
+        tags = _cache_tags(partager)
         db.session.delete(partager)
         db.session.commit()
+        invalidate_tags(*tags)
         return True
     return False
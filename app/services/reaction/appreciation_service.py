@@ -2,12 +2,17 @@
 # from flask_migrate import Migrate
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
+from app import db, invalidate_tags
 
 
 from app.models import Appreciation
 from datetime import datetime
 
+
+def _cache_tags(appreciation):
+    """Tags de cache touchés par une écriture sur une appréciation"""
+    return [f'appreciation:{appreciation.IDappreciation}', 'appreciations', f'citoyen:{appreciation.citoyenID}', f'publication:{appreciation.PublicationID}']
+
 # Service de Création
 def create_appreciation(citoyen_id, publication_id):
     nouvelle_appreciation = Appreciation(
@@ -17,6 +22,7 @@ def create_appreciation(citoyen_id, publication_id):
     )
     db.session.add(nouvelle_appreciation)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouvelle_appreciation))
     return nouvelle_appreciation
 
 # Service de Lecture
@@ -36,7 +42,9 @@ def get_appreciations_by_publication(publication_id):
 def delete_appreciation(appreciation_id):
     appreciation = Appreciation.query.get(appreciation_id)
     if appreciation:
+        tags = _cache_tags(appreciation)
         db.session.delete(appreciation)
         db.session.commit()
+        invalidate_tags(*tags)
         return True
     return False
@@ -0,0 +1,116 @@
+# app/services/reaction/counter_service.py
+"""
+Compteurs dénormalisés des réactions : votes des signalements, signatures des pétitions.
+
+Chaque variation est appliquée côté SQL en une instruction
+(UPDATE ... SET n = COALESCE(n, 0) + delta), dans la transaction de l'écriture
+du vote ou de la signature : aucune lecture préalable, donc aucune mise à jour
+perdue entre requêtes concurrentes. reconcile_reaction_counters() reconstruit
+les compteurs depuis les tables votes et signatures.
+"""
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, func, select
+
+from app import db
+from app.models import Petition, Signalement, Signature, Vote
+
+VOTE_COUNTER_COLUMNS = {'positif': 'nbVotePositif', 'negatif': 'nbVoteNegatif'}
+
+
+def vote_counter_column(types):
+    """Colonne du signalement comptant ce type de vote (None si type inconnu)"""
+    return VOTE_COUNTER_COLUMNS.get(types)
+
+
+def increment_counter(model, entity_id, column, delta=1):
+    """Ajoute `delta` à un compteur en SQL (jamais en dessous de zéro). Le commit revient à l'appelant."""
+    if not column or not delta:
+        return 0
+    counter = getattr(model, column)
+    pk_column = model.__mapper__.primary_key[0]
+    new_value = func.coalesce(counter, 0) + delta
+    if delta < 0:
+        new_value = case((new_value < 0, 0), else_=new_value)
+    return db.session.query(model).filter(pk_column == entity_id).update(
+        {counter: new_value}, synchronize_session=False
+    )
+
+
+def _recount(model, column, count_query):
+    """Aligne `column` sur le décompte corrélé `count_query` ; retourne le nombre de lignes corrigées"""
+    counted = count_query.scalar_subquery()
+    return db.session.execute(
+        model.__table__.update().where(func.coalesce(getattr(model, column), -1) != counted).values({column: counted})
+    ).rowcount
+
+
+def reconcile_reaction_counters():
+    """Reconstruit nbVotePositif / nbVoteNegatif / nbSignature depuis les votes et signatures actifs"""
+    try:
+        corrected = {}
+        for types, column in VOTE_COUNTER_COLUMNS.items():
+            corrected[column] = _recount(Signalement, column, select(func.count(Vote.IDvote)).where(
+                Vote.signalementID == Signalement.IDsignalement,
+                Vote.types == types,
+                Vote.is_deleted == False
+            ))
+        corrected['nbSignature'] = _recount(Petition, 'nbSignature', select(func.count(Signature.IDsignature)).where(
+            Signature.petitionID == Petition.IDpetition,
+            Signature.is_deleted == False
+        ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Erreur réconciliation compteurs de réactions: {e}")
+        raise
+
+    print(f"🔢 Compteurs de réactions réconciliés: {corrected}")
+    return corrected
+
+
+def remove_duplicate_reactions():
+    """
+    Supprime les doublons (citoyen, signalement) des votes et (citoyen, pétition)
+    des signatures, préalable aux contraintes uniques. La réaction conservée est
+    la plus récente active, à défaut la plus récente.
+    """
+    removed = {}
+    for model, pk, target in ((Vote, 'IDvote', 'signalementID'), (Signature, 'IDsignature', 'petitionID')):
+        pk_column, target_column = getattr(model, pk), getattr(model, target)
+        duplicated = db.session.query(model.citoyenID, target_column).group_by(
+            model.citoyenID, target_column
+        ).having(func.count() > 1).all()
+
+        to_delete = []
+        for citoyen_id, target_id in duplicated:
+            rows = model.query.filter(model.citoyenID == citoyen_id, target_column == target_id).order_by(
+                model.is_deleted.asc(), pk_column.desc()
+            ).all()
+            to_delete += [getattr(row, pk) for row in rows[1:]]
+
+        if to_delete:
+            model.query.filter(pk_column.in_(to_delete)).delete(synchronize_session=False)
+        removed[model.__tablename__] = len(to_delete)
+
+    db.session.commit()
+    return removed
+
+
+# ========== COMMANDES CLI ==========
+
+reactions_cli = AppGroup('reactions', help="Compteurs des votes et signatures")
+
+
+@reactions_cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Recalcule les compteurs de votes et de signatures"""
+    for column, total in reconcile_reaction_counters().items():
+        click.echo(f"{column}: {total} ligne(s) corrigée(s)")
+
+
+@reactions_cli.command('dedupe')
+def dedupe_command():
+    """Supprime les votes / signatures en double avant l'ajout des contraintes uniques"""
+    for table, total in remove_duplicate_reactions().items():
+        click.echo(f"{table}: {total} doublon(s) supprimé(s)")
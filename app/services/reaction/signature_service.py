@@ -2,37 +2,53 @@
 # from flask_migrate import Migrate
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
-from app.models import Signature
+from sqlalchemy.exc import IntegrityError
+from app import db, invalidate_tags
+from app.models import Petition, Signature
+from app.services.reaction.counter_service import increment_counter
 from datetime import datetime
 
+
+def _cache_tags(signature):
+    """Tags de cache touchés par une écriture sur une signature"""
+    return [
+        f'signature:{signature.IDsignature}', 'signatures', f'citoyen:{signature.citoyenID}',
+        f'petition:{signature.petitionID}', 'petitions'  # nbSignature de la pétition
+    ]
+
 # Service de Création
 def create_signature(citoyen_id, petition_id):
-    from app.models import Signature, Petition
-    from app import db
-    from datetime import datetime
-    
-    # Vérifier si l'utilisateur a déjà signé (et que la signature n'est pas supprimée)
-    existing_signature = get_signature_by_petition_and_citoyen(petition_id, citoyen_id)
-    if existing_signature:
-        raise ValueError("Vous avez déjà signé cette pétition")
-    
-    # Créer nouvelle signature
-    nouvelle_signature = Signature(
-        citoyenID=citoyen_id,
-        petitionID=petition_id,
-        dateCreated=datetime.utcnow(),
-        is_deleted=False
-    )
-    
-    db.session.add(nouvelle_signature)
-    
-    # Incrémenter le compteur de signatures dans la pétition
-    petition = Petition.query.get(petition_id)
-    if petition:
-        petition.nbSignature = (petition.nbSignature or 0) + 1
-    
+    """
+    Enregistre la signature d'un citoyen, ou restaure sa signature supprimée.
+    La contrainte unique (citoyen, pétition) remplace la vérification préalable ;
+    nbSignature est incrémenté en SQL dans la même transaction.
+    """
+    try:
+        with db.session.begin_nested():
+            nouvelle_signature = Signature(
+                citoyenID=citoyen_id,
+                petitionID=petition_id,
+                dateCreated=datetime.utcnow(),
+                is_deleted=False
+            )
+            db.session.add(nouvelle_signature)
+    except IntegrityError:
+        nouvelle_signature = Signature.query.filter_by(petitionID=petition_id, citoyenID=citoyen_id).first()
+        if nouvelle_signature is None:
+            db.session.rollback()
+            raise
+        restored = Signature.query.filter_by(IDsignature=nouvelle_signature.IDsignature, is_deleted=True).update({
+            'is_deleted': False,
+            'dateDeleted': None,
+            'dateCreated': datetime.utcnow()
+        })
+        if not restored:
+            db.session.rollback()
+            raise ValueError("Vous avez déjà signé cette pétition")
+
+    increment_counter(Petition, petition_id, 'nbSignature', 1)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouvelle_signature))
     return nouvelle_signature
 
 # Service de Lecture
@@ -63,6 +79,7 @@ def update_signature(signature_id, nb_signature=None):
         signature.nbSignature = nb_signature
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(signature))
     return signature
 
 # Service de Suppression Logique
@@ -70,17 +87,18 @@ def delete_signature(signature_id):
     """Suppression logique : marque la signature comme supprimée"""
     signature = Signature.query.filter_by(IDsignature=signature_id, is_deleted=False).first()
     if signature:
-        # Marquer comme supprimé au lieu de supprimer physiquement
-        signature.is_deleted = True
-        signature.dateDeleted = datetime.utcnow()  # Optionnel : ajouter une date de suppression
+        # Marquer comme supprimé au lieu de supprimer physiquement (transition conditionnelle)
+        deleted = Signature.query.filter_by(IDsignature=signature_id, is_deleted=False).update({
+            'is_deleted': True,
+            'dateDeleted': datetime.utcnow()
+        })
         
         # Décrémenter le compteur de signatures dans la pétition
-        from app.models import Petition
-        petition = Petition.query.get(signature.petitionID)
-        if petition and petition.nbSignature > 0:
-            petition.nbSignature -= 1
+        if deleted:
+            increment_counter(Petition, signature.petitionID, 'nbSignature', -1)
         
         db.session.commit()
+        invalidate_tags(*_cache_tags(signature))
         return True
     return False
 
@@ -91,13 +109,12 @@ def delete_signature_permanently(signature_id):
     if signature:
         # Décrémenter le compteur si la signature n'était pas encore marquée comme supprimée
         if not signature.is_deleted:
-            from app.models import Petition
-            petition = Petition.query.get(signature.petitionID)
-            if petition and petition.nbSignature > 0:
-                petition.nbSignature -= 1
+            increment_counter(Petition, signature.petitionID, 'nbSignature', -1)
         
+        tags = _cache_tags(signature)
         db.session.delete(signature)
         db.session.commit()
+        invalidate_tags(*tags)
         return True
     return False
 
@@ -106,16 +123,17 @@ def restore_signature(signature_id):
     """Restaure une signature supprimée logiquement"""
     signature = Signature.query.filter_by(IDsignature=signature_id, is_deleted=True).first()
     if signature:
-        signature.is_deleted = False
-        signature.dateDeleted = None  # Optionnel : réinitialiser la date de suppression
+        restored = Signature.query.filter_by(IDsignature=signature_id, is_deleted=True).update({
+            'is_deleted': False,
+            'dateDeleted': None  # Optionnel : réinitialiser la date de suppression
+        })
         
         # Incrémenter à nouveau le compteur
-        from app.models import Petition
-        petition = Petition.query.get(signature.petitionID)
-        if petition:
-            petition.nbSignature = (petition.nbSignature or 0) + 1
+        if restored:
+            increment_counter(Petition, signature.petitionID, 'nbSignature', 1)
         
         db.session.commit()
+        invalidate_tags(*_cache_tags(signature))
         return True
     return False
 
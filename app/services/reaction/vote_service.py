@@ -1,34 +1,61 @@
 from flask_caching import logger
-from app import db
-from app.models import Vote
+from sqlalchemy.exc import IntegrityError
+from app import db, invalidate_tags
+from app.models import Signalement, Vote
+from app.services.reaction.counter_service import increment_counter, vote_counter_column
 from datetime import datetime
 
+
+def _cache_tags(vote):
+    """Tags de cache touchés par une écriture sur un vote"""
+    tags = [
+        f'vote:{vote.IDvote}', 'votes', f'citoyen:{vote.citoyenID}',
+        f'signalement:{vote.signalementID}', 'signalements'  # nbVotePositif / nbVoteNegatif du signalement
+    ]
+    # Listes par citoyen de l'auteur du signalement (compteurs de votes affichés)
+    author_id = db.session.query(Signalement.citoyenID).filter_by(IDsignalement=vote.signalementID).scalar()
+    if author_id is not None and author_id != vote.citoyenID:
+        tags.append(f'citoyen:{author_id}')
+    return tags
+
 def create_vote(citoyen_id, signalement_id, types):
     """
-    Crée un vote s’il n’existe pas déjà un vote actif.
+    Crée le vote d'un citoyen, ou réactive son vote supprimé.
 
+    La contrainte unique (citoyen, signalement) arbitre les requêtes
+    concurrentes ; le compteur du signalement est incrémenté en SQL dans la
+    même transaction. Retourne (vote, True) si le vote est compté,
+    (vote actif existant, False) sinon.
     """
     try:
-        existing_vote = Vote.query.filter_by(
-            citoyenID=citoyen_id,
-            signalementID=signalement_id,
-            is_deleted=False
-        ).first()
-
-        if existing_vote:
-            return existing_vote, False
-
-        nouveau_vote = Vote(
-            citoyenID=citoyen_id,
-            signalementID=signalement_id,
-            types=types,
-            dateCreated=datetime.utcnow(),
-            is_deleted=False
-        )
-
-        db.session.add(nouveau_vote)
+        try:
+            with db.session.begin_nested():
+                vote = Vote(
+                    citoyenID=citoyen_id,
+                    signalementID=signalement_id,
+                    types=types,
+                    dateCreated=datetime.utcnow(),
+                    is_deleted=False
+                )
+                db.session.add(vote)
+        except IntegrityError:
+            vote = Vote.query.filter_by(citoyenID=citoyen_id, signalementID=signalement_id).first()
+            if vote is None:
+                raise
+            revived = Vote.query.filter_by(IDvote=vote.IDvote, is_deleted=True).update({
+                'is_deleted': False,
+                'dateDeleted': None,
+                'types': types,
+                'dateCreated': datetime.utcnow()
+            })
+            if not revived:
+                db.session.rollback()
+                return vote, False
+
+        increment_counter(Signalement, signalement_id, vote_counter_column(types))
         db.session.commit()
-        return nouveau_vote, True
+        invalidate_tags(*_cache_tags(vote))
+        return vote, True
 
     except Exception as e:
         db.session.rollback()
@@ -54,9 +81,15 @@ def get_votes_by_signalement(signalement_id):
 def delete_vote(vote_id):
     vote = Vote.query.get(vote_id)
     if vote:
-        vote.is_deleted = True
-        vote.dateDeleted = datetime.utcnow()
+        # Transition active -> supprimé conditionnelle : un seul décrément même en cas de double appel
+        deleted = Vote.query.filter_by(IDvote=vote_id, is_deleted=False).update({
+            'is_deleted': True,
+            'dateDeleted': datetime.utcnow()
+        })
+        if deleted:
+            increment_counter(Signalement, vote.signalementID, vote_counter_column(vote.types), -1)
         db.session.commit()
+        invalidate_tags(*_cache_tags(vote))
         return True
     return False
 
@@ -68,10 +101,15 @@ def update_vote(vote_id, types=None):
     if not vote:
         return None
 
-    if types is not None:
-        vote.types = types
+    if types is not None and types != vote.types:
+        previous_types = vote.types
+        changed = Vote.query.filter_by(IDvote=vote_id, types=previous_types).update({'types': types})
+        if changed and not vote.is_deleted:
+            increment_counter(Signalement, vote.signalementID, vote_counter_column(previous_types), -1)
+            increment_counter(Signalement, vote.signalementID, vote_counter_column(types), 1)
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(vote))
     return vote
 
 def get_user_vote_for_signalement(citoyen_id, signalement_id):
@@ -0,0 +1,156 @@
+# app/services/schema/schema_service.py
+"""
+Index déclarés dans les modèles : application sur une base existante et mesure des requêtes chaudes.
+
+Les index et contraintes uniques sont déclarés dans `__table_args__` ; `flask db migrate`
+les génère pour les nouvelles installations. ensure_indexes() crée ceux qui manquent sur
+une base déjà en service (idempotent), et benchmark_hot_queries() affiche le plan
+d'exécution et la durée moyenne des recherches appelées à chaque page.
+"""
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import UniqueConstraint, func, inspect, select, text
+from sqlalchemy.schema import AddConstraint
+
+from app import db
+from app.models import (
+    CommentaireSignalement, FCMToken, NotificationHistory, Petition, Signalement, Signature, Suivre, Vote
+)
+
+
+def declared_indexes():
+    """
+    Index et contraintes uniques nommées (hors clés primaires) déclarés par les modèles, par table.
+    Les objets sont ceux de la metadata, qui n'est pas modifiée.
+    """
+    declared = {}
+    for table in db.metadata.sorted_tables:
+        indexes = list(table.indexes)
+        indexes += [
+            constraint for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint) and constraint.name
+        ]
+        if indexes:
+            declared[table.name] = indexes
+    return declared
+
+
+def ensure_indexes(dry_run=False):
+    """
+    Crée les index déclarés absents de la base (tables existantes uniquement).
+    Retourne la liste des index créés (ou à créer si `dry_run`).
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table_name, indexes in declared_indexes().items():
+        if table_name not in existing_tables:
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+        existing |= {uq['name'] for uq in inspector.get_unique_constraints(table_name)}
+
+        for index in indexes:
+            if index.name in existing:
+                continue
+            created.append(f"{table_name}.{index.name}")
+            if not dry_run:
+                if isinstance(index, UniqueConstraint):
+                    # ALTER TABLE ... ADD CONSTRAINT ... UNIQUE (un index unique côté MySQL)
+                    with db.engine.begin() as connection:
+                        connection.execute(AddConstraint(index))
+                else:
+                    index.create(bind=db.engine)
+                print(f"🗂️ Index créé: {table_name}.{index.name} ({', '.join(c.name for c in index.columns)})")
+
+    return created
+
+
+def hot_queries():
+    """Requêtes représentatives des recherches exécutées à chaque chargement de page"""
+    return {
+        'votes_signalement': select(Vote).where(Vote.signalementID == 1, Vote.is_deleted == False),
+        'vote_citoyen': select(Vote).where(Vote.citoyenID == 1, Vote.signalementID == 1, Vote.is_deleted == False),
+        'signatures_petition': select(func.count()).select_from(Signature).where(
+            Signature.petitionID == 1, Signature.is_deleted == False
+        ),
+        'signature_citoyen': select(Signature).where(Signature.petitionID == 1, Signature.citoyenID == 1),
+        'suivre_check': select(Suivre).where(Suivre.suiveurID == 1, Suivre.suivisID == 2, Suivre.is_deleted == False),
+        'fcm_tokens_actifs': select(FCMToken).where(FCMToken.user_id == 1, FCMToken.is_active == True),
+        'notifications_page': select(NotificationHistory).where(
+            NotificationHistory.user_id == 1
+        ).order_by(NotificationHistory.created_at.desc()).limit(20),
+        'notifications_non_lues': select(func.count()).select_from(NotificationHistory).where(
+            NotificationHistory.user_id == 1, NotificationHistory.unread_clause()
+        ),
+        'signalements_statut': select(Signalement.IDsignalement).where(
+            Signalement.statut == 'en_cours', Signalement.is_deleted == False
+        ).order_by(Signalement.dateCreated.desc()).limit(20),
+        'signalements_citoyen': select(Signalement.IDsignalement).where(
+            Signalement.citoyenID == 1, Signalement.is_deleted == False
+        ),
+        'petitions_citoyen': select(Petition.IDpetition).where(Petition.citoyenID == 1, Petition.is_deleted == False),
+        'commentaires_signalement': select(CommentaireSignalement).where(
+            CommentaireSignalement.signalementID == 1, CommentaireSignalement.is_deleted == False
+        ),
+    }
+
+
+def explain(stmt):
+    """Plan d'exécution d'une requête (EXPLAIN MySQL, EXPLAIN QUERY PLAN SQLite)"""
+    dialect = db.engine.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+
+    result = db.session.execute(text(prefix + sql))
+    columns = list(result.keys())
+    plan = []
+    for row in result:
+        row = dict(zip(columns, row))
+        if dialect.name == 'sqlite':
+            plan.append(row.get('detail'))
+        else:
+            plan.append(
+                f"{row.get('table')}: type={row.get('type')} key={row.get('key')} rows={row.get('rows')} {row.get('Extra') or ''}".strip()
+            )
+    return plan
+
+
+def benchmark_hot_queries(repeat=20):
+    """Plan et durée moyenne (ms) de chaque requête chaude"""
+    report = {}
+    for name, stmt in hot_queries().items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            db.session.execute(stmt).all()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+        report[name] = {'plan': explain(stmt), 'avg_ms': round(elapsed_ms, 3)}
+    db.session.rollback()
+    return report
+
+
+# ========== COMMANDES CLI ==========
+
+schema_cli = AppGroup('schema', help="Index de la base de données")
+
+
+@schema_cli.command('ensure-indexes')
+@click.option('--dry-run', is_flag=True, help="Liste les index manquants sans les créer")
+def ensure_indexes_command(dry_run):
+    """Crée les index déclarés dans les modèles qui manquent en base"""
+    missing = ensure_indexes(dry_run=dry_run)
+    for name in missing:
+        click.echo(("À créer: " if dry_run else "Créé: ") + name)
+    click.echo(f"{len(missing)} index {'manquant(s)' if dry_run else 'créé(s)'}")
+
+
+@schema_cli.command('benchmark')
+@click.option('--repeat', default=20, show_default=True)
+def benchmark_command(repeat):
+    """Plans d'exécution et durées des requêtes chaudes (à lancer avant / après ensure-indexes)"""
+    for name, result in benchmark_hot_queries(repeat).items():
+        click.echo(f"{name}: {result['avg_ms']} ms")
+        for line in result['plan']:
+            click.echo(f"    {line}")
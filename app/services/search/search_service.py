@@ -0,0 +1,314 @@
+# app/services/search/search_service.py
+"""
+Recherche plein texte sur un index inversé en base (table search_terms).
+
+Chaque document est découpé par l'analyseur français (accents, mots vides,
+racinisation) ; l'index est mis à jour à chaque écriture. Une recherche ne lit
+que les entrées des termes demandés via l'index (entity_type, term, owner_id)
+et classe les documents par nombre de termes trouvés puis par score BM25.
+"""
+import math
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer
+
+from app import db, cache
+from app.models import NotificationHistory, Petition, SearchTerm, Signalement
+from app.utils.geo import KM_PER_DEGREE_LAT, bounding_box, haversine_km
+from app.utils.text_analyzer import analyze, weighted_terms
+
+BM25_K1 = 1.2
+SEARCH_MAX_TERMS = 12
+SEARCH_PER_PAGE_MAX = 100
+DOC_COUNT_TIMEOUT = 600  # Le nombre de documents (pour l'IDF) est mis en cache
+
+# Champs indexés par type de document et leur poids
+INDEXED_FIELDS = {
+    'signalement': lambda s: [(s.description, 1.0), (s.typeSignalement, 2.0), (s.cible, 1.0)],
+    'petition': lambda p: [(p.titre, 3.0), (p.description, 1.0), (p.destinataire, 1.0)],
+    'notification': lambda n: [(n.title, 3.0), (n.message, 1.0)],
+}
+
+
+def _replace_postings(entity_type, entity_id, fields, owner_id=None):
+    SearchTerm.query.filter_by(entity_type=entity_type, entity_id=entity_id).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(SearchTerm, [
+        {'entity_type': entity_type, 'entity_id': entity_id, 'owner_id': owner_id, 'term': term, 'weight': weight}
+        for term, weight in weighted_terms(fields).items()
+    ])
+
+
+def index_document(entity_type, entity_id, fields, owner_id=None):
+    """(Ré)indexe un document ; une erreur n'interrompt pas l'écriture d'origine"""
+    try:
+        _replace_postings(entity_type, entity_id, fields, owner_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Erreur indexation {entity_type} {entity_id}: {e}")
+
+
+def remove_document(entity_type, entity_id):
+    """Retire un document de l'index"""
+    try:
+        SearchTerm.query.filter_by(entity_type=entity_type, entity_id=entity_id).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Erreur désindexation {entity_type} {entity_id}: {e}")
+
+
+def index_signalement(signalement):
+    if signalement.is_deleted:
+        remove_document('signalement', signalement.IDsignalement)
+    else:
+        index_document('signalement', signalement.IDsignalement, INDEXED_FIELDS['signalement'](signalement))
+
+
+def index_petition(petition):
+    if petition.is_deleted:
+        remove_document('petition', petition.IDpetition)
+    else:
+        index_document('petition', petition.IDpetition, INDEXED_FIELDS['petition'](petition))
+
+
+def index_new_notifications(batch_size=1000):
+    """
+    Indexe les notifications insérées depuis la dernière passe (identifiant > dernier indexé).
+    Les envois groupés passent par bulk_insert_mappings : l'indexation est faite ici, hors requête.
+    Deux passes concurrentes ne dupliquent rien : la contrainte unique rejette le lot
+    déjà indexé par l'autre, et la passe reprend après le dernier identifiant indexé.
+    """
+    def last_indexed_id():
+        return db.session.query(func.max(SearchTerm.entity_id)).filter(
+            SearchTerm.entity_type == 'notification'
+        ).scalar() or 0
+
+    last_id = last_indexed_id()
+
+    total = 0
+    while True:
+        rows = NotificationHistory.query.filter(
+            NotificationHistory.id > last_id
+        ).order_by(NotificationHistory.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        SearchTerm.query.filter(
+            SearchTerm.entity_type == 'notification',
+            SearchTerm.entity_id.in_([n.id for n in rows])
+        ).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(SearchTerm, [
+            {'entity_type': 'notification', 'entity_id': n.id, 'owner_id': n.user_id, 'term': term, 'weight': weight}
+            for n in rows
+            for term, weight in weighted_terms(INDEXED_FIELDS['notification'](n)).items()
+        ])
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            indexed = last_indexed_id()
+            if indexed <= last_id:
+                raise  # Conflit qui ne vient pas d'une passe concurrente
+            last_id = indexed
+            continue
+        last_id = rows[-1].id
+        total += len(rows)
+
+    return total
+
+
+def _document_count(entity_type):
+    key = f"search_doc_count::{entity_type}"
+    count = cache.get(key)
+    if count is None:
+        count = db.session.query(func.count(func.distinct(SearchTerm.entity_id))).filter(
+            SearchTerm.entity_type == entity_type
+        ).scalar() or 0
+        cache.set(key, count, timeout=DOC_COUNT_TIMEOUT)
+    return count
+
+
+def search_ids(entity_type, query, owner_id=None, page=1, per_page=20):
+    """
+    Recherche classée. Retourne ([(entity_id, score)], total).
+    `owner_id` restreint aux documents d'un destinataire (notifications).
+    """
+    terms = list(dict.fromkeys(analyze(query or '')))[:SEARCH_MAX_TERMS]
+    if not terms:
+        return [], 0
+
+    page = max(1, page)
+    per_page = max(1, min(per_page, SEARCH_PER_PAGE_MAX))
+
+    filters = [SearchTerm.entity_type == entity_type, SearchTerm.term.in_(terms)]
+    if owner_id is not None:
+        filters.append(SearchTerm.owner_id == owner_id)
+
+    # Fréquence documentaire de chaque terme -> IDF
+    document_frequency = dict(
+        db.session.query(SearchTerm.term, func.count()).filter(*filters).group_by(SearchTerm.term).all()
+    )
+    if not document_frequency:
+        return [], 0
+
+    n_docs = max(_document_count(entity_type), max(document_frequency.values()))
+    idf = {
+        term: math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        for term, df in document_frequency.items()
+    }
+
+    # Saturation BM25 du poids du terme, pondérée par son IDF
+    saturated = SearchTerm.weight * (BM25_K1 + 1) / (SearchTerm.weight + BM25_K1)
+    score = func.sum(saturated * case(idf, value=SearchTerm.term, else_=0.0)).label('score')
+    matched = func.count().label('matched')
+
+    grouped = db.session.query(SearchTerm.entity_id, score, matched).filter(*filters).group_by(SearchTerm.entity_id)
+    rows = grouped.order_by(
+        matched.desc(), score.desc(), SearchTerm.entity_id.desc()
+    ).offset((page - 1) * per_page).limit(per_page).all()
+    total = db.session.query(func.count(func.distinct(SearchTerm.entity_id))).filter(*filters).scalar() or 0
+
+    return [(entity_id, float(row_score)) for entity_id, row_score, _ in rows], total
+
+
+def _load_ranked(model, pk, hits):
+    if not hits:
+        return []
+    by_id = {getattr(obj, pk): obj for obj in model.query.filter(getattr(model, pk).in_([i for i, _ in hits])).all()}
+    return [(by_id[i], score) for i, score in hits if i in by_id]
+
+
+def search_signalements(query, page=1, per_page=20):
+    """Signalements classés par pertinence : ([(signalement, score)], total)"""
+    hits, total = search_ids('signalement', query, page=page, per_page=per_page)
+    results = [(s, score) for s, score in _load_ranked(Signalement, 'IDsignalement', hits) if not s.is_deleted]
+    return results, total
+
+
+def search_petitions(query, page=1, per_page=20):
+    """Pétitions classées par pertinence : ([(petition, score)], total)"""
+    hits, total = search_ids('petition', query, page=page, per_page=per_page)
+    results = [(p, score) for p, score in _load_ranked(Petition, 'IDpetition', hits) if not p.is_deleted]
+    return results, total
+
+
+def search_notifications(user_id, query, page=1, per_page=20):
+    """Notifications d'un utilisateur classées par pertinence : ([(notification, score)], total)"""
+    hits, total = search_ids('notification', query, owner_id=user_id, page=page, per_page=per_page)
+    return _load_ranked(NotificationHistory, 'id', hits), total
+
+
+def search_signalements_near(query, latitude, longitude, radius_km=10, page=1, per_page=20):
+    """
+    Recherche texte + rayon en une seule requête SQL, triée par distance.
+
+    Les termes de la requête sont regroupés par document dans l'index inversé
+    (tous les termes connus de l'index doivent être présents), puis joints aux
+    signalements filtrés par boîte englobante (index lat/lng). La distance
+    équirectangulaire, sans trigonométrie côté SQL, sert au filtre de rayon et
+    au tri ; seuls les `per_page` plus proches sont chargés, avec leur
+    distance haversine exacte.
+    Retourne ([(signalement, distance_km)], total).
+    """
+    terms = list(dict.fromkeys(analyze(query or '')))[:SEARCH_MAX_TERMS]
+    if not terms:
+        return [], 0
+
+    page = max(1, page)
+    per_page = max(1, min(per_page, SEARCH_PER_PAGE_MAX))
+
+    known_terms = db.session.query(func.count(func.distinct(SearchTerm.term))).filter(
+        SearchTerm.entity_type == 'signalement', SearchTerm.term.in_(terms)
+    ).scalar() or 0
+    if not known_terms:
+        return [], 0
+
+    matches = db.session.query(SearchTerm.entity_id.label('entity_id')).filter(
+        SearchTerm.entity_type == 'signalement', SearchTerm.term.in_(terms)
+    ).group_by(SearchTerm.entity_id).having(func.count() >= known_terms).subquery()
+
+    min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius_km)
+    km_per_degree_lng = KM_PER_DEGREE_LAT * math.cos(math.radians(latitude))
+    dy = (Signalement.latitude - latitude) * KM_PER_DEGREE_LAT
+    dx = (Signalement.longitude - longitude) * km_per_degree_lng
+    distance_sq = (dy * dy + dx * dx).label('distance_sq')
+
+    candidates = db.session.query(Signalement).join(
+        matches, matches.c.entity_id == Signalement.IDsignalement
+    ).filter(
+        Signalement.has_location == True,
+        Signalement.is_deleted == False,
+        Signalement.latitude.between(min_lat, max_lat),
+        Signalement.longitude.between(min_lng, max_lng),
+        distance_sq <= radius_km * radius_km
+    )
+
+    total = candidates.order_by(None).count()
+    rows = candidates.options(defer(Signalement.elements)).order_by(
+        distance_sq, Signalement.IDsignalement.desc()
+    ).offset((page - 1) * per_page).limit(per_page).all()
+
+    return [
+        (s, haversine_km(latitude, longitude, float(s.latitude), float(s.longitude)))
+        for s in rows
+    ], total
+
+
+def rebuild_search_index(entity_type=None, batch_size=500):
+    """Reconstruit l'index (un type ou tous) à partir des tables sources"""
+    sources = {
+        'signalement': (Signalement, 'IDsignalement', Signalement.is_deleted == False),
+        'petition': (Petition, 'IDpetition', Petition.is_deleted == False),
+    }
+    counts = {}
+
+    for name, (model, pk, condition) in sources.items():
+        if entity_type and entity_type != name:
+            continue
+        SearchTerm.query.filter_by(entity_type=name).delete(synchronize_session=False)
+        db.session.commit()
+
+        pk_column = getattr(model, pk)
+        last_id, total = 0, 0
+        while True:
+            rows = model.query.filter(condition, pk_column > last_id).order_by(pk_column).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                _replace_postings(name, getattr(row, pk), INDEXED_FIELDS[name](row))
+            db.session.commit()
+            last_id = getattr(rows[-1], pk)
+            total += len(rows)
+        counts[name] = total
+
+    if not entity_type or entity_type == 'notification':
+        SearchTerm.query.filter_by(entity_type='notification').delete(synchronize_session=False)
+        db.session.commit()
+        counts['notification'] = index_new_notifications()
+
+    for name in counts:
+        cache.delete(f"search_doc_count::{name}")
+    return counts
+
+
+# ========== COMMANDES CLI ==========
+
+search_cli = AppGroup('search', help="Index de recherche plein texte")
+
+
+@search_cli.command('reindex')
+@click.option('--type', 'entity_type', type=click.Choice(['signalement', 'petition', 'notification']), default=None)
+def reindex_command(entity_type):
+    """Reconstruit l'index de recherche"""
+    for name, total in rebuild_search_index(entity_type).items():
+        click.echo(f"{name}: {total} document(s) indexé(s)")
+
+
+@search_cli.command('index-notifications')
+def index_notifications_command():
+    """Indexe les notifications récentes non encore indexées"""
+    click.echo(f"{index_new_notifications()} notification(s) indexée(s)")
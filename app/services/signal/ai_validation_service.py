@@ -0,0 +1,449 @@
+import base64
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utils.media_buffer import MediaBuffer
+
+logger = logging.getLogger(__name__)
+
+AI_SERVICE_URL = os.getenv('AI_SERVICE_URL', 'http://localhost:5001')
+# La priorité est servie par le même processus que les features (registre de modèles partagé) ;
+# un service de priorité séparé (ancien déploiement sur :5002) doit être indiqué ici
+PRIORITY_SERVICE_URL = os.getenv('PRIORITY_SERVICE_URL', AI_SERVICE_URL)
+
+# Budget global (secondes) pour toute la chaîne IA d'un signalement
+AI_LATENCY_BUDGET = float(os.getenv('AI_LATENCY_BUDGET', 25))
+AI_MAX_WORKERS = int(os.getenv('AI_MAX_WORKERS', 8))
+
+# Timeouts unitaires, bornés par le budget restant
+TEXT_TIMEOUT = 15
+IMAGE_TIMEOUT = 30
+VIDEO_TIMEOUT = 120
+VALIDATE_TIMEOUT = 15
+CATEGORIZE_TIMEOUT = 15
+PRIORITY_TIMEOUT = 15
+# Timeout minimal d'un appel : requests refuse un timeout nul
+MIN_CALL_TIMEOUT = 0.1
+
+KEYWORD_CATEGORIES = {
+    'Voirie & Transports': ['route', 'trou', 'circulation', 'transport', 'feu', 'signalisation', 'nid', 'poule'],
+    'Propreté': ['déchet', 'ordure', 'sale', 'poubelle', 'nettoyer', 'caniveau'],
+    'Sécurité': ['danger', 'sécurité', 'vol', 'éclairage', 'lampadaire', 'agression'],
+    'Espaces Verts': ['arbre', 'parc', 'jardin', 'vert', 'fleur', 'herbe'],
+    'Environnement': ['pollution', 'bruit', 'eau', 'air', 'environnement', 'nuisance'],
+    'Services Publics': ['administration', 'mairie', 'service', 'public'],
+    'Animalier': ['animal', 'chien', 'chat', 'errant', 'abandon'],
+    'Urbanisme': ['construction', 'bâtiment', 'permis', 'urbanisme'],
+    'Social & Solidarité': ['aide', 'social', 'solidarité', 'pauvreté']
+}
+
+MEDIA_SEARCH_DIRS = ['', 'uploads', 'temp', 'media', os.path.join('static', 'uploads'), '../uploads']
+
+
+def _build_session():
+    """Session HTTP avec pool de connexions réutilisées vers les services IA"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=AI_MAX_WORKERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_session = _build_session()
+_executor = ThreadPoolExecutor(max_workers=AI_MAX_WORKERS, thread_name_prefix='ai-validation')
+
+
+class AIDeadline:
+    """Budget de latence partagé par tous les appels IA d'une requête"""
+
+    def __init__(self, budget=AI_LATENCY_BUDGET):
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, default):
+        """Timeout d'un appel, borné par le budget restant (jamais nul)"""
+        return max(MIN_CALL_TIMEOUT, min(default, self.remaining()))
+
+
+def encode_media_base64(media):
+    """Encode une seule fois les données binaires d'un média en base64 (réutilisé par tous les appels)"""
+    if '_base64' not in media:
+        file_data = media.get('data')
+        if isinstance(file_data, MediaBuffer):
+            media['_base64'] = file_data.to_base64() if file_data.size else None
+        else:
+            if isinstance(file_data, str):
+                file_data = file_data.encode()
+            media['_base64'] = base64.b64encode(file_data).decode('utf-8') if file_data else None
+    return media['_base64']
+
+
+def release_media_payloads(media_list):
+    """Libère les encodages base64 une fois les appels IA terminés"""
+    for media in media_list or []:
+        media.pop('_base64', None)
+
+
+def _load_media_payload(media, media_result):
+    """Prépare la charge utile base64 d'un média, depuis la mémoire ou un fichier local"""
+    mime_type = media.get('mimetype', 'application/octet-stream')
+
+    if 'data' in media and media['data']:
+        media_base64 = encode_media_base64(media)
+        media_result['method'] = 'base64_from_memory'
+        return {'base64': f"data:{mime_type};base64,{media_base64}"}
+
+    if 'filename' in media:
+        filename = media['filename']
+        possible_paths = [os.path.join(d, filename) if d else filename for d in MEDIA_SEARCH_DIRS]
+
+        for path in possible_paths:
+            if os.path.exists(path):
+                try:
+                    with open(path, 'rb') as f:
+                        file_data = f.read()
+                    media_base64 = base64.b64encode(file_data).decode('utf-8')
+                    print(f"📁 Fichier trouvé: {path} ({len(file_data)} bytes)")
+                    media_result['method'] = 'file_found'
+                    media_result['found_path'] = path
+                    return {'base64': f"data:{mime_type};base64,{media_base64}"}
+                except Exception as read_error:
+                    print(f"⚠️ Erreur lecture {path}: {read_error}")
+                    continue
+
+        print(f"❌ Fichier non trouvé: {filename}")
+        media_result.update({
+            'success': False,
+            'error': f'Fichier non trouvé: {filename}',
+            'searched_paths': possible_paths
+        })
+        return None
+
+    media_result.update({'success': False, 'error': 'Aucune source de données'})
+    return None
+
+
+def _process_text(description, deadline):
+    """Extraction des features textuelles"""
+    if deadline.expired():
+        return None, {'success': False, 'error': 'Budget de latence IA dépassé'}
+
+    try:
+        response = _session.post(
+            f'{AI_SERVICE_URL}/process_text',
+            json={'text': description},
+            timeout=deadline.timeout(TEXT_TIMEOUT)
+        )
+        if response.status_code == 200:
+            text_result = response.json()
+            text_features = text_result.get('features')
+            print(f"✅ Analyse textuelle réussie: {len(text_features) if text_features else 0} features")
+            return text_features, {
+                'success': True,
+                'features_count': len(text_features) if text_features else 0,
+                'text_length': text_result.get('text_length', 0)
+            }
+
+        print(f"⚠️ Erreur analyse textuelle: {response.status_code}")
+        return None, {'success': False, 'error': f"HTTP {response.status_code}"}
+
+    except (requests.exceptions.RequestException, ValueError) as text_error:
+        print(f"⚠️ Service IA texte indisponible: {text_error}")
+        return None, {'success': False, 'error': str(text_error)}
+
+
+def _process_media(i, media, deadline):
+    """Extraction des features d'un média (image ou vidéo)"""
+    media_result = {'index': i, 'filename': media.get('filename', f'media_{i}')}
+
+    try:
+        mimetype = media.get('mimetype') or ''
+        if mimetype.startswith('image'):
+            endpoint, timeout = '/process_image', IMAGE_TIMEOUT
+        elif mimetype.startswith('video'):
+            endpoint, timeout = '/process_video', VIDEO_TIMEOUT
+        else:
+            media_result.update({'success': False, 'error': 'Type de média non supporté'})
+            return None, media_result
+
+        media_payload = _load_media_payload(media, media_result)
+        if media_payload is None:
+            return None, media_result
+
+        if deadline.expired():
+            media_result.update({'success': False, 'error': 'Budget de latence IA dépassé'})
+            return None, media_result
+
+        print(f"🤖 Appel IA: {endpoint} pour {media_result['filename']}")
+        response = _session.post(
+            f'{AI_SERVICE_URL}{endpoint}',
+            json=media_payload,
+            timeout=deadline.timeout(timeout),
+            headers={'Content-Type': 'application/json'}
+        )
+
+        if response.status_code == 200:
+            media_data = response.json()
+            if 'features' in media_data:
+                media_result.update({
+                    'success': True,
+                    'features_count': len(media_data['features']),
+                    'processing_info': {
+                        'status': media_data.get('status'),
+                        'image_size': media_data.get('image_size'),
+                        'video_info': media_data.get('video_info')
+                    }
+                })
+                print(f"✅ Média {i+1} traité avec succès: {len(media_data['features'])} features")
+                return media_data['features'], media_result
+
+            media_result.update({'success': False, 'error': 'Pas de features retournées'})
+            print(f"⚠️ Média {i+1}: pas de features dans la réponse")
+            return None, media_result
+
+        error_msg = f"HTTP {response.status_code}"
+        try:
+            error_msg += f": {response.json().get('error', 'Erreur inconnue')}"
+        except Exception:
+            try:
+                error_msg += f": {response.text[:200]}"
+            except Exception:
+                pass
+
+        media_result.update({'success': False, 'error': error_msg})
+        print(f"❌ Erreur IA média {i+1}: {error_msg}")
+
+    except requests.exceptions.Timeout:
+        media_result.update({'success': False, 'error': 'Timeout - traitement trop long'})
+        print(f"⏱️ Timeout média {i+1}")
+
+    except requests.exceptions.RequestException as media_error:
+        media_result.update({'success': False, 'error': f'Erreur réseau: {str(media_error)}'})
+        print(f"🌐 Erreur réseau média {i+1}: {media_error}")
+
+    except Exception as unexpected_error:
+        media_result.update({'success': False, 'error': f'Erreur inattendue: {str(unexpected_error)}'})
+        print(f"💥 Erreur inattendue média {i+1}: {unexpected_error}")
+
+    return None, media_result
+
+
+def _validate_coherence(text_features, media_features, mode, deadline):
+    """Vérifie la cohérence entre texte et médias"""
+    try:
+        response = _session.post(
+            f'{AI_SERVICE_URL}/validate',
+            json={
+                'text_features': text_features,
+                'media_features': media_features,
+                'mode': mode
+            },
+            timeout=deadline.timeout(VALIDATE_TIMEOUT)
+        )
+        if response.status_code == 200:
+            validation_data = response.json()
+            is_valid = validation_data.get('is_valid', True)
+            print(f"🔍 Validation cohérence: {'✅ Valide' if is_valid else '❌ Non valide'}")
+            return is_valid, {
+                'success': True,
+                'is_valid': is_valid,
+                'similarity_score': validation_data.get('similarity_score'),
+                'confidence': validation_data.get('confidence'),
+                'threshold_used': validation_data.get('threshold_used')
+            }
+
+        return True, {'success': False, 'error': f"HTTP {response.status_code}"}
+
+    except Exception as validation_error:
+        print(f"⚠️ Erreur validation cohérence: {validation_error}")
+        return True, {'success': False, 'error': str(validation_error)}
+
+
+def _categorize(features, description, deadline):
+    """Catégorisation du signalement à partir des features combinées"""
+    try:
+        response = _session.post(
+            f'{AI_SERVICE_URL}/categorize',
+            json={'features': features, 'text': description},
+            timeout=deadline.timeout(CATEGORIZE_TIMEOUT)
+        )
+        if response.status_code == 200:
+            categorize_data = response.json()
+            category = categorize_data.get('category', 'Autres')
+            print(f"🎯 Catégorie IA: {category}")
+            return category, {
+                'success': True,
+                'predicted_category': category,
+                'confidence': categorize_data.get('confidence'),
+                'all_scores': categorize_data.get('all_scores'),
+                'feature_magnitude': categorize_data.get('feature_magnitude')
+            }
+
+        return None, {'success': False, 'error': f"HTTP {response.status_code}"}
+
+    except Exception as categorize_error:
+        print(f"⚠️ Erreur catégorisation: {categorize_error}")
+        return None, {'success': False, 'error': str(categorize_error)}
+
+
+def categorize_by_keywords(description):
+    """Catégorisation de repli par mots-clés"""
+    description_lower = description.lower()
+
+    for category, keywords in KEYWORD_CATEGORIES.items():
+        if any(keyword in description_lower for keyword in keywords):
+            print(f"🔍 Catégorie détectée par mots-clés: {category}")
+            return category, {
+                'used': True,
+                'method': 'keyword_matching',
+                'category': category,
+                'matched_keywords': [kw for kw in keywords if kw in description_lower]
+            }
+
+    return 'Autres', {'used': True, 'method': 'default', 'category': 'Autres'}
+
+
+def run_ai_validation(description, media_list, mode='normal', deadline=None):
+    """
+    Validation IA d'un signalement : extraction des features texte et médias en
+    parallèle, contrôle de cohérence puis catégorisation, dans un budget de
+    latence global. Au-delà du budget, repli sur la catégorisation par mots-clés.
+
+    Retourne un dict {type_signalement, is_valid, results, deadline}.
+    """
+    deadline = deadline or AIDeadline()
+    ai_validation_results = {'media_processing': []}
+    type_signalement = None
+    is_valid = True
+
+    try:
+        print("🤖 Validation IA en cours...")
+
+        # Extraction concurrente texte + médias
+        text_future = _executor.submit(_process_text, description, deadline)
+        media_futures = [
+            _executor.submit(_process_media, i, media, deadline)
+            for i, media in enumerate(media_list or [])
+        ]
+
+        done, pending = wait([text_future, *media_futures], timeout=deadline.remaining())
+        # Les appels encore en file sont abandonnés : ils ne doivent pas occuper le pool partagé
+        # (ceux déjà lancés sont bornés par le budget restant)
+        for future in pending:
+            future.cancel()
+
+        if text_future in done:
+            text_features, ai_validation_results['text_processing'] = text_future.result()
+        else:
+            text_features = None
+            ai_validation_results['text_processing'] = {'success': False, 'error': 'Budget de latence IA dépassé'}
+
+        media_features_list = []
+        for i, future in enumerate(media_futures):
+            if future in done:
+                features, media_result = future.result()
+                if features:
+                    media_features_list.append(features)
+            else:
+                media_result = {
+                    'index': i,
+                    'filename': media_list[i].get('filename', f'media_{i}'),
+                    'success': False,
+                    'error': 'Budget de latence IA dépassé'
+                }
+            ai_validation_results['media_processing'].append(media_result)
+
+        if text_features and media_features_list and not deadline.expired():
+            media_features = np.mean(media_features_list, axis=0).tolist()
+            is_valid, ai_validation_results['coherence_check'] = _validate_coherence(
+                text_features, media_features, mode, deadline
+            )
+
+        if text_features and (not media_features_list or is_valid) and not deadline.expired():
+            if media_features_list:
+                combined_features = text_features + np.mean(media_features_list, axis=0).tolist()
+            else:
+                combined_features = text_features
+            type_signalement, ai_validation_results['categorization'] = _categorize(
+                combined_features, description, deadline
+            )
+
+        if deadline.expired():
+            ai_validation_results['budget_exceeded'] = True
+            print("⏱️ Budget de latence IA dépassé - repli mots-clés")
+
+        if not type_signalement:
+            type_signalement, ai_validation_results['fallback_categorization'] = categorize_by_keywords(description)
+
+    except Exception as ai_error:
+        print(f"⚠️ Service IA complètement indisponible: {ai_error}")
+        type_signalement = "Autres"
+        ai_validation_results = {
+            'service_available': False,
+            'error': str(ai_error),
+            'fallback_mode': True
+        }
+
+    return {
+        'type_signalement': type_signalement,
+        'is_valid': is_valid,
+        'results': ai_validation_results,
+        'deadline': deadline
+    }
+
+
+def calculate_priority(type_signalement, description, media_list, deadline=None, default='Moyenne'):
+    """Calcule la priorité via le service dédié, `default` si indisponible ou budget dépassé"""
+    deadline = deadline or AIDeadline()
+    if deadline.expired():
+        print("⏱️ Budget de latence IA dépassé - priorité par défaut")
+        return default
+
+    priority_data = {
+        'type_signalement': type_signalement,
+        'description': description,
+        'media_list': []
+    }
+
+    for media in media_list or []:
+        if 'data' in media and isinstance(media['data'], (bytes, MediaBuffer)):
+            priority_data['media_list'].append({
+                'filename': media.get('filename'),
+                'mimetype': media.get('mimetype'),
+                'data': encode_media_base64(media),
+                'size': media.get('size')
+            })
+        else:
+            priority_data['media_list'].append({k: v for k, v in media.items() if k != '_base64'})
+
+    try:
+        response = _session.post(
+            f'{PRIORITY_SERVICE_URL}/calculate_priority',
+            json=priority_data,
+            timeout=deadline.timeout(PRIORITY_TIMEOUT)
+        )
+        if response.status_code == 200:
+            return response.json().get('priority', default)
+        if response.status_code == 404:
+            # Service sans la capacité 'priority' (MODEL_CAPABILITIES) ou PRIORITY_SERVICE_URL à renseigner
+            logger.warning(
+                f"⚠️ /calculate_priority introuvable sur {PRIORITY_SERVICE_URL} : "
+                f"vérifier PRIORITY_SERVICE_URL et MODEL_CAPABILITIES (priorité par défaut appliquée)"
+            )
+        else:
+            print(f"⚠️ Erreur service priorité: {response.status_code}")
+    except (requests.exceptions.RequestException, ValueError) as priority_error:
+        print(f"⚠️ Service priorité indisponible: {priority_error}")
+
+    return default
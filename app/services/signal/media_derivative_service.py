@@ -0,0 +1,234 @@
+# app/services/signal/media_derivative_service.py
+"""
+Dérivés des médias générés par le worker après l'upload.
+
+Images : WebP 'thumbnail' (carré recadré), 'preview' et 'display' (sans agrandissement).
+Vidéos : image extraite par ffmpeg, enregistrée en WebP 'poster', 'thumbnail' et 'preview'.
+Les dérivés sont stockés à côté de l'original ({chemin}__{nom}.webp) et décrits dans
+les éléments du signalement ; pour un contenu dédupliqué ils sont mémorisés dans
+media_objects et réutilisés sans nouveau rendu.
+"""
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, Optional
+
+from app import db
+from app.models import MediaObject, Signalement
+
+# Import conditionnel de Pillow
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    print("⚠️ Pillow non installé - pip install Pillow (dérivés des médias désactivés)")
+    PIL_AVAILABLE = False
+
+# nom -> (largeur, hauteur, recadrage)
+IMAGE_DERIVATIVES = {
+    'thumbnail': (150, 150, True),
+    'preview': (400, 400, False),
+    'display': (1080, 1080, False),
+}
+VIDEO_DERIVATIVES = {
+    'poster': (1080, 1080, False),
+    'thumbnail': (150, 150, True),
+    'preview': (400, 400, False),
+}
+DERIVATIVE_NAMES = sorted(set(IMAGE_DERIVATIVES) | set(VIDEO_DERIVATIVES))
+# Champ d'URL de l'élément alimenté par chaque dérivé
+DERIVATIVE_URL_FIELDS = {
+    'thumbnail': 'thumbnail_url',
+    'preview': 'preview_url',
+    'display': 'display_url',
+    'poster': 'poster_url',
+}
+
+WEBP_QUALITY = int(os.getenv('MEDIA_DERIVATIVE_QUALITY', 80))
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+VIDEO_POSTER_OFFSET = float(os.getenv('VIDEO_POSTER_OFFSET', 1.0))
+
+
+class DerivativeError(Exception):
+    """Le média source ne peut pas être converti"""
+
+
+def derivative_path(storage_path: str, name: str) -> str:
+    """Chemin d'un dérivé, à côté de l'original : users/1/images/photo.jpg -> users/1/images/photo.jpg__thumbnail.webp"""
+    return f"{storage_path}__{name}.webp"
+
+
+def render_image_derivatives(data: bytes, sizes: Dict[str, tuple] = None) -> Dict[str, Dict]:
+    """Rend chaque taille en WebP : {nom: {'data', 'width', 'height'}}"""
+    if not PIL_AVAILABLE:
+        raise DerivativeError("Pillow non disponible")
+    sizes = sizes or IMAGE_DERIVATIVES
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    except Exception as e:
+        raise DerivativeError(f"Image illisible: {e}")
+
+    rendered = {}
+    for name, (width, height, crop) in sizes.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), method=Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.LANCZOS)  # Jamais agrandie
+        buffer = io.BytesIO()
+        resized.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+        rendered[name] = {'data': buffer.getvalue(), 'width': resized.width, 'height': resized.height}
+    return rendered
+
+
+def extract_video_frame(data: bytes) -> bytes:
+    """Image PNG de la vidéo à VIDEO_POSTER_OFFSET secondes (première image si la vidéo est plus courte)"""
+    binary = shutil.which(FFMPEG_BINARY)
+    if not binary:
+        raise DerivativeError("ffmpeg non disponible")
+
+    with tempfile.NamedTemporaryFile(prefix='video_', delete=False) as source:
+        source.write(data)
+    try:
+        for offset in (VIDEO_POSTER_OFFSET, 0):
+            result = subprocess.run(
+                [binary, '-v', 'error', '-ss', str(offset), '-i', source.name,
+                 '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-'],
+                capture_output=True, timeout=60
+            )
+            if result.returncode == 0 and result.stdout:
+                return result.stdout
+        raise DerivativeError(f"Extraction d'image impossible: {result.stderr.decode(errors='ignore')[:200]}")
+    finally:
+        os.unlink(source.name)
+
+
+def _known_derivatives(storage_path: str) -> Optional[Dict]:
+    """Dérivés déjà produits pour cet objet (contenu dédupliqué, republication)"""
+    stored = db.session.query(MediaObject.derivatives).filter(MediaObject.storage_path == storage_path).scalar()
+    return json.loads(stored) if stored else None
+
+
+def build_derivatives(media_service, element: Dict) -> Optional[Dict]:
+    """
+    Produit et stocke les dérivés d'un élément image / vidéo.
+    Retourne {nom: {'storage_path', 'url', 'width', 'height', 'size'}} ou None si non applicable.
+    """
+    storage_path = element.get('storage_path')
+    category = element.get('category')
+    if not storage_path or category not in ('images', 'videos'):
+        return None
+
+    known = _known_derivatives(storage_path)
+    if known:
+        return known
+    if not PIL_AVAILABLE:
+        raise DerivativeError("Pillow non disponible")
+    if category == 'videos' and not shutil.which(FFMPEG_BINARY):
+        raise DerivativeError("ffmpeg non disponible")
+
+    bucket = media_service.supabase.storage.from_(media_service.bucket_name)
+    original = bucket.download(storage_path)
+
+    if category == 'videos':
+        rendered = render_image_derivatives(extract_video_frame(original), VIDEO_DERIVATIVES)
+    else:
+        rendered = render_image_derivatives(original, IMAGE_DERIVATIVES)
+
+    derivatives = {}
+    for name, image in rendered.items():
+        path = derivative_path(storage_path, name)
+        bucket.upload(path=path, file=image['data'], file_options={
+            "content-type": "image/webp",
+            "cache-control": "31536000",
+            "upsert": "true"
+        })
+        derivatives[name] = {
+            'storage_path': path,
+            'url': bucket.get_public_url(path),
+            'width': image['width'],
+            'height': image['height'],
+            'size': len(image['data'])
+        }
+
+    MediaObject.query.filter(MediaObject.storage_path == storage_path).update(
+        {'derivatives': json.dumps(derivatives)}, synchronize_session=False
+    )
+    return derivatives
+
+
+def apply_derivatives(element: Dict, derivatives: Dict) -> Dict:
+    """Enregistre les dérivés dans l'élément et pointe ses URLs d'affichage vers eux"""
+    element['derivatives'] = derivatives
+    for name, derivative in derivatives.items():
+        field = DERIVATIVE_URL_FIELDS.get(name)
+        if field:
+            element[field] = derivative['url']
+    return element
+
+
+def generate_signalement_derivatives(signalement_id: int, media_service=None) -> int:
+    """
+    Génère les dérivés manquants des médias d'un signalement.
+    Les éléments sont relus verrouillés avant l'écriture : une mise à jour
+    concurrente des médias n'est pas écrasée. Les dérivés produits sont enregistrés
+    même si un autre média échoue ; l'erreur est ensuite relevée pour que la tâche
+    soit retentée (les médias déjà traités sont alors ignorés).
+    Retourne le nombre d'éléments enrichis.
+    """
+    from app.services.signal.signalement_service import invalidate_signalement_cache
+
+    signalement = Signalement.query.get(signalement_id)
+    if not signalement or signalement.is_deleted:
+        return 0
+    media_service = media_service or signalement._get_media_service()
+    if media_service is None:
+        raise DerivativeError("Service média non disponible")
+
+    produced = {}
+    failures = []
+    for element in signalement.get_elements():
+        storage_path = element.get('storage_path')
+        if element.get('derivatives') or storage_path in produced:
+            continue
+        try:
+            derivatives = build_derivatives(media_service, element)
+        except DerivativeError as e:
+            # Média non convertible (format, outil absent) : inutile de réessayer
+            print(f"⚠️ Dérivés ignorés pour {storage_path}: {e}")
+            continue
+        except Exception as e:
+            print(f"❌ Dérivés de {storage_path}: {e}")
+            failures.append(storage_path)
+            continue
+        if derivatives:
+            produced[storage_path] = derivatives
+
+    if not produced:
+        db.session.commit()
+        if failures:
+            raise RuntimeError(f"Dérivés non générés: {', '.join(failures)}")
+        return 0
+
+    signalement = Signalement.query.filter_by(IDsignalement=signalement_id).with_for_update().populate_existing().first()
+    elements = signalement.get_elements()
+    enriched = 0
+    for element in elements:
+        derivatives = produced.get(element.get('storage_path'))
+        if derivatives and not element.get('derivatives'):
+            apply_derivatives(element, derivatives)
+            enriched += 1
+    signalement.set_elements(elements)
+    db.session.commit()
+    invalidate_signalement_cache(signalement)
+
+    print(f"🖼️ Dérivés générés pour le signalement {signalement_id}: {enriched} média(s)")
+    if failures:
+        raise RuntimeError(f"Dérivés non générés: {', '.join(failures)}")
+    return enriched
@@ -0,0 +1,190 @@
+# app/services/signal/media_store_service.py
+"""
+Index des médias par contenu (table media_objects).
+
+Un upload dont le SHA-256 est déjà indexé réutilise l'objet existant : seule sa
+référence est comptée. Les compteurs sont modifiés par des UPDATE atomiques dans
+une transaction propre (indépendante de la session de l'appelant) : l'objet du
+bucket n'est supprimé que par la libération qui fait passer le compteur à zéro.
+"""
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional, Union
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import MediaObject, Signalement
+from app.utils.media_buffer import MediaBuffer
+
+_media_objects = MediaObject.__table__
+
+
+def content_sha256(file_data: Union[bytes, MediaBuffer]) -> str:
+    """Empreinte SHA-256 du contenu (calculée pendant la lecture pour un MediaBuffer)"""
+    if isinstance(file_data, MediaBuffer):
+        if file_data.sha256:
+            return file_data.sha256
+        digest = hashlib.sha256()
+        for chunk in file_data.iter_chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+    return hashlib.sha256(file_data).hexdigest()
+
+
+def acquire_media(sha256: str, bucket: str) -> Optional[str]:
+    """Prend une référence sur le contenu s'il est déjà stocké ; retourne son storage_path (None sinon)"""
+    with db.engine.begin() as conn:
+        condition = (_media_objects.c.sha256 == sha256) & (_media_objects.c.bucket == bucket)
+        updated = conn.execute(
+            _media_objects.update().where(condition).values(
+                ref_count=_media_objects.c.ref_count + 1,
+                updated_at=datetime.utcnow()
+            )
+        ).rowcount
+        if not updated:
+            return None
+        return conn.execute(select(_media_objects.c.storage_path).where(condition)).scalar()
+
+
+def register_media(sha256: str, storage_path: str, bucket: str, mimetype: str = None, size: int = None) -> str:
+    """
+    Indexe un objet qui vient d'être uploadé (une référence).
+    Si le même contenu a été indexé entre-temps par un upload concurrent, une
+    référence est prise sur ce dernier et son storage_path est retourné :
+    l'appelant supprime alors son propre objet.
+    """
+    now = datetime.utcnow()
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(_media_objects.insert().values(
+                sha256=sha256, storage_path=storage_path, bucket=bucket, mimetype=mimetype,
+                size=size, ref_count=1, created_at=now, updated_at=now
+            ))
+        return storage_path
+    except IntegrityError:
+        existing = acquire_media(sha256, bucket)
+        if existing is None:
+            raise
+        return existing
+
+
+def retain_media(storage_paths: Iterable[str]) -> int:
+    """Ajoute une référence aux objets indexés (média réutilisé par un autre signalement)"""
+    counts = Counter(path for path in storage_paths if path)
+    retained = 0
+    with db.engine.begin() as conn:
+        for storage_path, n in counts.items():
+            retained += conn.execute(
+                _media_objects.update().where(_media_objects.c.storage_path == storage_path).values(
+                    ref_count=_media_objects.c.ref_count + n,
+                    updated_at=datetime.utcnow()
+                )
+            ).rowcount
+    return retained
+
+
+def release_media(storage_path: str) -> bool:
+    """
+    Libère une référence. Retourne True si l'objet doit être supprimé du bucket :
+    dernière référence libérée, ou objet absent de l'index (upload antérieur).
+    """
+    with db.engine.begin() as conn:
+        updated = conn.execute(
+            _media_objects.update().where(_media_objects.c.storage_path == storage_path).values(
+                ref_count=_media_objects.c.ref_count - 1,
+                updated_at=datetime.utcnow()
+            )
+        ).rowcount
+        if not updated:
+            return True
+        return bool(conn.execute(
+            _media_objects.delete().where(
+                _media_objects.c.storage_path == storage_path,
+                _media_objects.c.ref_count <= 0
+            )
+        ).rowcount)
+
+
+def rebuild_media_refcounts(bucket: str, batch_size: int = 500):
+    """
+    Recalcule ref_count depuis les éléments des signalements non supprimés.
+    Les objets référencés mais absents de l'index (uploads antérieurs) sont
+    ajoutés sans empreinte ; les lignes qui ne sont plus référencées passent à zéro.
+    Retourne {'indexed': n, 'updated': n}.
+    """
+    references = Counter()
+    last_id = 0
+    while True:
+        rows = db.session.query(Signalement.IDsignalement, Signalement.elements).filter(
+            Signalement.IDsignalement > last_id,
+            Signalement.is_deleted == False
+        ).order_by(Signalement.IDsignalement).limit(batch_size).all()
+        if not rows:
+            break
+        for signalement_id, elements in rows:
+            last_id = signalement_id
+            try:
+                elements = json.loads(elements) if elements else []
+            except (TypeError, ValueError):
+                continue
+            references.update(
+                element['storage_path'] for element in elements
+                if isinstance(element, dict) and element.get('storage_path')
+            )
+
+    now = datetime.utcnow()
+    result = {'indexed': 0, 'updated': 0}
+    with db.engine.begin() as conn:
+        current = dict(conn.execute(select(_media_objects.c.storage_path, _media_objects.c.ref_count)).all())
+        for storage_path in set(current) | set(references):
+            expected = references.get(storage_path, 0)
+            if storage_path not in current:
+                conn.execute(_media_objects.insert().values(
+                    sha256=None, storage_path=storage_path, bucket=bucket,
+                    ref_count=expected, created_at=now, updated_at=now
+                ))
+                result['indexed'] += 1
+            elif current[storage_path] != expected:
+                conn.execute(_media_objects.update().where(_media_objects.c.storage_path == storage_path).values(
+                    ref_count=expected, updated_at=now
+                ))
+                result['updated'] += 1
+    return result
+
+
+# ========== COMMANDES CLI ==========
+
+media_cli = AppGroup('media', help="Index des médias par contenu")
+
+
+@media_cli.command('rebuild-refcounts')
+@click.option('--bucket', default=None, help="Bucket des objets antérieurs (SUPABASE_BUCKET_NAME par défaut)")
+@click.option('--batch-size', default=500, show_default=True)
+def rebuild_refcounts_command(bucket, batch_size):
+    """Recalcule les références des médias depuis les signalements"""
+    from flask import current_app
+
+    result = rebuild_media_refcounts(bucket or current_app.config.get('SUPABASE_BUCKET_NAME', 'signalements'), batch_size)
+    click.echo(f"{result['indexed']} objet(s) indexé(s), {result['updated']} compteur(s) corrigé(s)")
+
+
+@media_cli.command('derivatives')
+@click.option('--limit', default=500, show_default=True)
+def derivatives_command(limit):
+    """Planifie les dérivés WebP des signalements dont les images / vidéos n'en ont pas"""
+    from app.services.jobs.job_service import enqueue_job
+
+    ids = [signalement_id for (signalement_id,) in db.session.query(Signalement.IDsignalement).filter(
+        Signalement.is_deleted == False,
+        (Signalement.media_images > 0) | (Signalement.media_videos > 0),
+        ~Signalement.elements.contains('"derivatives"')
+    ).order_by(Signalement.IDsignalement.desc()).limit(limit).all()]
+    for signalement_id in ids:
+        enqueue_job('media.generate_derivatives', {'signalement_id': signalement_id})
+    click.echo(f"{len(ids)} signalement(s) planifié(s)")
@@ -1,8 +1,15 @@
-from app import db
+from app import db, invalidate_tags
 from sqlalchemy import or_
 from app.models import Petition
+from app.services.search.search_service import index_petition, search_petitions
+from app.services.stats.stats_service import counters_by_prefix, get_stat_counters
 from datetime import datetime
 
+
+def _cache_tags(petition):
+    """Tags de cache touchés par une écriture sur une pétition"""
+    return [f'petition:{petition.IDpetition}', 'petitions', f'citoyen:{petition.citoyenID}']
+
 def create_petition(
     destinataire,
     elements,
@@ -61,6 +68,8 @@ def create_petition(
 
     db.session.add(nouvelle_petition)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouvelle_petition))
+    index_petition(nouvelle_petition)
     return nouvelle_petition
 
 def get_petition_by_id(petition_id):
@@ -141,6 +150,8 @@ def update_petition(
         petition.IDmoderateur = id_moderateur
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(petition))
+    index_petition(petition)
     return petition
 
 def delete_petition(petition_id):
@@ -148,13 +159,30 @@ def delete_petition(petition_id):
     if petition:
         petition.is_deleted = True
         db.session.commit()
+        invalidate_tags(*_cache_tags(petition))
+        index_petition(petition)
         return True
     return False
 
-def search_petition_by_keyword(keyword):
-    return Petition.query.filter(
-        or_(
-            Petition.description.ilike(f"%{keyword}%"),
-            Petition.titre.ilike(f"%{keyword}%")
-        )
-    ).all()
+def search_petition_by_keyword(keyword, page=1, per_page=20):
+    """Recherche plein texte des pétitions, classées par pertinence"""
+    results, _ = search_petitions(keyword, page=page, per_page=per_page)
+    return [petition for petition, _ in results]
+
+
+def get_petition_statistics():
+    """
+    Statistiques des pétitions lues depuis les compteurs matérialisés.
+    Les pétitions expirées sont celles dont le jour de fin est passé.
+    """
+    counters = get_stat_counters('petition')
+    today = datetime.utcnow().date().isoformat()
+
+    return {
+        'total_petitions': counters.get('total', 0),
+        'active_petitions': counters.get('statut:en_attente', 0),
+        'expired_petitions': sum(
+            count for day, count in counters_by_prefix(counters, 'fin:').items() if day < today
+        ),
+        'destinataire_distribution': counters_by_prefix(counters, 'destinataire:')
+    }
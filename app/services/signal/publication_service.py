@@ -2,12 +2,17 @@
 # from flask_migrate import Migrate
 # db = SQLAlchemy()
 # migrate = Migrate()
-from app import db
+from app import db, invalidate_tags
 
 
 from app.models import Publication
 from datetime import datetime
 
+
+def _cache_tags(publication):
+    """Tags de cache touchés par une écriture sur une publication"""
+    return [f'publication:{publication.IDpublication}', 'publications', f'authorite:{publication.autoriteID}', f'signalement:{publication.signalementID}']
+
 # Service de Création
 def create_publication(titre, description, element, nb_aime_positif, nb_aime_negatif, autorite_id, signalement_id,IDmoderateur):
     nouvelle_publication = Publication(
@@ -23,6 +28,7 @@ def create_publication(titre, description, element, nb_aime_positif, nb_aime_neg
     )
     db.session.add(nouvelle_publication)
     db.session.commit()
+    invalidate_tags(*_cache_tags(nouvelle_publication))
     return nouvelle_publication
 
 # Service de Lecture
@@ -56,6 +62,7 @@ def update_publication(publication_id, titre=None, description=None, element=Non
         publication.nbAimeNegatif = nb_aime_negatif
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(publication))
     return publication
 
 # Service de Suppression Logique
@@ -65,5 +72,6 @@ def delete_publication(publication_id):
         publication.is_deleted = True
         publication.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(publication))
         return True
     return False
@@ -1,8 +1,8 @@
-from app.supabase_media_service import SupabaseMediaService
+from app.supabase_media_service import get_media_service
 
 def setup_supabase():
     """Configuration initiale de Supabase"""
-    service = SupabaseMediaService()
+    service = get_media_service()
     
     print("🔧 Configuration initiale Supabase...")
     
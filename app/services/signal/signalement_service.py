@@ -1,13 +1,51 @@
-from app import db
-from sqlalchemy import or_
+import os
+import uuid
+import json
+import base64
+import csv
+import io
+import click
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from flask.cli import AppGroup
+from app import db, cache, invalidate_tags
+from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import defer
 from app.models import Signalement
+from app.utils.geo import (
+    SpatialIndex, bounding_box, geohash_cells_for_bbox, geohash_precision_for_radius, encode_geohash,
+    dbscan_labels, geohash_precision_for_tile, tile_bounds, tile_for_point
+)
+from app.utils.media_buffer import MediaBuffer
+from app.services.search.search_service import index_signalement, remove_document, search_signalements
+from app.services.stats.stats_service import counters_by_prefix, get_stat_counters, reconcile_stat_counters
+from app.services.signal.media_store_service import release_media, retain_media
 from datetime import datetime
-from app.supabase_media_service import SupabaseMediaService
+import numpy as np
 
-# Initialiser le service média pour le serveur
+# Service média partagé du processus, créé à la première utilisation (aucun client réseau à l'import)
 from app.supabase_media_service import get_media_service
-from model_priorisation.priorite import CONTENT_SCORES, GRAVITY_SCORES, LOCATION_SCORES, URGENCY_SCORES, WEIGHTS
-media_service = get_media_service()  
+
+# Uploads Supabase concurrents, bornés par processus
+MEDIA_UPLOAD_WORKERS = int(os.getenv('MEDIA_UPLOAD_WORKERS', 4))
+_upload_executor = ThreadPoolExecutor(max_workers=MEDIA_UPLOAD_WORKERS, thread_name_prefix='media-upload')
+
+
+def schedule_media_derivatives(signalement):
+    """Planifie dans le worker la génération des dérivés WebP (miniature, aperçu, poster vidéo)"""
+    if not (signalement.media_images or signalement.media_videos):
+        return
+    try:
+        from app.services.jobs.job_service import enqueue_job
+        enqueue_job('media.generate_derivatives', {'signalement_id': signalement.IDsignalement})
+    except Exception as e:
+        print(f"⚠️ Dérivés des médias non planifiés: {e}")
+
+
+def _upload_in_app_context(app, **kwargs):
+    """Upload exécuté dans le pool, avec le contexte applicatif (index des médias en base)"""
+    with app.app_context():
+        return get_media_service().upload_media(**kwargs)
 
 
 def create_signalement(
@@ -32,8 +70,10 @@ def create_signalement(
     print(f"📊 Éléments reçus: {len(elements)}")
     print(f"📍 Localisation: {'OUI' if location_data else 'NON'}")
     
-    media_metadata = []
+    media_slots = [None] * len(elements)  # Conserve l'ordre d'origine des médias
+    pending_uploads = []
     failed_uploads = []
+    reused_paths = []  # Médias d'un autre signalement : une référence de plus après création
     
     # ✅ CORRECTION: Traitement des médias avec gestion d'erreurs améliorée
     for i, media in enumerate(elements):
@@ -52,10 +92,10 @@ def create_signalement(
                 file_data = media['data']
                 file_name = media['filename']
                 mimetype = media.get('mimetype', 'application/octet-stream')
-                file_size = len(file_data) if isinstance(file_data, bytes) else 0
+                file_size = len(file_data) if isinstance(file_data, (bytes, MediaBuffer)) else 0
                 
                 # ✅ VALIDATION: Vérifier que c'est bien du binaire
-                if not isinstance(file_data, bytes):
+                if not isinstance(file_data, (bytes, MediaBuffer)):
                     print(f"❌ Données non binaires pour {safe_filename}")
                     failed_uploads.append({
                         'filename': file_name,
@@ -83,32 +123,16 @@ def create_signalement(
                     })
                     continue
                 
-                try:
-                    metadata = media_service.upload_media(
-                        file_data=file_data,
-                        original_filename=file_name,
-                        mimetype=mimetype,
-                        citoyen_id=citoyen_id
-                    )
-                    
-                    # ✅ CORRECTION: Validation du retour de l'upload
-                    if metadata and 'url' in metadata:
-                        media_metadata.append(metadata)
-                        print(f"✅ Upload réussi: {safe_filename}")
-                    else:
-                        print(f"❌ Métadonnées invalides pour {safe_filename}")
-                        failed_uploads.append({
-                            'filename': file_name,
-                            'error': 'Métadonnées invalides retournées par le service'
-                        })
-                        
-                except Exception as upload_error:
-                    print(f"❌ Erreur upload {safe_filename}: {upload_error}")
-                    failed_uploads.append({
-                        'filename': file_name,
-                        'error': str(upload_error)
-                    })
-                    continue
+                # Upload en parallèle (pool borné), résultats collectés après la boucle
+                future = _upload_executor.submit(
+                    _upload_in_app_context,
+                    current_app._get_current_object(),
+                    file_data=file_data,
+                    original_filename=file_name,
+                    mimetype=mimetype,
+                    citoyen_id=citoyen_id
+                )
+                pending_uploads.append((i, file_name, safe_filename, future))
                 
             elif 'url' in media and 'storage_path' in media:
                 # Republication avec métadonnées existantes
@@ -150,7 +174,10 @@ def create_signalement(
                     'is_audio': media.get('is_audio', False)
                 }
                 
-                media_metadata.append(republication_metadata)
+                media_slots[i] = republication_metadata
+                if 'upload_type' not in media:
+                    # Réponse de /upload/republish : la référence a été prise à l'upload
+                    reused_paths.append(republication_metadata['storage_path'])
                 print(f"✅ Métadonnées republication conservées: {safe_filename}")
                 
             elif 'url' in media:
@@ -185,7 +212,7 @@ def create_signalement(
                     'is_audio': media.get('is_audio', False)
                 }
                 
-                media_metadata.append(basic_metadata)
+                media_slots[i] = basic_metadata
                 print(f"✅ Métadonnées basiques créées: {safe_filename}")
                 
             else:
@@ -205,6 +232,30 @@ def create_signalement(
             })
             continue
     
+    for i, file_name, safe_filename, future in pending_uploads:
+        try:
+            metadata = future.result()
+            
+            # ✅ CORRECTION: Validation du retour de l'upload
+            if metadata and 'url' in metadata:
+                media_slots[i] = metadata
+                print(f"✅ Upload réussi: {safe_filename}")
+            else:
+                print(f"❌ Métadonnées invalides pour {safe_filename}")
+                failed_uploads.append({
+                    'filename': file_name,
+                    'error': 'Métadonnées invalides retournées par le service'
+                })
+                
+        except Exception as upload_error:
+            print(f"❌ Erreur upload {safe_filename}: {upload_error}")
+            failed_uploads.append({
+                'filename': file_name,
+                'error': str(upload_error)
+            })
+    
+    media_metadata = [metadata for metadata in media_slots if metadata]
+    
     # ========== CRÉATION DU SIGNALEMENT ==========
     try:
         nouveau_signalement = Signalement(
@@ -238,6 +289,11 @@ def create_signalement(
         
         db.session.add(nouveau_signalement)
         db.session.commit()
+        if reused_paths:
+            retain_media(reused_paths)
+        sync_spatial_index(nouveau_signalement)
+        index_signalement(nouveau_signalement)
+        schedule_media_derivatives(nouveau_signalement)
         
         print(f"✅ Signalement créé: ID {nouveau_signalement.IDsignalement}")
         print(f"📊 Statut: {nouveau_signalement.statut}")
@@ -267,7 +323,7 @@ def create_signalement(
             if (metadata.get('upload_context') != 'republication' and 
                 metadata.get('storage_path')):
                 try:
-                    media_service.delete_media(metadata['storage_path'])
+                    get_media_service().delete_media(metadata['storage_path'])
                     cleanup_count += 1
                     print(f"🧹 Nettoyage: {metadata.get('filename', 'unknown')}")
                 except Exception as cleanup_error:
@@ -281,26 +337,179 @@ def create_signalement(
 
 # ========== AJOUT SERVICES POUR LA GÉOLOCALISATION ==========
 
+# Index spatial en mémoire partagé par le processus (reconstruit périodiquement,
+# mis à jour incrémentalement à chaque création / modification / déplacement)
+spatial_index = SpatialIndex(cell_deg=float(os.getenv('SPATIAL_INDEX_CELL_DEG', 0.02)))
+SPATIAL_INDEX_TTL = int(os.getenv('SPATIAL_INDEX_TTL', 300))
+
+# Tuiles de carte pré-agrégées
+TILE_MAX_ZOOM = int(os.getenv('TILE_MAX_ZOOM', 20))
+TILE_CLUSTER_CELLS = 8  # Colonnes de regroupement visées par tuile
+
+
+def rebuild_spatial_index():
+    """Reconstruit l'index spatial et complète les geohash manquants"""
+    rows = db.session.query(
+        Signalement.IDsignalement,
+        Signalement.latitude,
+        Signalement.longitude,
+        Signalement.geohash
+    ).filter(
+        Signalement.has_location == True,
+        Signalement.is_deleted == False
+    ).all()
+
+    spatial_index.load((row.IDsignalement, row.latitude, row.longitude) for row in rows)
+
+    missing = [
+        {'IDsignalement': row.IDsignalement, 'geohash': encode_geohash(float(row.latitude), float(row.longitude), 9)}
+        for row in rows
+        if not row.geohash and row.latitude is not None and row.longitude is not None
+    ]
+    if missing:
+        try:
+            db.session.bulk_update_mappings(Signalement, missing)
+            db.session.commit()
+            print(f"🧭 Geohash complétés pour {len(missing)} signalements")
+        except Exception as e:
+            print(f"⚠️ Erreur complétion geohash: {e}")
+            db.session.rollback()
+
+    print(f"🧭 Index spatial reconstruit: {len(spatial_index)} points")
+    return len(spatial_index)
+
+
+def _refresh_spatial_index():
+    """S'assure que l'index est chargé et intègre les signalements créés par d'autres workers"""
+    if not spatial_index.is_loaded or spatial_index.age() > SPATIAL_INDEX_TTL:
+        rebuild_spatial_index()
+        return
+
+    new_rows = db.session.query(
+        Signalement.IDsignalement,
+        Signalement.latitude,
+        Signalement.longitude
+    ).filter(
+        Signalement.IDsignalement > spatial_index.max_id,
+        Signalement.has_location == True,
+        Signalement.is_deleted == False
+    ).all()
+
+    for row in new_rows:
+        if row.latitude is not None and row.longitude is not None:
+            spatial_index.upsert(row.IDsignalement, row.latitude, row.longitude)
+
+
+def invalidate_signalement_cache(signalement=None):
+    """Invalide les réponses en cache et les analyses dérivées (hotspots) après une écriture sur les signalements"""
+    tags = ['signalements']
+    if signalement is not None:
+        tags += [f'signalement:{signalement.IDsignalement}', f'citoyen:{signalement.citoyenID}']
+        tags += signalement_tile_tags(signalement)
+    invalidate_tags(*tags)
+
+    try:
+        cache.set('signalements_analytics_version', uuid.uuid4().hex, timeout=0)
+    except Exception as e:
+        print(f"⚠️ Erreur invalidation cache analyses: {e}")
+
+
+def tile_tags(latitude, longitude):
+    """Tags des tuiles de carte contenant un point, à tous les niveaux de zoom"""
+    return [
+        'tile:{}/{}/{}'.format(z, *tile_for_point(latitude, longitude, z))
+        for z in range(TILE_MAX_ZOOM + 1)
+    ]
+
+
+def signalement_tile_tags(signalement):
+    """Tuiles touchées par une écriture : position courante et position avant déplacement"""
+    positions = []
+    if signalement.latitude is not None and signalement.longitude is not None:
+        positions.append((float(signalement.latitude), float(signalement.longitude)))
+    previous = getattr(signalement, '_previous_location', None)
+    if previous and previous not in positions:
+        positions.append(previous)
+        signalement._previous_location = None
+
+    tags = []
+    for latitude, longitude in positions:
+        try:
+            tags += tile_tags(latitude, longitude)
+        except (ValueError, OverflowError) as e:
+            print(f"⚠️ Coordonnées hors tuiles pour le signalement {signalement.IDsignalement}: {e}")
+    return tags
+
+
+def _analytics_cache_key(name, *params):
+    version = cache.get('signalements_analytics_version') or 'initial'
+    return f"{name}::{version}::" + "::".join(str(p) for p in params)
+
+
+def sync_spatial_index(signalement):
+    """Répercute l'état d'un signalement dans l'index spatial"""
+    invalidate_signalement_cache(signalement)
+    try:
+        if (signalement.has_location and not signalement.is_deleted
+                and signalement.latitude is not None and signalement.longitude is not None):
+            spatial_index.upsert(signalement.IDsignalement, signalement.latitude, signalement.longitude)
+        else:
+            spatial_index.remove(signalement.IDsignalement)
+    except Exception as e:
+        print(f"⚠️ Erreur synchronisation index spatial: {e}")
+
+
+def _query_signalements_by_location_sql(latitude, longitude, radius_km):
+    """Recherche par rayon en SQL : préfiltre geohash + boîte englobante, distance exacte ensuite"""
+    min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius_km)
+    precision = geohash_precision_for_radius(radius_km, latitude)
+    cells = geohash_cells_for_bbox(min_lat, min_lng, max_lat, max_lng, precision)
+
+    candidates = Signalement.query.filter(
+        Signalement.has_location == True,
+        Signalement.is_deleted == False,
+        Signalement.latitude.between(min_lat, max_lat),
+        Signalement.longitude.between(min_lng, max_lng),
+        or_(
+            Signalement.geohash.is_(None),
+            *[Signalement.geohash.like(f"{cell}%") for cell in cells]
+        )
+    ).all()
+
+    results = []
+    for s in candidates:
+        distance = s.calculate_distance_from(latitude, longitude)
+        if distance is not None and distance / 1000 <= radius_km:
+            results.append((distance, s))
+
+    results.sort(key=lambda x: x[0])
+    return [s for _, s in results]
+
+
 def get_signalements_by_location(latitude, longitude, radius_km=5):
-    """Récupère les signalements dans un rayon donné (en km)"""
+    """Récupère les signalements dans un rayon donné (en km), triés par distance"""
     try:
-        from sqlalchemy import func
-        
-        # Formule haversine en SQL pour calculer la distance
-        haversine = func.acos(
-            func.cos(func.radians(latitude)) *
-            func.cos(func.radians(Signalement.latitude)) *
-            func.cos(func.radians(Signalement.longitude) - func.radians(longitude)) +
-            func.sin(func.radians(latitude)) *
-            func.sin(func.radians(Signalement.latitude))
-        ) * 6371  # Rayon de la Terre en km
-        
-        return Signalement.query.filter(
+        try:
+            _refresh_spatial_index()
+            matches = spatial_index.query_radius(latitude, longitude, radius_km)
+        except Exception as index_error:
+            print(f"⚠️ Index spatial indisponible, repli SQL: {index_error}")
+            return _query_signalements_by_location_sql(latitude, longitude, radius_km)
+
+        if not matches:
+            return []
+
+        ids = [item_id for item_id, _ in matches]
+        rows = Signalement.query.filter(
+            Signalement.IDsignalement.in_(ids),
             Signalement.has_location == True,
-            Signalement.is_deleted == False,
-            haversine <= radius_km
+            Signalement.is_deleted == False
         ).all()
-        
+
+        # Conserver l'ordre par distance de l'index
+        by_id = {s.IDsignalement: s for s in rows}
+        return [by_id[item_id] for item_id in ids if item_id in by_id]
+
     except Exception as e:
         print(f"❌ Erreur recherche par localisation: {e}")
         return []
@@ -312,10 +521,85 @@ def get_signalements_with_location():
         Signalement.is_deleted == False
     ).all()
 
-def get_location_statistics():
-    """Statistiques sur l'utilisation de la géolocalisation"""
-    total_signalements = Signalement.query.filter_by(is_deleted=False).count()
-    with_location = Signalement.query.filter_by(has_location=True, is_deleted=False).count()
+def get_signalement_tile(z, x, y, type_signalement=None, statut=None):
+    """
+    Signalements d'une tuile de carte z/x/y regroupés côté serveur.
+
+    Les points de la tuile (filtre lat/lng indexé) sont agrégés en SQL par
+    préfixe geohash, avec une précision adaptée au zoom (environ
+    TILE_CLUSTER_CELLS colonnes par tuile) : chaque groupe donne son effectif,
+    son centroïde et la répartition par type et par statut. Un groupe d'un
+    seul signalement porte son identifiant.
+    """
+    min_lat, min_lng, max_lat, max_lng = tile_bounds(z, x, y)
+    precision = geohash_precision_for_tile(z, TILE_CLUSTER_CELLS)
+    cell = func.coalesce(func.substr(Signalement.geohash, 1, precision), '').label('cell')
+
+    query = db.session.query(
+        cell,
+        Signalement.typeSignalement,
+        Signalement.statut,
+        func.count(),
+        func.sum(Signalement.latitude),
+        func.sum(Signalement.longitude),
+        func.min(Signalement.IDsignalement)
+    ).filter(
+        Signalement.has_location == True,
+        Signalement.is_deleted == False,
+        Signalement.latitude >= min_lat,
+        Signalement.latitude < max_lat,
+        Signalement.longitude >= min_lng,
+        Signalement.longitude < max_lng
+    )
+    if type_signalement:
+        query = query.filter(Signalement.typeSignalement == type_signalement)
+    if statut:
+        query = query.filter(Signalement.statut == statut)
+
+    clusters = {}
+    for cell_id, type_sig, statut_sig, count, sum_lat, sum_lng, first_id in query.group_by(
+        cell, Signalement.typeSignalement, Signalement.statut
+    ).all():
+        cluster = clusters.setdefault(cell_id, {
+            'count': 0, 'sum_lat': 0.0, 'sum_lng': 0.0, 'id': first_id, 'types': {}, 'statuts': {}
+        })
+        cluster['count'] += count
+        cluster['sum_lat'] += float(sum_lat)
+        cluster['sum_lng'] += float(sum_lng)
+        cluster['id'] = min(cluster['id'], first_id)
+        cluster['types'][type_sig] = cluster['types'].get(type_sig, 0) + count
+        cluster['statuts'][statut_sig] = cluster['statuts'].get(statut_sig, 0) + count
+
+    features = []
+    for cell_id, cluster in sorted(clusters.items()):
+        count = cluster['count']
+        feature = {
+            'cell': cell_id,
+            'lat': round(cluster['sum_lat'] / count, 6),
+            'lng': round(cluster['sum_lng'] / count, 6),
+            'count': count,
+            'types': cluster['types'],
+            'statuts': cluster['statuts']
+        }
+        if count == 1:
+            feature['id'] = cluster['id']
+        features.append(feature)
+
+    return {
+        'z': z,
+        'x': x,
+        'y': y,
+        'bounds': {'min_lat': min_lat, 'min_lng': min_lng, 'max_lat': max_lat, 'max_lng': max_lng},
+        'precision': precision,
+        'total': sum(f['count'] for f in features),
+        'clusters': features
+    }
+
+def get_location_statistics(counters=None):
+    """Statistiques sur l'utilisation de la géolocalisation (compteurs matérialisés)"""
+    counters = get_stat_counters('signalement') if counters is None else counters
+    total_signalements = counters.get('total', 0)
+    with_location = counters.get('location', 0)
     
     return {
         'total_signalements': total_signalements,
@@ -348,21 +632,15 @@ def update_signalement(
         return None
 
     print(f"🔄 Mise à jour signalement {signalement_id}")
+    retained_paths = []
+    released_paths = []
 
     # ========== GESTION DE LA LOCALISATION ==========
     if location_data is not None:
         if location_data == 'REMOVE':
             # Supprimer la localisation
             print("🗑️ Suppression de la localisation")
-            signalement.latitude = None
-            signalement.longitude = None
-            signalement.accuracy = None
-            signalement.altitude = None
-            signalement.heading = None
-            signalement.speed = None
-            signalement.location_timestamp = None
-            signalement.location_address = None
-            signalement.has_location = False
+            signalement.clear_location_data()
         elif isinstance(location_data, dict):
             # Mettre à jour la localisation
             print(f"📍 Mise à jour localisation: {location_data.get('latitude')}, {location_data.get('longitude')}")
@@ -374,15 +652,8 @@ def update_signalement(
     if elements is not None:
         print(f"📎 Mise à jour des médias: {len(elements)} éléments")
         
-        # Récupérer les anciens éléments pour supprimer les fichiers
+        # Anciens éléments : libérés après le commit, une fois la référence prise sur les médias conservés
         old_elements = signalement.get_elements()
-        for old_element in old_elements:
-            if 'storage_path' in old_element:
-                try:
-                    media_service.delete_media(old_element['storage_path'])
-                    print(f"🗑️ Ancien média supprimé: {old_element.get('filename')}")
-                except Exception as e:
-                    print(f"⚠️ Erreur suppression ancien média: {e}")
         
         # Traiter les nouveaux éléments
         media_metadata = []
@@ -399,7 +670,7 @@ def update_signalement(
                     print(f"📤 Upload nouveau média {i+1}: {file_name}")
                     
                     # Upload vers Supabase
-                    metadata = media_service.upload_media(
+                    metadata = get_media_service().upload_media(
                         file_data=file_data,
                         original_filename=file_name,
                         mimetype=mimetype,
@@ -450,6 +721,12 @@ def update_signalement(
         signalement.set_elements(media_metadata)
         print(f"💾 Médias mis à jour: {len(media_metadata)} éléments")
         
+        # Les médias conservés gardent une référence : seuls les retirés sont supprimés du bucket,
+        # après le commit (un rollback laisserait la ligne pointer vers des objets supprimés)
+        retained_paths = [m['storage_path'] for m in media_metadata if m.get('upload_context') == 'update']
+        retain_media(retained_paths)
+        released_paths = [old_element['storage_path'] for old_element in old_elements if 'storage_path' in old_element]
+        
         if failed_uploads:
             print(f"⚠️ Échecs upload: {len(failed_uploads)}")
 
@@ -488,6 +765,33 @@ def update_signalement(
 
     try:
         db.session.commit()
+    except Exception as e:
+        print(f"❌ Erreur DB lors de la mise à jour: {e}")
+        db.session.rollback()
+        # Annule les références prises sur les médias conservés (l'objet reste référencé par l'ancienne ligne)
+        for storage_path in retained_paths:
+            try:
+                release_media(storage_path)
+            except Exception as release_error:
+                print(f"⚠️ Référence média non annulée ({storage_path}): {release_error}")
+        raise e
+
+    for storage_path in released_paths:
+        try:
+            get_media_service().delete_media(storage_path)
+            print(f"🗑️ Ancien média libéré: {storage_path}")
+        except Exception as e:
+            print(f"⚠️ Erreur suppression ancien média: {e}")
+
+    try:
+        if location_data is not None:
+            sync_spatial_index(signalement)
+        elif updated_fields:
+            invalidate_signalement_cache(signalement)
+        if {'description', 'typeSignalement', 'cible'} & set(updated_fields):
+            index_signalement(signalement)
+        if elements is not None:
+            schedule_media_derivatives(signalement)
         print(f"✅ Signalement {signalement_id} mis à jour")
         print(f"📊 Champs modifiés: {updated_fields}")
         return signalement
@@ -525,6 +829,9 @@ def delete_signalement(signalement_id):
     signalement.dateDeleted = datetime.utcnow()
     
     db.session.commit()
+    spatial_index.remove(signalement_id)
+    remove_document('signalement', signalement_id)
+    invalidate_signalement_cache(signalement)
     return True
 
 def hard_delete_signalement(signalement_id):
@@ -539,6 +846,9 @@ def hard_delete_signalement(signalement_id):
     # Suppression définitive de la base de données
     db.session.delete(signalement)
     db.session.commit()
+    spatial_index.remove(signalement_id)
+    remove_document('signalement', signalement_id)
+    invalidate_signalement_cache(signalement)
     return True
 
 # Services de lecture
@@ -550,6 +860,65 @@ def get_all_signalements():
     """Récupère tous les signalements non supprimés"""
     return Signalement.query.filter_by(is_deleted=False).order_by(Signalement.dateCreated.desc()).all()
 
+SIGNALEMENTS_PAGE_MAX = int(os.getenv('SIGNALEMENTS_PAGE_MAX', 100))
+
+
+def encode_page_cursor(signalement):
+    """Curseur opaque (dateCreated, IDsignalement) du dernier élément d'une page (date null possible)"""
+    date_created = signalement.dateCreated.isoformat() if signalement.dateCreated else None
+    raw = json.dumps([date_created, signalement.IDsignalement])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_page_cursor(cursor):
+    """Décode un curseur de page. Lève ValueError s'il est invalide."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_created, signalement_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(date_created) if date_created is not None else None), int(signalement_id)
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
+
+
+def get_signalements_page(limit=20, cursor=None, statut=None, type_signalement=None, priorite=None,
+                          include_elements=False):
+    """
+    Page de signalements du plus récent au plus ancien, paginée par curseur
+    sur (dateCreated, IDsignalement). Les signalements sans date viennent en dernier
+    (ordre des NULL en tri décroissant sous MySQL et SQLite, index de tri conservé).
+    La colonne `elements` n'est chargée que si demandée.
+    Retourne (signalements, next_cursor) ; next_cursor vaut None sur la dernière page.
+    """
+    limit = max(1, min(int(limit), SIGNALEMENTS_PAGE_MAX))
+    query = Signalement.query.filter(Signalement.is_deleted == False)
+
+    if statut:
+        query = query.filter(Signalement.statut == statut)
+    if type_signalement:
+        query = query.filter(Signalement.typeSignalement == type_signalement)
+    if priorite:
+        query = query.filter(Signalement.priorite == priorite)
+    if not include_elements:
+        query = query.options(defer(Signalement.elements))
+
+    if cursor:
+        date_created, signalement_id = decode_page_cursor(cursor)
+        if date_created is None:
+            query = query.filter(Signalement.dateCreated.is_(None), Signalement.IDsignalement < signalement_id)
+        else:
+            query = query.filter(or_(
+                Signalement.dateCreated < date_created,
+                and_(Signalement.dateCreated == date_created, Signalement.IDsignalement < signalement_id),
+                Signalement.dateCreated.is_(None)
+            ))
+
+    rows = query.order_by(
+        Signalement.dateCreated.desc(), Signalement.IDsignalement.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = encode_page_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
 def get_signalements_by_citoyen(citoyen_id):
     """Récupère les signalements d'un citoyen"""
     return Signalement.query.filter_by(citoyenID=citoyen_id, is_deleted=False).all()
@@ -563,24 +932,19 @@ def get_signalements_by_type(type_signalement):
     return Signalement.query.filter_by(typeSignalement=type_signalement, is_deleted=False).all()
 
 # Service de recherche
-def search_signalements_by_keyword(keyword):
-    """Recherche des signalements par mot-clé"""
-    return Signalement.query.filter(
-        or_(
-            Signalement.description.ilike(f"%{keyword}%"),
-            Signalement.cible.ilike(f"%{keyword}%"),
-            Signalement.typeSignalement.ilike(f"%{keyword}%")
-        ),
-        Signalement.is_deleted == False
-    ).all()
+def search_signalements_by_keyword(keyword, page=1, per_page=20):
+    """Recherche plein texte des signalements, classés par pertinence"""
+    results, _ = search_signalements(keyword, page=page, per_page=per_page)
+    return [signalement for signalement, _ in results]
 
 # Statistiques
-def get_signalement_stats():
-    """Retourne les statistiques des signalements"""
-    total = Signalement.query.filter_by(is_deleted=False).count()
-    en_cours = Signalement.query.filter_by(statut='en_cours', is_deleted=False).count()
-    resolus = Signalement.query.filter_by(statut='resolu', is_deleted=False).count()
-    rejetes = Signalement.query.filter_by(statut='rejete', is_deleted=False).count()
+def get_signalement_stats(counters=None):
+    """Retourne les statistiques des signalements (compteurs matérialisés)"""
+    counters = get_stat_counters('signalement') if counters is None else counters
+    total = counters.get('total', 0)
+    en_cours = counters.get('statut:en_cours', 0)
+    resolus = counters.get('statut:resolu', 0)
+    rejetes = counters.get('statut:rejete', 0)
     
     return {
         'total': total,
@@ -632,6 +996,7 @@ def update_signalement_location(signalement_id, location_data):
         success = signalement.set_location_data(location_data)
         if success:
             db.session.commit()
+            sync_spatial_index(signalement)
             print(f"✅ Localisation mise à jour pour signalement {signalement_id}")
             return signalement
         else:
@@ -651,85 +1016,121 @@ def get_signalements_nearby_count(latitude, longitude, radius_km=1):
     except:
         return 0
 
+HOTSPOTS_CACHE_TIMEOUT = int(os.getenv('HOTSPOTS_CACHE_TIMEOUT', 600))
+
+
+def _compute_hotspots(min_signalements, radius_km):
+    """Regroupement DBSCAN en un seul passage sur les coordonnées en mémoire"""
+    rows = db.session.query(
+        Signalement.IDsignalement,
+        Signalement.latitude,
+        Signalement.longitude,
+        Signalement.typeSignalement,
+        Signalement.statut
+    ).filter(
+        Signalement.has_location == True,
+        Signalement.is_deleted == False,
+        Signalement.latitude.isnot(None),
+        Signalement.longitude.isnot(None)
+    ).all()
+
+    if not rows:
+        return []
+
+    latitudes = np.array([float(r.latitude) for r in rows])
+    longitudes = np.array([float(r.longitude) for r in rows])
+    labels = dbscan_labels(latitudes, longitudes, radius_km, min_signalements)
+
+    hotspots = []
+    for label in np.unique(labels[labels >= 0]).tolist():
+        members = np.flatnonzero(labels == label)
+        if len(members) < min_signalements:
+            continue
+
+        center_lat = float(latitudes[members].mean())
+        center_lng = float(longitudes[members].mean())
+
+        types_count = {}
+        status_count = {}
+        for i in members.tolist():
+            row = rows[i]
+            types_count[row.typeSignalement] = types_count.get(row.typeSignalement, 0) + 1
+            status_count[row.statut] = status_count.get(row.statut, 0) + 1
+
+        hotspots.append({
+            'center': {'latitude': center_lat, 'longitude': center_lng},
+            'radius_km': radius_km,
+            'signalements_count': int(len(members)),
+            'types_distribution': types_count,
+            'status_distribution': status_count,
+            'signalement_ids': sorted(rows[i].IDsignalement for i in members.tolist()),
+            'most_common_type': max(types_count.items(), key=lambda x: x[1])[0],
+            'google_maps_url': f"https://www.google.com/maps?q={center_lat},{center_lng}"
+        })
+
+    # Trier par nombre de signalements
+    hotspots.sort(key=lambda x: x['signalements_count'], reverse=True)
+    return hotspots
+
+
 def get_hotspots_analysis(min_signalements=3, radius_km=1):
-    """Analyse des zones à forte concentration de signalements"""
+    """Analyse des zones à forte concentration de signalements (résultat mis en cache)"""
     try:
-        # Récupérer tous les signalements avec localisation
-        signalements = get_signalements_with_location()
-        
-        hotspots = []
-        processed_signalements = set()
-        
-        for signalement in signalements:
-            if signalement.IDsignalement in processed_signalements:
-                continue
-                
-            location_data = signalement.get_location_data()
-            if not location_data:
-                continue
-                
-            lat = location_data['latitude']
-            lng = location_data['longitude']
-            
-            # Compter les signalements dans la zone
-            nearby = get_signalements_by_location(lat, lng, radius_km)
-            
-            if len(nearby) >= min_signalements:
-                # Marquer ces signalements comme traités
-                for nearby_sig in nearby:
-                    processed_signalements.add(nearby_sig.IDsignalement)
-                
-                # Calculer le centre de gravité
-                total_lat = sum(s.get_location_data()['latitude'] for s in nearby if s.get_location_data())
-                total_lng = sum(s.get_location_data()['longitude'] for s in nearby if s.get_location_data())
-                center_lat = total_lat / len(nearby)
-                center_lng = total_lng / len(nearby)
-                
-                # Analyser les types de signalements
-                types_count = {}
-                status_count = {}
-                for sig in nearby:
-                    types_count[sig.typeSignalement] = types_count.get(sig.typeSignalement, 0) + 1
-                    status_count[sig.statut] = status_count.get(sig.statut, 0) + 1
-                
-                hotspots.append({
-                    'center': {'latitude': center_lat, 'longitude': center_lng},
-                    'radius_km': radius_km,
-                    'signalements_count': len(nearby),
-                    'types_distribution': types_count,
-                    'status_distribution': status_count,
-                    'signalement_ids': [s.IDsignalement for s in nearby],
-                    'most_common_type': max(types_count.items(), key=lambda x: x[1])[0],
-                    'google_maps_url': f"https://www.google.com/maps?q={center_lat},{center_lng}"
-                })
-        
-        # Trier par nombre de signalements
-        hotspots.sort(key=lambda x: x['signalements_count'], reverse=True)
-        
+        cache_key = _analytics_cache_key('hotspots', min_signalements, radius_km)
+        try:
+            cached = cache.get(cache_key)
+        except Exception:
+            cached = None
+        if cached is not None:
+            return cached
+
+        hotspots = _compute_hotspots(min_signalements, radius_km)
+
+        try:
+            cache.set(cache_key, hotspots, timeout=HOTSPOTS_CACHE_TIMEOUT)
+        except Exception as cache_error:
+            print(f"⚠️ Erreur mise en cache hotspots: {cache_error}")
+
         return hotspots
-        
+
     except Exception as e:
         print(f"❌ Erreur hotspots_analysis: {e}")
         return []
 
+def get_media_stats():
+    """Statistiques globales des médias (compteurs matérialisés)"""
+    counters = get_stat_counters('signalement')
+    by_category = {
+        category: counters.get(f'media:{category}', 0)
+        for category in ('images', 'videos', 'documents', 'audios')
+    }
+    by_category['others'] = counters.get('media:total', 0) - sum(by_category.values())
+
+    with_media_by_type = counters_by_prefix(counters, 'type_with_media:')
+    return {
+        'total_signalements': counters.get('total', 0),
+        'signalements_with_media': counters.get('with_media', 0),
+        'total_media': counters.get('media:total', 0),
+        'by_category': by_category,
+        'by_type': {
+            type_sig: {'count': count, 'with_media': with_media_by_type.get(type_sig, 0)}
+            for type_sig, count in counters_by_prefix(counters, 'type:').items()
+        }
+    }
+
 # Statistiques avancées
 def get_advanced_signalement_stats():
     """Statistiques avancées incluant la géolocalisation"""
-    basic_stats = get_signalement_stats()
-    location_stats = get_location_statistics()
+    counters = get_stat_counters('signalement')
+    basic_stats = get_signalement_stats(counters)
+    location_stats = get_location_statistics(counters)
     
     # Statistiques par type avec localisation
-    types_with_location = {}
-    all_signalements = get_all_signalements()
-    
-    for signalement in all_signalements:
-        type_sig = signalement.typeSignalement
-        if type_sig not in types_with_location:
-            types_with_location[type_sig] = {'total': 0, 'with_location': 0}
-        
-        types_with_location[type_sig]['total'] += 1
-        if signalement.has_location:
-            types_with_location[type_sig]['with_location'] += 1
+    with_location_by_type = counters_by_prefix(counters, 'type_location:')
+    types_with_location = {
+        type_sig: {'total': total, 'with_location': with_location_by_type.get(type_sig, 0)}
+        for type_sig, total in counters_by_prefix(counters, 'type:').items()
+    }
     
     # Calculer les pourcentages
     for type_sig in types_with_location:
@@ -746,62 +1147,197 @@ def get_advanced_signalement_stats():
         'generated_at': datetime.utcnow().isoformat()
     }
 
-def export_signalements_geojson(include_private=False):
-    """Exporte les signalements au format GeoJSON pour cartographie"""
-    try:
-        query = Signalement.query.filter(
-            Signalement.has_location == True,
-            Signalement.is_deleted == False
+EXPORT_FORMATS = ('geojson', 'ndjson', 'csv')
+EXPORT_CSV_COLUMNS = [
+    'id', 'type', 'statut', 'description', 'date', 'anonymat', 'latitude', 'longitude',
+    'accuracy', 'has_media', 'media_count', 'votes_positifs', 'votes_negatifs'
+]
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def iter_export_rows(include_private=False, bbox=None, date_from=None, date_to=None,
+                     type_signalement=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Parcourt les signalements localisés à exporter, ligne par ligne.
+
+    Requête en colonnes (sans objets ORM) lue par lots via un curseur serveur
+    (`yield_per`) : la mémoire reste constante quel que soit le volume.
+    `bbox` = (min_lng, min_lat, max_lng, max_lat). Les éléments JSON ne sont lus
+    que pour les lignes dont les compteurs de médias ne sont pas renseignés.
+    """
+    stmt = db.select(
+        Signalement.IDsignalement,
+        Signalement.typeSignalement,
+        Signalement.statut,
+        Signalement.description,
+        Signalement.dateCreated,
+        Signalement.anonymat,
+        Signalement.latitude,
+        Signalement.longitude,
+        Signalement.accuracy,
+        Signalement.nbVotePositif,
+        Signalement.nbVoteNegatif,
+        Signalement.media_count,
+        db.case((Signalement.media_count.is_(None), Signalement.elements), else_=None)
+    ).where(
+        Signalement.has_location == True,
+        Signalement.is_deleted == False,
+        Signalement.latitude.isnot(None),
+        Signalement.longitude.isnot(None)
+    )
+
+    if not include_private:
+        stmt = stmt.where(Signalement.cible == 'public')
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        stmt = stmt.where(
+            Signalement.latitude.between(min_lat, max_lat),
+            Signalement.longitude.between(min_lng, max_lng)
         )
-        
-        if not include_private:
-            query = query.filter(Signalement.cible == 'public')
-        
-        signalements = query.all()
-        
-        features = []
-        for s in signalements:
-            if s.is_location_valid():
-                location_data = s.get_location_data()
-                
-                feature = {
-                    "type": "Feature",
-                    "geometry": {
-                        "type": "Point",
-                        "coordinates": [
-                            location_data['longitude'], 
-                            location_data['latitude']
-                        ]
-                    },
-                    "properties": {
-                        "id": s.IDsignalement,
-                        "type": s.typeSignalement,
-                        "statut": s.statut,
-                        "description": s.description,
-                        "date": s.dateCreated.isoformat() if s.dateCreated else None,
-                        "anonymat": s.anonymat,
-                        "accuracy": location_data.get('accuracy'),
-                        "has_media": s.has_media(),
-                        "media_count": s.get_media_count(),
-                        "votes_positifs": s.nbVotePositif,
-                        "votes_negatifs": s.nbVoteNegatif
-                    }
-                }
-                features.append(feature)
-        
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features,
-            "metadata": {
-                "total_features": len(features),
-                "generated_at": datetime.utcnow().isoformat(),
-                "include_private": include_private
-            }
+    if date_from:
+        stmt = stmt.where(Signalement.dateCreated >= date_from)
+    if date_to:
+        stmt = stmt.where(Signalement.dateCreated <= date_to)
+    if type_signalement:
+        stmt = stmt.where(Signalement.typeSignalement == type_signalement)
+
+    stmt = stmt.order_by(Signalement.IDsignalement).execution_options(yield_per=batch_size)
+
+    for (signalement_id, type_s, statut, description, date_created, anonymat, lat, lng,
+         accuracy, votes_pos, votes_neg, media_count, raw_elements) in db.session.execute(stmt):
+        lat, lng = float(lat), float(lng)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            continue
+        if media_count is None:
+            media_count = Signalement.compute_media_counters(raw_elements)['media_count'] or 0
+
+        yield {
+            'id': signalement_id,
+            'type': type_s,
+            'statut': statut,
+            'description': description,
+            'date': date_created.isoformat() if date_created else None,
+            'anonymat': anonymat,
+            'latitude': lat,
+            'longitude': lng,
+            'accuracy': accuracy,
+            'has_media': media_count > 0,
+            'media_count': media_count,
+            'votes_positifs': votes_pos,
+            'votes_negatifs': votes_neg
         }
-        
-        return geojson
-        
+
+
+def _export_feature(row):
+    properties = {k: v for k, v in row.items() if k not in ('latitude', 'longitude')}
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [row['longitude'], row['latitude']]},
+        "properties": properties
+    }
+
+
+def _buffered(pieces, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Regroupe de petits fragments de texte en blocs d'environ `chunk_bytes`"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_bytes:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _geojson_pieces(rows, include_private):
+    yield '{"type":"FeatureCollection","features":['
+    total = 0
+    for row in rows:
+        yield (',' if total else '') + json.dumps(_export_feature(row), ensure_ascii=False, default=str)
+        total += 1
+    # Métadonnées en fin de document : le total n'est connu qu'après le parcours
+    yield '],"metadata":' + json.dumps({
+        "total_features": total,
+        "generated_at": datetime.utcnow().isoformat(),
+        "include_private": include_private
+    }) + '}'
+
+
+def _ndjson_pieces(rows):
+    for row in rows:
+        yield json.dumps(_export_feature(row), ensure_ascii=False, default=str) + '\n'
+
+
+def _csv_pieces(rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_CSV_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate(0)
+    yield out.getvalue()
+
+
+def stream_signalements_export(export_format='geojson', include_private=False, **filters):
+    """Générateur de texte de l'export (geojson, ndjson ou csv), par blocs"""
+    rows = iter_export_rows(include_private=include_private, **filters)
+    if export_format == 'ndjson':
+        pieces = _ndjson_pieces(rows)
+    elif export_format == 'csv':
+        pieces = _csv_pieces(rows)
+    else:
+        pieces = _geojson_pieces(rows, include_private)
+    return _buffered(pieces)
+
+
+def export_signalements_geojson(include_private=False, **filters):
+    """Exporte les signalements au format GeoJSON (dictionnaire complet en mémoire)"""
+    try:
+        return json.loads(''.join(stream_signalements_export('geojson', include_private, **filters)))
     except Exception as e:
         print(f"❌ Erreur export GeoJSON: {e}")
         return {"type": "FeatureCollection", "features": []}
-  
\ No newline at end of file
+
+
+def backfill_media_counters(batch_size=500):
+    """Renseigne les compteurs de médias des signalements créés avant leur ajout"""
+    total = 0
+    while True:
+        rows = db.session.query(Signalement.IDsignalement, Signalement.elements).filter(
+            Signalement.media_count.is_(None)
+        ).limit(batch_size).all()
+        if not rows:
+            break
+
+        mappings = []
+        for signalement_id, raw_elements in rows:
+            counters = Signalement.compute_media_counters(raw_elements)
+            # JSON illisible : compteurs à zéro pour ne pas le retraiter indéfiniment
+            mappings.append({'IDsignalement': signalement_id, **{k: v or 0 for k, v in counters.items()}})
+
+        db.session.bulk_update_mappings(Signalement, mappings)
+        db.session.commit()
+        total += len(mappings)
+
+    if total:
+        # bulk_update_mappings ne passe pas par le flush : compteurs de tableau de bord recalculés
+        reconcile_stat_counters('signalement')
+        invalidate_signalement_cache()
+    print(f"✅ Compteurs de médias renseignés pour {total} signalement(s)")
+    return total
+
+
+# ========== COMMANDES CLI ==========
+
+signalements_cli = AppGroup('signalements', help="Maintenance des signalements")
+
+
+@signalements_cli.command('backfill-media')
+@click.option('--batch-size', default=500, show_default=True)
+def backfill_media_command(batch_size):
+    """Calcule les compteurs de médias manquants"""
+    click.echo(f"{backfill_media_counters(batch_size)} signalement(s) mis à jour")
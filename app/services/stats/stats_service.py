@@ -0,0 +1,271 @@
+# app/services/stats/stats_service.py
+"""
+Compteurs matérialisés des tableaux de bord (table stat_counters).
+
+Avant chaque flush, la contribution de chaque signalement / pétition modifié
+est calculée sur son état précédent et son nouvel état ; la différence est
+appliquée dans la même transaction par un UPSERT atomique (value = value + n).
+Les écritures en masse (bulk_*, Query.update) ne passent pas par le flush :
+reconcile_stat_counters() recalcule alors les compteurs depuis les tables sources.
+"""
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import Petition, Signalement, StatCounter
+
+MEDIA_CATEGORY_COLUMNS = {
+    'images': 'media_images',
+    'videos': 'media_videos',
+    'audios': 'media_audios',
+    'documents': 'media_documents'
+}
+
+
+def signalement_contributions(state):
+    """Compteurs auxquels contribue un signalement (état sous forme de dict)"""
+    counters = Counter()
+    if state.get('is_deleted'):
+        return counters
+
+    type_sig = state.get('typeSignalement')
+    media_count = state.get('media_count') or 0
+    counters['total'] += 1
+    counters[f"statut:{state.get('statut')}"] += 1
+    counters[f"type:{type_sig}"] += 1
+    if state.get('has_location'):
+        counters['location'] += 1
+        counters[f"type_location:{type_sig}"] += 1
+    if media_count > 0:
+        counters['with_media'] += 1
+        counters[f"type_with_media:{type_sig}"] += 1
+        counters['media:total'] += media_count
+        for category, column in MEDIA_CATEGORY_COLUMNS.items():
+            if state.get(column):
+                counters[f"media:{category}"] += state[column]
+    return counters
+
+
+def petition_contributions(state):
+    """Compteurs auxquels contribue une pétition (état sous forme de dict)"""
+    counters = Counter()
+    if state.get('is_deleted'):
+        return counters
+
+    counters['total'] += 1
+    counters[f"statut:{state.get('statut')}"] += 1
+    counters[f"destinataire:{state.get('destinataire')}"] += 1
+    date_fin = state.get('dateFin')
+    if date_fin:
+        # Histogramme par jour de fin : les pétitions expirées se lisent par plage de clés
+        counters[f"fin:{date_fin.date().isoformat()}"] += 1
+    return counters
+
+
+# Modèle suivi -> (périmètre, colonnes lues, calcul des contributions)
+TRACKED_MODELS = {
+    Signalement: (
+        'signalement',
+        ('is_deleted', 'statut', 'typeSignalement', 'has_location', 'media_count', *MEDIA_CATEGORY_COLUMNS.values()),
+        signalement_contributions
+    ),
+    Petition: (
+        'petition',
+        ('is_deleted', 'statut', 'destinataire', 'dateFin'),
+        petition_contributions
+    ),
+}
+
+
+def _current_state(obj, fields):
+    state = {}
+    for field in fields:
+        value = getattr(obj, field)
+        if value is None:
+            # Valeur par défaut de colonne appliquée à l'INSERT (ex: statut, is_deleted)
+            default = obj.__table__.c[field].default
+            if default is not None and default.is_scalar:
+                value = default.arg
+        state[field] = value
+    return state
+
+
+def _previous_state(session, obj, fields):
+    """État en base avant la modification ; relu si une ancienne valeur n'est pas chargée"""
+    insp = inspect(obj)
+    state = {}
+    for field in fields:
+        history = insp.attrs[field].history
+        if history.deleted:
+            state[field] = history.deleted[0]
+        elif history.unchanged:
+            state[field] = history.unchanged[0]
+        else:
+            break
+    else:
+        return state
+
+    model = type(obj)
+    pk_column = insp.mapper.primary_key[0]
+    row = session.connection().execute(
+        select(*[getattr(model, field) for field in fields]).where(pk_column == insp.identity[0])
+    ).one_or_none()
+    return dict(zip(fields, row)) if row is not None else {'is_deleted': True}
+
+
+def _upsert_counter(connection, scope, name, value, update):
+    """INSERT du compteur (scope, name) à `value`, ou UPDATE `update` s'il existe (atomique)"""
+    table = StatCounter.__table__
+    values = {'scope': scope, 'name': name, 'value': value, 'updated_at': update['updated_at']}
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        connection.execute(mysql_insert(table).values(**values).on_duplicate_key_update(**update))
+    elif dialect == 'sqlite':
+        connection.execute(
+            sqlite_insert(table).values(**values).on_conflict_do_update(index_elements=['scope', 'name'], set_=update)
+        )
+    else:
+        updated = connection.execute(
+            table.update().where(table.c.scope == scope, table.c.name == name).values(**update)
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(**values))
+
+
+def _apply_deltas(connection, deltas):
+    """
+    UPSERT atomique de chaque delta (scope, name) -> n. Les clés sont triées : deux
+    transactions verrouillent toujours les lignes dans le même ordre (pas d'interblocage
+    entre en_attente -> en_cours et en_cours -> en_attente).
+    """
+    table = StatCounter.__table__
+    now = datetime.utcnow()
+
+    for (scope, name), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        _upsert_counter(connection, scope, name, delta, {'value': table.c.value + delta, 'updated_at': now})
+
+
+def _record_stat_deltas(session, flush_context, instances):
+    """Listener before_flush : répercute les objets ajoutés, modifiés et supprimés sur les compteurs"""
+    deltas = Counter()
+
+    def add(obj, state, sign):
+        scope, _, contributions = TRACKED_MODELS[type(obj)]
+        for name, n in contributions(state).items():
+            deltas[(scope, name)] += sign * n
+
+    for obj in session.new:
+        if type(obj) in TRACKED_MODELS:
+            add(obj, _current_state(obj, TRACKED_MODELS[type(obj)][1]), 1)
+
+    for obj in session.dirty:
+        if type(obj) in TRACKED_MODELS and session.is_modified(obj, include_collections=False):
+            fields = TRACKED_MODELS[type(obj)][1]
+            add(obj, _previous_state(session, obj, fields), -1)
+            add(obj, _current_state(obj, fields), 1)
+
+    for obj in session.deleted:
+        if type(obj) in TRACKED_MODELS:
+            add(obj, _previous_state(session, obj, TRACKED_MODELS[type(obj)][1]), -1)
+
+    if any(deltas.values()):
+        _apply_deltas(session.connection(), deltas)
+
+
+if not event.contains(db.session, 'before_flush', _record_stat_deltas):
+    event.listen(db.session, 'before_flush', _record_stat_deltas)
+
+
+def get_stat_counters(scope, prefix=None):
+    """Compteurs d'un périmètre : {name: value} (lecture d'index, sans parcours des tables sources)"""
+    query = db.session.query(StatCounter.name, StatCounter.value).filter(StatCounter.scope == scope)
+    if prefix:
+        query = query.filter(StatCounter.name.startswith(prefix, autoescape=True))
+    return {name: int(value) for name, value in query.all()}
+
+
+def counters_by_prefix(counters, prefix):
+    """Sous-ensemble {suffixe: valeur} des compteurs non nuls d'une famille ('statut:', 'type:'...)"""
+    return {
+        name[len(prefix):]: value
+        for name, value in counters.items()
+        if name.startswith(prefix) and value
+    }
+
+
+def compute_stat_counters(scope, batch_size=1000):
+    """Recalcule les compteurs d'un périmètre depuis la table source (lecture en colonnes, par lots)"""
+    model = next(m for m, (name, _, _) in TRACKED_MODELS.items() if name == scope)
+    _, fields, contributions = TRACKED_MODELS[model]
+
+    expected = Counter()
+    rows = db.session.execute(
+        select(*[getattr(model, field) for field in fields]).where(model.is_deleted == False).execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        expected.update(contributions(dict(zip(fields, row))))
+    return expected
+
+
+def reconcile_stat_counters(scope=None):
+    """
+    Corrige les compteurs qui ont dérivé des tables sources. Les lignes du
+    périmètre sont verrouillées pendant le recalcul : les écritures concurrentes
+    attendent la fin de la réconciliation puis appliquent leur delta.
+    Retourne {scope: nombre de compteurs corrigés}.
+    """
+    corrected = {}
+    for name, _, _ in TRACKED_MODELS.values():
+        if scope and scope != name:
+            continue
+        try:
+            current = dict(
+                db.session.query(StatCounter.name, StatCounter.value).filter_by(scope=name).with_for_update().all()
+            )
+            expected = compute_stat_counters(name)
+
+            # UPSERT (SET value = attendu) : un compteur créé entre-temps par une écriture
+            # concurrente est mis à jour au lieu de violer uq_stat_counters_scope_name
+            fixes = 0
+            connection = db.session.connection()
+            for counter_name in sorted(set(current) | set(expected)):
+                value = expected.get(counter_name, 0)
+                if counter_name in current:
+                    if current[counter_name] == value:
+                        continue
+                elif not value:
+                    continue
+                _upsert_counter(connection, name, counter_name, value, {'value': value, 'updated_at': datetime.utcnow()})
+                fixes += 1
+
+            db.session.commit()
+            corrected[name] = fixes
+            if fixes:
+                print(f"📊 Compteurs {name}: {fixes} valeur(s) corrigée(s)")
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Erreur réconciliation compteurs {name}: {e}")
+            raise
+    return corrected
+
+
+# ========== COMMANDES CLI ==========
+
+stats_cli = AppGroup('stats', help="Compteurs des tableaux de bord")
+
+
+@stats_cli.command('reconcile')
+@click.option('--scope', type=click.Choice(['signalement', 'petition']), default=None)
+def reconcile_command(scope):
+    """Recalcule les compteurs depuis les signalements et pétitions"""
+    for name, fixes in reconcile_stat_counters(scope).items():
+        click.echo(f"{name}: {fixes} compteur(s) corrigé(s)")
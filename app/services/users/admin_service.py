@@ -1,5 +1,5 @@
 
-from app import db
+from app import db, invalidate_tags
 from app.models import Admin, User
 from datetime import datetime
 from flask_bcrypt import Bcrypt
@@ -10,6 +10,11 @@ from flask_caching import logger # type: ignore
 # Initialiser Bcrypt
 bcrypt = Bcrypt()
 
+
+def _cache_tags(admin):
+    """Tags de cache touchés par une écriture sur un administrateur"""
+    return [f'user:{admin.IDuser}', 'users', f'{admin.type_user}:{admin.IDuser}', f'{admin.type_user}s']
+
 # Service de Création
 def create_admin(nom, adresse, password, role, username, image, telephone, prenom):
     hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
@@ -21,6 +26,7 @@ def create_admin(nom, adresse, password, role, username, image, telephone, preno
     )
     db.session.add(new_admin)
     db.session.commit()
+    invalidate_tags(*_cache_tags(new_admin))
     return new_admin
 
 # Service de Lecture
@@ -54,6 +60,7 @@ def update_admin(admin_id, nom=None, adresse=None, password=None, role=None, use
         admin.prenom = prenom
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(admin))
     return admin
 
 # Service de Suppression Logique
@@ -63,6 +70,7 @@ def delete_admin(admin_id):
         admin.is_deleted = True
         admin.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(admin))
         return True
     return False
 
@@ -1,4 +1,4 @@
-from app import db
+from app import db, invalidate_tags
 from app.models import Authorite
 from datetime import datetime
 from flask_bcrypt import Bcrypt
@@ -7,6 +7,11 @@ from flask_jwt_extended import create_access_token
 # Initialiser Bcrypt
 bcrypt = Bcrypt()
 
+
+def _cache_tags(authorite):
+    """Tags de cache touchés par une écriture sur une autorité"""
+    return [f'user:{authorite.IDuser}', 'users', f'{authorite.type_user}:{authorite.IDuser}', f'{authorite.type_user}s']
+
 # Service de Création
 def create_authorite(nom, adresse, password, role, username, image, telephone, typeAuthorite, description):
     hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
@@ -19,6 +24,7 @@ def create_authorite(nom, adresse, password, role, username, image, telephone, t
     )
     db.session.add(new_authorite)
     db.session.commit()
+    invalidate_tags(*_cache_tags(new_authorite))
     return new_authorite
 
 # Service de Lecture
@@ -54,6 +60,7 @@ def update_authorite(authorite_id, nom=None, adresse=None, password=None, role=N
         authorite.description = description
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(authorite))
     return authorite
 
 # Service de Suppression Logique
@@ -63,6 +70,7 @@ def delete_authorite(authorite_id):
         authorite.is_deleted = True
         authorite.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(authorite))
         return True
     return False
 
@@ -1,5 +1,5 @@
 # app/services/users/citoyen_service.py - VERSION CORRIGÉE
-from app import db
+from app import db, invalidate_tags
 from app.models import Citoyen
 from datetime import datetime
 from flask_bcrypt import Bcrypt
@@ -9,6 +9,11 @@ from flask_jwt_extended import create_access_token as jwt_create_access_token
 # Initialiser Bcrypt
 bcrypt = Bcrypt()
 
+
+def _cache_tags(citoyen):
+    """Tags de cache touchés par une écriture sur un citoyen"""
+    return [f'user:{citoyen.IDuser}', 'users', f'{citoyen.type_user}:{citoyen.IDuser}', f'{citoyen.type_user}s']
+
 # Service de Création
 def create_citoyen(nom, adresse, password, role, username, image, telephone, prenom):
     """Crée un nouveau citoyen avec validation."""
@@ -28,6 +33,7 @@ def create_citoyen(nom, adresse, password, role, username, image, telephone, pre
         )
         db.session.add(new_citoyen)
         db.session.commit()
+        invalidate_tags(*_cache_tags(new_citoyen))
         return new_citoyen
     except Exception as e:
         db.session.rollback()
@@ -69,6 +75,7 @@ def update_citoyen(citoyen_id, nom=None, adresse=None, password=None, role=None,
             citoyen.prenom = prenom
 
         db.session.commit()
+        invalidate_tags(*_cache_tags(citoyen))
         return citoyen
     except Exception as e:
         db.session.rollback()
@@ -101,6 +108,7 @@ def update_citoyen_by_telephone(telephone, nom=None, adresse=None, password=None
             citoyen.prenom = prenom
 
         db.session.commit()
+        invalidate_tags(*_cache_tags(citoyen))
         return citoyen
     except Exception as e:
         db.session.rollback()
@@ -116,6 +124,7 @@ def delete_citoyen(citoyen_id):
             citoyen.is_deleted = True
             citoyen.dateDeleted = datetime.utcnow()
             db.session.commit()
+            invalidate_tags(*_cache_tags(citoyen))
             return True
         return False
     except Exception as e:
@@ -160,6 +169,7 @@ def change_password_secure(citoyen_id, old_password, new_password):
         
         citoyen.password = bcrypt.generate_password_hash(new_password).decode('utf-8')
         db.session.commit()
+        invalidate_tags(*_cache_tags(citoyen))
         return {'success': True, 'message': 'Mot de passe modifié avec succès'}
     except Exception as e:
         db.session.rollback()
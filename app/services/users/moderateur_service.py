@@ -1,4 +1,4 @@
-from app import db
+from app import db, invalidate_tags
 from app.models import Moderateur
 from datetime import datetime
 from flask_bcrypt import Bcrypt
@@ -7,6 +7,11 @@ from flask_jwt_extended import create_access_token
 # Initialiser Bcrypt
 bcrypt = Bcrypt()
 
+
+def _cache_tags(moderateur):
+    """Tags de cache touchés par une écriture sur un modérateur"""
+    return [f'user:{moderateur.IDuser}', 'users', f'{moderateur.type_user}:{moderateur.IDuser}', f'{moderateur.type_user}s']
+
 # Service de Création
 def create_moderateur(nom, adresse, password, role, username, image, telephone, prenom):
     hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
@@ -18,6 +23,7 @@ def create_moderateur(nom, adresse, password, role, username, image, telephone,
     )
     db.session.add(new_moderateur)
     db.session.commit()
+    invalidate_tags(*_cache_tags(new_moderateur))
     return new_moderateur
 
 # Service de Lecture
@@ -51,6 +57,7 @@ def update_moderateur(moderateur_id, nom=None, adresse=None, password=None, role
         moderateur.prenom = prenom
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(moderateur))
     return moderateur
 
 # Service de Suppression Logique
@@ -60,6 +67,7 @@ def delete_moderateur(moderateur_id):
         moderateur.is_deleted = True
         moderateur.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(moderateur))
         return True
     return False
 
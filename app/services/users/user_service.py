@@ -1,4 +1,4 @@
-from app import db
+from app import db, invalidate_tags
 from app.models import User, Admin, Authorite, Citoyen, Moderateur
 from datetime import datetime
 from flask_bcrypt import Bcrypt
@@ -7,6 +7,11 @@ from flask_jwt_extended import create_access_token
 # Initialiser Bcrypt
 bcrypt = Bcrypt()
 
+
+def _cache_tags(user):
+    """Tags de cache touchés par une écriture sur un utilisateur"""
+    return [f'user:{user.IDuser}', 'users', f'{user.type_user}:{user.IDuser}', f'{user.type_user}s']
+
 # Service de Création
 def create_user(nom, adresse, password, role, username, image, telephone, user_type, **kwargs):
     hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
@@ -43,6 +48,7 @@ def create_user(nom, adresse, password, role, username, image, telephone, user_t
     if new_user:
         db.session.add(new_user)
         db.session.commit()
+        invalidate_tags(*_cache_tags(new_user))
         # Ajouter des claims personnalisés au token JWT
         additional_claims = {
             'nom': new_user.nom,
@@ -104,6 +110,7 @@ def update_user(user_id, nom=None, adresse=None, password=None, role=None, usern
             user.prenom = kwargs['prenom']
 
     db.session.commit()
+    invalidate_tags(*_cache_tags(user))
     return user
 
 # Service de Suppression Logique
@@ -113,6 +120,7 @@ def delete_user(user_id):
         user.is_deleted = True
         user.dateDeleted = datetime.utcnow()
         db.session.commit()
+        invalidate_tags(*_cache_tags(user))
         return True
     return False
 
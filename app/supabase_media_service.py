@@ -1,23 +1,57 @@
+import importlib.util
 import os
 import re
+import threading
+import time
 import unicodedata
 import uuid
 import hashlib
 from datetime import datetime
 from dotenv import load_dotenv
+from flask import has_app_context
 import mimetypes
-from typing import Optional, Dict, List
+from typing import TYPE_CHECKING, Optional, Dict, List, Union
+
+from app.utils.media_buffer import MediaBuffer
 
 load_dotenv()
 
-# Import conditionnel de Supabase
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
+# Import conditionnel de Supabase : le SDK n'est chargé qu'à la création du premier client
+SUPABASE_AVAILABLE = importlib.util.find_spec('supabase') is not None
+if not SUPABASE_AVAILABLE:
     print("⚠️ Supabase non installé - pip install supabase")
-    SUPABASE_AVAILABLE = False
-    Client = None
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+def create_client(url: str, key: str) -> 'Client':
+    """Crée un client Supabase (import différé du SDK, hors du démarrage de l'application)"""
+    from supabase import create_client as supabase_create_client
+    return supabase_create_client(url, key)
+
+# Vérification du bucket mémorisée (secondes) : évite un list_buckets avant chaque upload
+BUCKET_CHECK_TTL = int(os.getenv('SUPABASE_BUCKET_CHECK_TTL', 3600))
+
+# Registre du processus : un client par (url, clé), un service par rôle, réutilisés par tous les appelants
+_registry_lock = threading.Lock()
+_clients: Dict[tuple, 'Client'] = {}
+_services: Dict[bool, 'SupabaseMediaService'] = {}
+_bucket_checks: Dict[tuple, Dict] = {}
+
+
+def get_supabase_client(url: str, key: str):
+    """Client Supabase partagé (et ses connexions HTTP) pour cette URL et cette clé"""
+    if not SUPABASE_AVAILABLE:
+        raise ImportError("Supabase non disponible - installez avec: pip install supabase")
+    client = _clients.get((url, key))
+    if client is None:
+        with _registry_lock:
+            client = _clients.get((url, key))
+            if client is None:
+                client = _clients[(url, key)] = create_client(url, key)
+    return client
+
 
 class SupabaseMediaService:
     """Service principal pour la gestion des médias avec Supabase"""
@@ -41,7 +75,8 @@ class SupabaseMediaService:
                 raise ValueError("SUPABASE_ANON_KEY non définie dans l'environnement")
             print("🔓 Utilisation de la clé ANON pour les opérations frontend")
             
-        self.supabase: Client = create_client(url, key) # type: ignore
+        self.supabase: 'Client' = get_supabase_client(url, key)
+        self.supabase_url = url
         self.bucket_name = os.getenv('SUPABASE_BUCKET_NAME', 'signalements')
         self.use_service_role = use_service_role
         
@@ -79,8 +114,36 @@ class SupabaseMediaService:
                 return category
         return 'others'  # Catégorie par défaut
     
-    def create_bucket_if_not_exists(self):
-        """Créer le bucket s'il n'existe pas"""
+    def ensure_bucket(self, max_age: int = None) -> bool:
+        """
+        Vérifie (et crée si besoin) le bucket, au plus une fois par `max_age` secondes
+        pour tout le processus. Retourne True si le bucket existe.
+        """
+        return self.bucket_status(max_age)['bucket_exists']
+
+    def bucket_status(self, max_age: int = None) -> Dict[str, any]:
+        """Dernier état connu du bucket ; nouvelle vérification quand il a expiré"""
+        max_age = BUCKET_CHECK_TTL if max_age is None else max_age
+        check_key = (self.supabase_url, self.bucket_name)
+        status = _bucket_checks.get(check_key)
+
+        if status is None or time.monotonic() - status['checked_at'] > max_age:
+            exists = self.create_bucket_if_not_exists()
+            status = {'bucket_exists': exists, 'checked_at': time.monotonic(), 'checked_at_utc': datetime.utcnow().isoformat()}
+            if exists:
+                _bucket_checks[check_key] = status
+            else:
+                # Échec non mémorisé : nouvelle tentative au prochain appel
+                _bucket_checks.pop(check_key, None)
+
+        return {
+            'bucket_exists': status['bucket_exists'],
+            'checked_at': status['checked_at_utc'],
+            'age_seconds': round(time.monotonic() - status['checked_at'], 1)
+        }
+
+    def create_bucket_if_not_exists(self) -> bool:
+        """Créer le bucket s'il n'existe pas ; retourne True si le bucket existe"""
         try:
             # Vérifier si le bucket existe
             buckets = self.supabase.storage.list_buckets()
@@ -94,6 +157,7 @@ class SupabaseMediaService:
                         {"public": True}
                     )
                     print(f"✅ Bucket '{self.bucket_name}' créé")
+                    return True
                 except Exception as create_error:
                     # Vérifier si le bucket existe maintenant
                     buckets_after = self.supabase.storage.list_buckets()
@@ -103,11 +167,14 @@ class SupabaseMediaService:
                         print(f"ℹ️ Bucket '{self.bucket_name}' existe déjà")
                     else:
                         print(f"❌ Erreur création bucket: {create_error}")
+                    return bucket_exists_after
             else:
                 print(f"ℹ️ Bucket '{self.bucket_name}' existe déjà")
+                return True
                 
         except Exception as e:
             print(f"❌ Erreur vérification bucket: {e}")
+            return False
     
     def generate_unique_path(self, original_filename: str, citoyen_id: int, mimetype: str) -> str:
         """Génère un chemin unique organisé par type de fichier avec nettoyage amélioré"""
@@ -212,8 +279,12 @@ class SupabaseMediaService:
         
         return True
 
-    def upload_media(self, file_data: bytes, original_filename: str, mimetype: str, citoyen_id: int, upload_context: str = 'standard') -> Dict[str, any]:
-        """Upload un média avec classification automatique et contexte"""
+    def upload_media(self, file_data: Union[bytes, MediaBuffer], original_filename: str, mimetype: str, citoyen_id: int, upload_context: str = 'standard') -> Dict[str, any]:
+        """
+        Upload un média avec classification automatique et contexte.
+        `file_data` peut être un MediaBuffer : le contenu déversé sur disque est alors envoyé en streaming.
+        Un contenu déjà stocké (même SHA-256) n'est pas ré-uploadé : l'objet existant est référencé.
+        """
         if not self.use_service_role:
             raise ValueError("Les uploads nécessitent la clé SERVICE_ROLE")
         
@@ -227,8 +298,8 @@ class SupabaseMediaService:
             if len(file_data) == 0:
                 raise ValueError("Fichier vide")
             
-            # S'assurer que le bucket existe
-            self.create_bucket_if_not_exists()
+            # S'assurer que le bucket existe (vérification mémorisée)
+            self.ensure_bucket()
             
             # Détecter le mimetype si nécessaire
             if not mimetype or mimetype == 'application/octet-stream':
@@ -236,35 +307,69 @@ class SupabaseMediaService:
                 if detected_type:
                     mimetype = detected_type
             
-            # Générer le chemin selon le contexte
-            if upload_context in ['republication', 'republication_base64']:
-                storage_path = self._generate_republication_path(original_filename, citoyen_id, mimetype)
-            else:
-                storage_path = self.generate_unique_path(original_filename, citoyen_id, mimetype)
-            
             category = self.get_file_category(mimetype)
             
-            print(f"📁 Catégorie: {category}, Chemin: {storage_path}")
+            # Index des contenus (hors contexte applicatif : upload simple, sans déduplication)
+            from app.services.signal import media_store_service
+            content_index = media_store_service if has_app_context() else None
+            sha256 = media_store_service.content_sha256(file_data)
             
-            # Options de fichier simplifiées
-            file_options = {
-                "content-type": mimetype,
-                "upsert": False,
-                "cache-control": "3600"
-            }
-            
-            # Upload vers Supabase
-            response = self.supabase.storage.from_(self.bucket_name).upload(
-                path=storage_path,
-                file=file_data,
-                file_options=file_options
-            )
-            
-            # Vérifier le succès
-            if hasattr(response, 'error') and response.error:
-                raise Exception(f"Erreur upload: {response.error}")
+            storage_path = None
+            if content_index:
+                try:
+                    storage_path = content_index.acquire_media(sha256, self.bucket_name)
+                except Exception as e:
+                    print(f"⚠️ Index des médias indisponible, upload sans déduplication: {e}")
+                    content_index = None
+            deduplicated = storage_path is not None
             
-            print(f"✅ Upload Supabase réussi pour {original_filename}")
+            if deduplicated:
+                print(f"♻️ Contenu déjà stocké, upload évité: {storage_path}")
+            else:
+                # Générer le chemin selon le contexte
+                if upload_context in ['republication', 'republication_base64']:
+                    storage_path = self._generate_republication_path(original_filename, citoyen_id, mimetype)
+                else:
+                    storage_path = self.generate_unique_path(original_filename, citoyen_id, mimetype)
+                
+                print(f"📁 Catégorie: {category}, Chemin: {storage_path}")
+                
+                # Options de fichier simplifiées
+                file_options = {
+                    "content-type": mimetype,
+                    "upsert": False,
+                    "cache-control": "3600"
+                }
+                
+                # Upload vers Supabase
+                source = file_data.upload_source() if isinstance(file_data, MediaBuffer) else file_data
+                try:
+                    response = self.supabase.storage.from_(self.bucket_name).upload(
+                        path=storage_path,
+                        file=source,
+                        file_options=file_options
+                    )
+                finally:
+                    if hasattr(source, 'close'):
+                        source.close()
+                
+                # Vérifier le succès
+                if hasattr(response, 'error') and response.error:
+                    raise Exception(f"Erreur upload: {response.error}")
+                
+                print(f"✅ Upload Supabase réussi pour {original_filename}")
+                
+                indexed_path = storage_path
+                if content_index:
+                    try:
+                        indexed_path = content_index.register_media(sha256, storage_path, self.bucket_name, mimetype, len(file_data))
+                    except Exception as e:
+                        # Objet non indexé : supprimé directement à sa libération
+                        print(f"⚠️ Média non indexé {storage_path}: {e}")
+                if indexed_path != storage_path:
+                    # Même contenu indexé entre-temps par un upload concurrent : garder celui-ci
+                    self.supabase.storage.from_(self.bucket_name).remove([storage_path])
+                    storage_path, deduplicated = indexed_path, True
             
             # Générer URL publique
             public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(storage_path)
@@ -284,7 +389,9 @@ class SupabaseMediaService:
                 'mimetype': mimetype,
                 'category': category,
                 'size': len(file_data),
-                'hash': hashlib.md5(file_data).hexdigest(),
+                'hash': file_data.md5 if isinstance(file_data, MediaBuffer) else hashlib.md5(file_data).hexdigest(),
+                'sha256': sha256,
+                'deduplicated': deduplicated,
                 'uploaded_at': datetime.utcnow().isoformat(),
                 'upload_context': upload_context,
                 'provider': 'supabase',
@@ -338,13 +445,22 @@ class SupabaseMediaService:
         return urls
 
     def delete_media(self, storage_path: str) -> bool:
-        """Supprime un média"""
+        """Libère une référence au média ; l'objet n'est supprimé du bucket qu'à la dernière"""
         if not self.use_service_role:
             print("❌ La suppression nécessite la clé SERVICE_ROLE")
             return False
         
         try:
-            response = self.supabase.storage.from_(self.bucket_name).remove([storage_path])
+            if has_app_context():
+                from app.services.signal.media_store_service import release_media
+                if not release_media(storage_path):
+                    print(f"♻️ Média encore référencé, conservé: {storage_path}")
+                    return True
+            
+            # L'original et ses dérivés WebP (chemins absents ignorés par le stockage)
+            from app.services.signal.media_derivative_service import DERIVATIVE_NAMES, derivative_path
+            paths = [storage_path] + [derivative_path(storage_path, name) for name in DERIVATIVE_NAMES]
+            response = self.supabase.storage.from_(self.bucket_name).remove(paths)
             if hasattr(response, 'error') and response.error:
                 print(f"❌ Erreur suppression: {response.error}")
                 return False
@@ -416,20 +532,28 @@ class SupabaseMediaService:
 
 
 class SupabaseServiceFactory:
-    """Factory pour créer les instances appropriées"""
+    """Factory des instances partagées du processus (une par rôle)"""
+    
+    @staticmethod
+    def _shared_service(use_service_role: bool) -> SupabaseMediaService:
+        service = _services.get(use_service_role)
+        if service is None:
+            # setdefault atomique : en cas de course, la première instance enregistrée est conservée
+            service = _services.setdefault(use_service_role, SupabaseMediaService(use_service_role=use_service_role))
+        return service
     
     @staticmethod
     def create_server_service():
         """Service pour operations serveur"""
-        return SupabaseMediaService(use_service_role=True)
+        return SupabaseServiceFactory._shared_service(True)
     
     @staticmethod  
     def create_client_service():
         """Service pour operations frontend"""
-        return SupabaseMediaService(use_service_role=False)
+        return SupabaseServiceFactory._shared_service(False)
 
 def get_media_service():
-    """Retourne le service approprié selon le contexte"""
+    """Retourne le service serveur partagé du processus"""
     if not SUPABASE_AVAILABLE:
         raise ImportError("Supabase non disponible")
     return SupabaseServiceFactory.create_server_service()
@@ -0,0 +1,332 @@
+# app/utils/geo.py
+"""Outils géographiques : geohash, distances et index spatial en mémoire"""
+import threading
+import time
+from math import radians, degrees, cos, sin, tan, asin, atan, sinh, sqrt, floor, log, pi
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+MERCATOR_MAX_LAT = 85.0511287798
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distance haversine en kilomètres entre deux points"""
+    lat1, lng1, lat2, lng2 = map(radians, (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlng / 2) ** 2
+    return 2 * asin(min(1.0, sqrt(a))) * EARTH_RADIUS_KM
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Boîte englobante (min_lat, min_lng, max_lat, max_lng) d'un cercle de rayon donné"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = cos(radians(latitude))
+    if cos_lat < 1e-6:
+        dlng = 180.0
+    else:
+        dlng = min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+
+    return (
+        max(-90.0, latitude - dlat),
+        max(-180.0, longitude - dlng),
+        min(90.0, latitude + dlat),
+        min(180.0, longitude + dlng),
+    )
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = 9) -> str:
+    """Encode des coordonnées GPS en geohash"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits = bits << 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits = bits << 1
+                lat_range[1] = mid
+
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def geohash_cell_degrees(precision: int) -> Tuple[float, float]:
+    """Dimensions (hauteur, largeur) en degrés d'une cellule geohash"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def geohash_precision_for_radius(radius_km: float, latitude: float = 0.0) -> int:
+    """Précision geohash la plus fine dont les cellules couvrent le rayon demandé"""
+    cos_lat = max(cos(radians(latitude)), 1e-6)
+    for precision in range(9, 0, -1):
+        lat_deg, lng_deg = geohash_cell_degrees(precision)
+        height_km = lat_deg * KM_PER_DEGREE_LAT
+        width_km = lng_deg * KM_PER_DEGREE_LAT * cos_lat
+        if min(height_km, width_km) >= radius_km:
+            return precision
+    return 1
+
+
+def geohash_cells_for_bbox(min_lat: float, min_lng: float, max_lat: float, max_lng: float, precision: int) -> Set[str]:
+    """Liste des cellules geohash qui recouvrent une boîte englobante"""
+    lat_step, lng_step = geohash_cell_degrees(precision)
+
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            cells.add(encode_geohash(lat, lng, precision))
+            if lng >= max_lng:
+                break
+            lng = min(max_lng, lng + lng_step)
+        if lat >= max_lat:
+            break
+        lat = min(max_lat, lat + lat_step)
+
+    return cells
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Boîte englobante (min_lat, min_lng, max_lat, max_lng) d'une tuile Web Mercator z/x/y"""
+    n = 2 ** z
+
+    def tile_lat(row):
+        return degrees(atan(sinh(pi * (1 - 2 * row / n))))
+
+    return tile_lat(y + 1), x / n * 360.0 - 180.0, tile_lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def tile_for_point(latitude: float, longitude: float, z: int) -> Tuple[int, int]:
+    """Tuile (x, y) contenant un point au niveau de zoom z"""
+    n = 2 ** z
+    latitude = max(-MERCATOR_MAX_LAT, min(MERCATOR_MAX_LAT, latitude))
+    lat_rad = radians(latitude)
+    x = int(floor((longitude + 180.0) / 360.0 * n))
+    y = int(floor((1 - log(tan(lat_rad) + 1 / cos(lat_rad)) / pi) / 2 * n))
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def geohash_precision_for_tile(z: int, cells_per_tile: int = 8, max_precision: int = 9) -> int:
+    """Précision geohash dont les cellules découpent une tuile en environ `cells_per_tile` colonnes"""
+    tile_width = 360.0 / (2 ** z)
+    precision = 1
+    for candidate in range(1, max_precision + 1):
+        if tile_width / geohash_cell_degrees(candidate)[1] > cells_per_tile * 2:
+            break
+        precision = candidate
+    return precision
+
+
+def haversine_km_np(lat1, lng1, lat2, lng2):
+    """Distance haversine vectorisée (tableaux NumPy, diffusion autorisée)"""
+    lat1, lng1, lat2, lng2 = (np.radians(v) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) * EARTH_RADIUS_KM
+
+
+def dbscan_labels(latitudes, longitudes, eps_km: float, min_samples: int) -> np.ndarray:
+    """
+    Regroupement par densité (DBSCAN) des points GPS.
+
+    Les points sont d'abord répartis dans une grille de cellules de `eps_km` :
+    les voisins d'un point ne sont cherchés que dans les 9 cellules adjacentes,
+    avec un calcul de distance vectorisé par cellule. Retourne un tableau
+    d'étiquettes de cluster (-1 pour le bruit).
+    """
+    lat = np.asarray(latitudes, dtype=float)
+    lng = np.asarray(longitudes, dtype=float)
+    n = len(lat)
+    labels = np.full(n, -1, dtype=int)
+    if n == 0:
+        return labels
+
+    # Largeur de cellule en longitude calculée à la latitude la plus élevée
+    # pour qu'aucune paire à moins de eps ne soit à plus d'une cellule d'écart
+    lat_cell = eps_km / KM_PER_DEGREE_LAT
+    max_cos = max(np.cos(np.radians(np.abs(lat).max())), 1e-6)
+    lng_cell = min(360.0, eps_km / (KM_PER_DEGREE_LAT * max_cos))
+
+    cell_y = np.floor(lat / lat_cell).astype(np.int64)
+    cell_x = np.floor(lng / lng_cell).astype(np.int64)
+
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    for i, cell in enumerate(zip(cell_y.tolist(), cell_x.tolist())):
+        buckets.setdefault(cell, []).append(i)
+    buckets_np = {cell: np.array(members, dtype=np.int64) for cell, members in buckets.items()}
+
+    neighbors: List[np.ndarray] = [None] * n
+    for (cy, cx), members in buckets_np.items():
+        candidates = [
+            buckets_np[(cy + dy, cx + dx)]
+            for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+            if (cy + dy, cx + dx) in buckets_np
+        ]
+        candidates = np.concatenate(candidates)
+        distances = haversine_km_np(
+            lat[members][:, None], lng[members][:, None],
+            lat[candidates][None, :], lng[candidates][None, :]
+        )
+        within = distances <= eps_km
+        for row, point in enumerate(members.tolist()):
+            neighbors[point] = candidates[within[row]]
+
+    is_core = np.array([len(nb) >= min_samples for nb in neighbors], dtype=bool)
+
+    cluster_id = 0
+    for start in np.flatnonzero(is_core).tolist():
+        if labels[start] != -1:
+            continue
+        labels[start] = cluster_id
+        stack = [start]
+        while stack:
+            point = stack.pop()
+            for other in neighbors[point].tolist():
+                if labels[other] == -1:
+                    labels[other] = cluster_id
+                    if is_core[other]:
+                        stack.append(other)
+        cluster_id += 1
+
+    return labels
+
+
+class SpatialIndex:
+    """
+    Index spatial en mémoire (grille régulière) sur les coordonnées des signalements.
+
+    Chaque point est rangé dans une cellule de `cell_deg` degrés ; une recherche
+    par rayon ne parcourt que les cellules recouvrant la boîte englobante.
+    """
+
+    def __init__(self, cell_deg: float = 0.02):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._points: Dict[int, Tuple[float, float, Tuple[int, int]]] = {}
+        self._lock = threading.RLock()
+        self.loaded_at: Optional[float] = None
+        self.max_id = 0
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (floor(latitude / self.cell_deg), floor(longitude / self.cell_deg))
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, item_id):
+        return item_id in self._points
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def age(self) -> float:
+        """Âge de la dernière reconstruction complète, en secondes"""
+        if self.loaded_at is None:
+            return float('inf')
+        return time.monotonic() - self.loaded_at
+
+    def load(self, points: Iterable[Tuple[int, float, float]]):
+        """Reconstruit entièrement l'index à partir de tuples (id, lat, lng)"""
+        cells: Dict[Tuple[int, int], Set[int]] = {}
+        index: Dict[int, Tuple[float, float, Tuple[int, int]]] = {}
+        max_id = 0
+
+        for item_id, latitude, longitude in points:
+            if latitude is None or longitude is None:
+                continue
+            latitude, longitude = float(latitude), float(longitude)
+            cell = self._cell_of(latitude, longitude)
+            cells.setdefault(cell, set()).add(item_id)
+            index[item_id] = (latitude, longitude, cell)
+            max_id = max(max_id, item_id)
+
+        with self._lock:
+            self._cells = cells
+            self._points = index
+            self.max_id = max_id
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, item_id: int, latitude: float, longitude: float):
+        """Ajoute ou déplace un point"""
+        latitude, longitude = float(latitude), float(longitude)
+        cell = self._cell_of(latitude, longitude)
+
+        with self._lock:
+            previous = self._points.get(item_id)
+            if previous and previous[2] != cell:
+                self._discard_from_cell(item_id, previous[2])
+            self._cells.setdefault(cell, set()).add(item_id)
+            self._points[item_id] = (latitude, longitude, cell)
+            self.max_id = max(self.max_id, item_id)
+
+    def remove(self, item_id: int):
+        """Retire un point de l'index s'il y est présent"""
+        with self._lock:
+            previous = self._points.pop(item_id, None)
+            if previous:
+                self._discard_from_cell(item_id, previous[2])
+
+    def _discard_from_cell(self, item_id: int, cell: Tuple[int, int]):
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(item_id)
+            if not members:
+                del self._cells[cell]
+
+    def points(self) -> List[Tuple[int, float, float]]:
+        """Copie de tous les points indexés (id, lat, lng)"""
+        with self._lock:
+            return [(item_id, lat, lng) for item_id, (lat, lng, _) in self._points.items()]
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, float]]:
+        """
+        Retourne les (id, distance_km) situés dans le rayon, triés par distance.
+        Seules les cellules recouvrant la boîte englobante sont visitées.
+        """
+        min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius_km)
+        min_cell = self._cell_of(min_lat, min_lng)
+        max_cell = self._cell_of(max_lat, max_lng)
+
+        results = []
+        with self._lock:
+            for cell_lat in range(min_cell[0], max_cell[0] + 1):
+                for cell_lng in range(min_cell[1], max_cell[1] + 1):
+                    for item_id in self._cells.get((cell_lat, cell_lng), ()):
+                        lat, lng, _ = self._points[item_id]
+                        distance = haversine_km(latitude, longitude, lat, lng)
+                        if distance <= radius_km:
+                            results.append((item_id, distance))
+
+        results.sort(key=lambda x: x[1])
+        return results
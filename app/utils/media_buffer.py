@@ -0,0 +1,136 @@
+# app/utils/media_buffer.py
+"""Tampon unique pour le contenu d'un média reçu : en mémoire ou déversé sur disque"""
+import base64
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Iterator, Optional, Union
+
+MEDIA_CHUNK_SIZE = 64 * 1024
+# Au-delà de ce seuil, le contenu est écrit dans un fichier temporaire plutôt qu'en RAM
+MEDIA_SPOOL_MAX_MEMORY = int(os.getenv('MEDIA_SPOOL_MAX_MEMORY', 1024 * 1024))
+
+
+class MediaTooLarge(ValueError):
+    """Le flux dépasse la taille maximale autorisée"""
+
+
+class MediaBuffer:
+    """
+    Contenu binaire d'un média, lu une seule fois depuis la requête.
+
+    Les petits fichiers restent en mémoire ; les gros sont copiés par blocs
+    dans un fichier temporaire. La taille et les hash MD5 / SHA-256 sont calculés
+    pendant la copie. La validation IA (base64) et l'upload Supabase lisent ce même
+    tampon, sans copie intermédiaire du fichier complet.
+    """
+
+    def __init__(self, data: Optional[bytes] = None, path: Optional[str] = None, size: int = 0,
+                 md5: Optional[str] = None, sha256: Optional[str] = None):
+        self._data = data
+        self._path = path
+        self.size = size
+        self.md5 = md5
+        self.sha256 = sha256
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, max_size: Optional[int] = None, spool_max_memory: int = None) -> 'MediaBuffer':
+        """Copie un flux par blocs ; lève MediaTooLarge si `max_size` est dépassé"""
+        spool_max_memory = MEDIA_SPOOL_MAX_MEMORY if spool_max_memory is None else spool_max_memory
+        digest = hashlib.md5()
+        content_digest = hashlib.sha256()
+        chunks = []
+        size = 0
+        spill = None
+
+        try:
+            while True:
+                chunk = stream.read(MEDIA_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise MediaTooLarge(f"Fichier trop volumineux (> {max_size} bytes)")
+                digest.update(chunk)
+                content_digest.update(chunk)
+
+                if spill is None and size > spool_max_memory:
+                    spill = tempfile.NamedTemporaryFile(prefix='media_', delete=False)
+                    spill.writelines(chunks)
+                    chunks = []
+                if spill is not None:
+                    spill.write(chunk)
+                else:
+                    chunks.append(chunk)
+        except Exception:
+            if spill is not None:
+                spill.close()
+                os.unlink(spill.name)
+            raise
+
+        if spill is not None:
+            spill.close()
+            return cls(path=spill.name, size=size, md5=digest.hexdigest(), sha256=content_digest.hexdigest())
+        return cls(data=b''.join(chunks), size=size, md5=digest.hexdigest(), sha256=content_digest.hexdigest())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'MediaBuffer':
+        return cls(data=data, size=len(data), md5=hashlib.md5(data).hexdigest(), sha256=hashlib.sha256(data).hexdigest())
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def on_disk(self) -> bool:
+        return self._path is not None
+
+    def iter_chunks(self, chunk_size: int = MEDIA_CHUNK_SIZE) -> Iterator[bytes]:
+        """Parcourt le contenu par blocs"""
+        if self._path is None:
+            view = memoryview(self._data or b'')
+            for start in range(0, len(view), chunk_size):
+                yield bytes(view[start:start + chunk_size])
+            return
+        with open(self._path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def to_base64(self) -> str:
+        """Encodage base64 par blocs (multiples de 3 octets) sans charger le fichier brut"""
+        if self._path is None:
+            return base64.b64encode(self._data or b'').decode('ascii')
+        return ''.join(
+            base64.b64encode(chunk).decode('ascii')
+            for chunk in self.iter_chunks(MEDIA_CHUNK_SIZE - MEDIA_CHUNK_SIZE % 3)
+        )
+
+    def upload_source(self) -> Union[bytes, BinaryIO]:
+        """
+        Source à transmettre au client de stockage : les octets en mémoire,
+        ou un fichier ouvert en lecture (envoyé en streaming, à fermer par l'appelant).
+        """
+        if self._path is None:
+            return self._data or b''
+        return open(self._path, 'rb')
+
+    def getvalue(self) -> bytes:
+        if self._path is None:
+            return self._data or b''
+        with open(self._path, 'rb') as f:
+            return f.read()
+
+    def close(self):
+        """Libère la mémoire ou supprime le fichier temporaire"""
+        self._data = None
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,73 @@
+# app/utils/query_helpers.py
+"""Aides de requêtage : projections d'identifiants, noms affichables et comptage des requêtes SQL"""
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event, select, union
+
+from app import db
+
+
+def column_values(query, column, distinct: bool = True) -> List:
+    """Valeurs d'une colonne sans charger les objets (ex: identifiants de destinataires)"""
+    projected = query.with_entities(column)
+    if distinct:
+        projected = projected.distinct()
+    return [value for (value,) in projected.all()]
+
+
+def citizen_display_names(citoyen_ids: Iterable[int]) -> Dict[int, str]:
+    """Noms affichables 'Prénom Nom' de plusieurs citoyens, en une requête"""
+    from app.models import Citoyen
+
+    ids = {citoyen_id for citoyen_id in citoyen_ids if citoyen_id is not None}
+    if not ids:
+        return {}
+    rows = db.session.query(Citoyen.IDcitoyen, Citoyen.prenom, Citoyen.nom).filter(Citoyen.IDcitoyen.in_(ids)).all()
+    return {citoyen_id: f"{prenom} {nom}" for citoyen_id, prenom, nom in rows}
+
+
+def citizen_display_name(citoyen_id: int, default: str = "Quelqu'un") -> str:
+    """Nom affichable d'un citoyen (deux colonnes lues, pas d'objet Citoyen chargé)"""
+    return citizen_display_names([citoyen_id]).get(citoyen_id, default)
+
+
+def interested_citizen_ids(signalement_id: int, exclude: Iterable[int] = ()) -> List[int]:
+    """Citoyens ayant voté ou commenté un signalement (une requête UNION sur les identifiants)"""
+    from app.models import CommentaireSignalement, Vote
+
+    stmt = union(
+        select(Vote.citoyenID).where(Vote.signalementID == signalement_id, Vote.is_deleted == False),
+        select(CommentaireSignalement.citoyenID).where(CommentaireSignalement.signalementID == signalement_id)
+    )
+    excluded = set(exclude)
+    return [citoyen_id for (citoyen_id,) in db.session.execute(stmt) if citoyen_id not in excluded]
+
+
+class QueryCounter:
+    """Compte les requêtes SQL émises sur un moteur (tests de non-régression N+1, diagnostic)"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    with count_queries() as counter: ...
+    puis counter.count / counter.statements.
+    """
+    engine = engine if engine is not None else db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._record)
@@ -0,0 +1,83 @@
+# app/utils/text_analyzer.py
+"""Analyseur de texte français pour l'index de recherche : normalisation, mots vides, racinisation légère"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+MAX_TERM_LENGTH = 64
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Mots vides (formes sans accents, après normalisation)
+FRENCH_STOPWORDS = frozenset("""
+a ai aie ait as au aux avec avoir c ca ce ceci cela celle celles celui ces cet cette ceux chez d dans de des
+du elle elles en est et etaient etait ete etre eu eux il ils j je l la le les leur leurs lui m ma mais me
+meme mes moi mon n ne ni nos notre nous on ont ou par pas pour qu que quel quelle quelles quels qui s sa
+sans se ses si son sont sur t ta te tes toi ton tu un une vos votre vous y
+""".split())
+
+# Suffixes retirés une seule fois (du plus long au plus court), avec remplacement
+_SUFFIXES: Tuple[Tuple[str, str], ...] = (
+    ('issements', ''), ('issement', ''),
+    ('atrices', ''), ('atrice', ''), ('ateurs', ''), ('ateur', ''),
+    ('ations', ''), ('ation', ''),
+    ('ements', ''), ('ement', ''),
+    ('ances', ''), ('ance', ''), ('ences', ''), ('ence', ''),
+    ('ismes', ''), ('isme', ''), ('istes', ''), ('iste', ''),
+    ('iques', ''), ('ique', ''),
+    ('euses', 'eu'), ('euse', 'eu'), ('eux', 'eu'),
+    ('ites', ''), ('ite', ''),
+    ('ives', 'if'), ('ive', 'if'), ('ifs', 'if'),
+    ('aux', 'al'),
+    ('ees', ''), ('ee', ''), ('er', ''), ('ez', ''),
+)
+_MIN_STEM = 3
+
+
+def normalize(text: str) -> str:
+    """Minuscules, ligatures développées et accents supprimés"""
+    text = text.lower().replace('œ', 'oe').replace('æ', 'ae')
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(token: str) -> str:
+    """Racinisation légère du français (pluriels, féminins, suffixes dérivationnels courants)"""
+    if len(token) <= _MIN_STEM or token.isdigit():
+        return token
+
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) + len(replacement) >= _MIN_STEM:
+            token = token[:-len(suffix)] + replacement
+            break
+
+    if len(token) > _MIN_STEM and token[-1] in 'sx':
+        token = token[:-1]
+    if len(token) > _MIN_STEM and token[-1] == 'e':
+        token = token[:-1]
+    # Consonne finale doublée (poubell -> poubel, nett -> net)
+    if len(token) > _MIN_STEM and token[-1] == token[-2] and token[-1] not in 'aeiouy':
+        token = token[:-1]
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    """Termes indexables d'un texte, dans l'ordre d'apparition"""
+    if not text:
+        return []
+    terms = []
+    for token in _TOKEN_RE.findall(normalize(text)):
+        if len(token) < 2 or token in FRENCH_STOPWORDS:
+            continue
+        terms.append(stem(token)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def weighted_terms(fields: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+    """Poids de chaque terme pour un document composé de champs (texte, poids du champ)"""
+    weights: Counter = Counter()
+    for text, field_weight in fields:
+        for term, count in Counter(analyze(text)).items():
+            weights[term] += count * field_weight
+    return dict(weights)
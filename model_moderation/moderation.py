@@ -1,26 +1,26 @@
-from flask import Flask, request, jsonify
-import spacy
+from flask import Blueprint, Flask, request, jsonify
 from PIL import Image
 import io
+import os
+import sys
 import base64
-from transformers import pipeline
 import logging
 
-# Initialiser l'application Flask
-app = Flask(__name__)
+# Racine du dépôt : registre de modèles partagé avec la priorité et l'extraction de features
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry.registry import registry
+
+moderation_bp = Blueprint('moderation', __name__)
 
 # Configurer le logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Charger le modèle spaCy pour le traitement du texte
-nlp = spacy.load("fr_core_news_sm")
-
-# Charger un modèle de classification d'images pré-entraîné
-image_classifier = pipeline("image-classification", model="google/vit-base-patch16-224")
+# spaCy (fr_core_news_sm) et le classifieur d'images ViT sont chargés par le registre,
+# une fois par processus ; le ViT est le même que celui du calcul de priorité
 
 def moderer_texte(description):
-    doc = nlp(description)
+    doc = registry.get('spacy_fr')(description)
     mots_interdits = {"insulte", "gros mot", "haine"}  # Utilisation d'un ensemble pour une recherche plus rapide
 
     if any(token.text.lower() in mots_interdits for token in doc):
@@ -35,7 +35,7 @@ def moderer_media(media_data):
         image = Image.open(io.BytesIO(image_data))
 
         # Utiliser un modèle de classification d'images pour détecter du contenu inapproprié
-        results = image_classifier(image)
+        results = registry.get('image_classifier')(image)
 
         # Exemple de logique de modération : vérifier si l'image contient des éléments inappropriés
         for result in results:
@@ -64,7 +64,7 @@ def moderer_signalement(type_signalement, description, media_list):
 
     return True, "Signalement valide"
 
-@app.route('/moderate', methods=['POST'])
+@moderation_bp.route('/moderate', methods=['POST'])
 def moderate():
     data = request.get_json()
 
@@ -79,5 +79,10 @@ def moderate():
     else:
         return jsonify({"status": "error", "message": message}), 400
 
+# Service autonome (les trois capacités sont aussi servies ensemble par models_service.py)
+app = Flask(__name__)
+app.register_blueprint(moderation_bp)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5003, debug=True)
+    registry.warm_up(['moderation'])
+    app.run(host='0.0.0.0', port=5003, debug=True, use_reloader=False)
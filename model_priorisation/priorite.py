@@ -1,11 +1,15 @@
 from PIL import Image
-from flask import Flask, request, jsonify
-from transformers import pipeline
+from flask import Blueprint, Flask, request, jsonify
 import base64
+import os
+import sys
 from io import BytesIO
 
+# Racine du dépôt : registre de modèles partagé avec la modération et l'extraction de features
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry.registry import registry
 
-app = Flask(__name__)
+priority_bp = Blueprint('priority', __name__)
 
 # Exemple de contenu pour priorite.py
 
@@ -42,17 +46,16 @@ WEIGHTS = {
 }
 
 
-# Charger les modèles NLP et de vision par ordinateur
-sentiment_analyzer = pipeline("sentiment-analysis")
-ner_pipeline = pipeline("ner", model="dslim/bert-base-NER")
-image_classifier = pipeline("image-classification", model="google/vit-base-patch16-224")
-
+# Modèles NLP et de vision chargés par le registre (une fois par processus, ViT partagé)
 
 
 def calculate_priority(type_signalement, description, media_list):
     """
     Calcule la priorité d'un signalement en fonction du type, de la description et des médias.
     """
+    sentiment_analyzer = registry.get('sentiment')
+    ner_pipeline = registry.get('ner')
+
     # Analyser le sentiment de la description
     sentiment_result = sentiment_analyzer(description)
     sentiment_score = sentiment_result[0]['score'] if sentiment_result[0]['label'] == 'POSITIVE' else 1 - sentiment_result[0]['score']
@@ -75,7 +78,7 @@ def calculate_priority(type_signalement, description, media_list):
 
                 # Charger et analyser l'image
                 image = Image.open(BytesIO(image_data))
-                image_result = image_classifier(image)
+                image_result = registry.get('image_classifier')(image)
                 media_score += image_result[0]['score']
             except Exception as e:
                 print(f"Erreur lors de l'analyse de l'image: {e}")
@@ -127,7 +130,7 @@ def calculate_priority(type_signalement, description, media_list):
         return "Basse"
 
 
-@app.route('/calculate_priority', methods=['POST'])
+@priority_bp.route('/calculate_priority', methods=['POST'])
 def calculate_priority_endpoint():
     data = request.get_json()
     type_signalement = data.get('type_signalement')
@@ -140,5 +143,10 @@ def calculate_priority_endpoint():
     priority = calculate_priority(type_signalement, description, media_list)
     return jsonify({'priority': priority})
 
+# Service autonome (les trois capacités sont aussi servies ensemble par models_service.py)
+app = Flask(__name__)
+app.register_blueprint(priority_bp)
+
 if __name__ == '__main__':
+    registry.warm_up(['priority'])
     app.run(host='0.0.0.0', port=5002)
@@ -0,0 +1,169 @@
+# model_registry/registry.py
+"""
+Registre des modèles d'IA partagé par les services priorité, modération et
+extraction de features.
+
+Chaque modèle est chargé une seule fois par processus : à la première
+utilisation (chargement paresseux, un verrou par modèle) ou au préchauffage
+d'une capacité. Le classifieur d'images ViT est commun à la priorité et à la
+modération.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+NER_MODEL = "dslim/bert-base-NER"
+IMAGE_CLASSIFIER_MODEL = "google/vit-base-patch16-224"
+SPACY_MODEL = "fr_core_news_sm"
+TEXT_FEATURES_MODEL = "bert-base-uncased"
+
+
+class ModelRegistry:
+    """Modèles chargés à la demande, une fois par processus, regroupés par capacité"""
+
+    def __init__(self):
+        self._loaders = {}
+        self._descriptions = {}
+        self._models = {}
+        self._locks = {}
+        self._errors = {}
+        self.load_seconds = {}
+        self.capabilities = {}
+
+    def register(self, name, loader, description=''):
+        """Déclare un modèle ; `loader()` n'est appelé qu'au premier get()"""
+        self._loaders[name] = loader
+        self._descriptions[name] = description
+        self._locks[name] = threading.Lock()
+
+    def capability(self, name, models):
+        """Déclare une capacité (ex: 'priority') et les modèles qu'elle utilise"""
+        unknown = [model for model in models if model not in self._loaders]
+        if unknown:
+            raise KeyError(f"Modèles inconnus pour {name}: {', '.join(unknown)}")
+        self.capabilities[name] = list(models)
+
+    def get(self, name):
+        """Modèle chargé (le premier appelant le charge, les appels concurrents attendent)"""
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"Modèle inconnu: {name}")
+
+        with self._locks[name]:
+            if name not in self._models:
+                logger.info(f"📦 Chargement du modèle {name}...")
+                started = time.perf_counter()
+                try:
+                    model = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    logger.error(f"❌ Chargement du modèle {name} impossible: {e}")
+                    raise
+                self.load_seconds[name] = round(time.perf_counter() - started, 2)
+                self._errors.pop(name, None)
+                self._models[name] = model
+                logger.info(f"✅ Modèle {name} chargé en {self.load_seconds[name]}s")
+        return self._models[name]
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def models_for(self, capabilities):
+        """Modèles (sans doublon, dans l'ordre) utilisés par des capacités"""
+        models = []
+        for capability in capabilities:
+            if capability not in self.capabilities:
+                raise KeyError(f"Capacité inconnue: {capability}")
+            models.extend(model for model in self.capabilities[capability] if model not in models)
+        return models
+
+    def warm_up(self, capabilities=None):
+        """
+        Charge les modèles des capacités (toutes par défaut) avant les premières
+        requêtes. Un échec n'interrompt pas le préchauffage : le modèle sera
+        retenté à sa première utilisation. Retourne {modèle: True/False}.
+        """
+        capabilities = list(self.capabilities) if capabilities is None else capabilities
+        status = {}
+        for name in self.models_for(capabilities):
+            try:
+                self.get(name)
+                status[name] = True
+            except Exception:
+                status[name] = False
+        return status
+
+    def info(self):
+        """État des modèles et des capacités (endpoint /health)"""
+        return {
+            'models': {
+                name: {
+                    'description': self._descriptions[name],
+                    'loaded': name in self._models,
+                    'load_seconds': self.load_seconds.get(name),
+                    'error': self._errors.get(name)
+                }
+                for name in self._loaders
+            },
+            'capabilities': {
+                capability: all(model in self._models for model in models)
+                for capability, models in self.capabilities.items()
+            }
+        }
+
+
+# ========== CHARGEURS (imports lourds différés) ==========
+
+def _load_sentiment():
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
+
+
+def _load_ner():
+    from transformers import pipeline
+    return pipeline("ner", model=NER_MODEL)
+
+
+def _load_image_classifier():
+    from transformers import pipeline
+    return pipeline("image-classification", model=IMAGE_CLASSIFIER_MODEL)
+
+
+def _load_spacy_fr():
+    import spacy
+    return spacy.load(SPACY_MODEL)
+
+
+def _load_text_features():
+    from transformers import BertModel, BertTokenizer
+    tokenizer = BertTokenizer.from_pretrained(TEXT_FEATURES_MODEL)
+    text_model = BertModel.from_pretrained(TEXT_FEATURES_MODEL)
+    text_model.eval()
+    return tokenizer, text_model
+
+
+def _load_image_features():
+    import torch
+    import torchvision.models as models
+    image_model = models.resnet50(pretrained=True)
+    # Supprimer la dernière couche pour obtenir les features
+    image_model = torch.nn.Sequential(*list(image_model.children())[:-1])
+    image_model.eval()
+    return image_model
+
+
+registry = ModelRegistry()
+registry.register('sentiment', _load_sentiment, f"transformers {SENTIMENT_MODEL}")
+registry.register('ner', _load_ner, f"transformers {NER_MODEL}")
+registry.register('image_classifier', _load_image_classifier, f"transformers {IMAGE_CLASSIFIER_MODEL}")
+registry.register('spacy_fr', _load_spacy_fr, f"spaCy {SPACY_MODEL}")
+registry.register('text_features', _load_text_features, TEXT_FEATURES_MODEL)
+registry.register('image_features', _load_image_features, "resnet50")
+
+registry.capability('priority', ['sentiment', 'ner', 'image_classifier'])
+registry.capability('moderation', ['spacy_fr', 'image_classifier'])
+registry.capability('features', ['text_features', 'image_features'])
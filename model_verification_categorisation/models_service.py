@@ -1,7 +1,5 @@
 from flask import Flask, request, jsonify
-from transformers import BertTokenizer, BertModel
 import torch
-import torchvision.models as models
 from torchvision import transforms
 from PIL import Image
 import cv2
@@ -9,13 +7,22 @@ import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.ensemble import RandomForestClassifier
 import os
+import sys
 import base64
 import io
 import logging
 import tempfile
+import threading
+import time
+import queue
+from concurrent.futures import Future
 from werkzeug.utils import secure_filename
 import mimetypes
 
+# Racine du dépôt : registre de modèles et services priorité / modération
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry.registry import registry
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,32 +30,31 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
 
+# ========== CONFIGURATION DU SERVEUR D'INFÉRENCE ==========
+# Taille max d'un micro-lot et fenêtre d'attente pour le compléter
+BATCH_MAX_SIZE = int(os.getenv('MODEL_BATCH_MAX_SIZE', 16))
+BATCH_WINDOW_MS = float(os.getenv('MODEL_BATCH_WINDOW_MS', 10))
+BATCH_TIMEOUT = float(os.getenv('MODEL_BATCH_TIMEOUT', 60))
+# Threads intra-op de torch (par défaut : tous les cœurs)
+TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', os.cpu_count() or 1))
+
+# Capacités servies par ce processus ('features' toujours) et capacités préchargées au démarrage
+MODEL_CAPABILITIES = [c.strip() for c in os.getenv('MODEL_CAPABILITIES', 'features,priority,moderation').split(',') if c.strip()]
+MODEL_WARMUP = [c.strip() for c in os.getenv('MODEL_WARMUP', ','.join(MODEL_CAPABILITIES)).split(',') if c.strip()]
+
+torch.set_num_threads(TORCH_NUM_THREADS)
+
 # ========== CONFIGURATION DES MODÈLES ==========
-def load_models():
-    """Charge les modèles avec gestion d'erreur"""
-    try:
-        # Modèle de texte
-        print("📚 Chargement du modèle BERT...")
-        tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-        text_model = BertModel.from_pretrained('bert-base-uncased')
-        text_model.eval()
-        
-        # Modèle d'image
-        print("🖼️ Chargement du modèle ResNet50...")
-        image_model = models.resnet50(pretrained=True)
-        # Supprimer la dernière couche pour obtenir les features
-        image_model = torch.nn.Sequential(*list(image_model.children())[:-1])
-        image_model.eval()
-        
-        print("✅ Modèles chargés avec succès")
-        return tokenizer, text_model, image_model
-        
-    except Exception as e:
-        logger.error(f"❌ Erreur chargement modèles: {e}")
-        raise
+# BERT (texte) et ResNet50 (images) sont chargés par le registre, au préchauffage ou au premier lot
+
+# ========== PRIORITÉ ET MODÉRATION (même processus, modèles partagés) ==========
+if 'priority' in MODEL_CAPABILITIES:
+    from model_priorisation.priorite import priority_bp
+    app.register_blueprint(priority_bp)
 
-# Charger les modèles
-tokenizer, text_model, image_model = load_models()
+if 'moderation' in MODEL_CAPABILITIES:
+    from model_moderation.moderation import moderation_bp
+    app.register_blueprint(moderation_bp)
 
 # Transformation pour les images
 preprocess = transforms.Compose([
@@ -58,6 +64,114 @@ preprocess = transforms.Compose([
     transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
 ])
 
+# ========== MICRO-BATCHING ==========
+class MicroBatcher:
+    """
+    File d'attente d'inférence : les requêtes concurrentes sont regroupées en
+    micro-lots (au plus `max_size` éléments, ou ce qui arrive pendant `window_ms`)
+    puis exécutées en un seul passage du modèle. Chaque requête récupère son
+    propre résultat via un Future.
+    """
+
+    def __init__(self, name, batch_fn, max_size=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_size = max(1, max_size)
+        self.window = window_ms / 1000.0
+        self._queue = queue.Queue()
+        self.stats = {'batches': 0, 'items': 0, 'max_batch': 0}
+        self._thread = threading.Thread(target=self._loop, name=f'batcher-{name}', daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item, timeout=BATCH_TIMEOUT):
+        """Soumet un élément et attend son résultat"""
+        return self.submit(item).result(timeout=timeout)
+
+    def run_many(self, items, timeout=BATCH_TIMEOUT):
+        """Soumet plusieurs éléments (ex: frames d'une vidéo) et attend tous les résultats"""
+        futures = [self.submit(item) for item in items]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = list(self.batch_fn(items))
+                if len(results) != len(batch):
+                    # Sans ce contrôle, zip() laisserait des requêtes attendre jusqu'au timeout
+                    raise RuntimeError(f"{len(results)} résultat(s) pour {len(batch)} élément(s)")
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"❌ Erreur lot {self.name} ({len(batch)} éléments): {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self.stats['batches'] += 1
+            self.stats['items'] += len(batch)
+            self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+
+    def info(self):
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'avg_batch': round(self.stats['items'] / batches, 2) if batches else 0,
+            'pending': self._queue.qsize(),
+            'max_size': self.max_size,
+            'window_ms': self.window * 1000
+        }
+
+
+def _normalize_rows(features):
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return features / norms
+
+
+def embed_texts(texts):
+    """Embeddings BERT d'un lot de textes (moyenne masquée : identique au traitement unitaire)"""
+    tokenizer, text_model = registry.get('text_features')
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
+
+    with torch.no_grad():
+        outputs = text_model(**inputs)
+
+    mask = inputs['attention_mask'].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+    summed = (outputs.last_hidden_state * mask).sum(dim=1)
+    features = (summed / mask.sum(dim=1).clamp(min=1)).numpy()
+    return list(_normalize_rows(features))
+
+
+def embed_image_tensors(tensors):
+    """Features ResNet d'un lot d'images prétraitées (un seul passage du modèle)"""
+    with torch.no_grad():
+        features = registry.get('image_features')(torch.stack(tensors))
+    return list(features.reshape(len(tensors), -1).numpy())
+
+
+text_batcher = MicroBatcher('text', embed_texts)
+image_batcher = MicroBatcher('image', embed_image_tensors)
+
 # ========== CATÉGORIES AMÉLIORÉES ==========
 CATEGORIES = {
     "Voirie & Transports": {
@@ -161,17 +275,8 @@ def process_text():
             text = text[:5000]
             logger.warning("Texte tronqué à 5000 caractères")
         
-        # Tokenisation
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        
-        with torch.no_grad():
-            outputs = text_model(**inputs)
-        
-        # Extraction des features (moyenne des embeddings)
-        features = outputs.last_hidden_state.mean(dim=1).squeeze().numpy()
-        
-        # Normalisation
-        features = features / np.linalg.norm(features)
+        # Extraction des features normalisées, regroupée avec les requêtes concurrentes
+        features = text_batcher.run(text)
         
         logger.info(f"✅ Texte traité: {len(text)} caractères -> {len(features)} features")
         return jsonify({
@@ -240,16 +345,9 @@ def process_image():
         if img.mode != 'RGB':
             img = img.convert('RGB')
         
-        # Préprocessing
+        # Préprocessing puis extraction des features en micro-lot
         img_tensor = preprocess(img)
-        batch_tensor = torch.unsqueeze(img_tensor, 0)
-        
-        # Extraction des features
-        with torch.no_grad():
-            features = image_model(batch_tensor)
-        
-        # Aplatir et normaliser
-        features = features.squeeze().numpy()
+        features = image_batcher.run(img_tensor)
         features = features / np.linalg.norm(features)
         
         logger.info(f"✅ Image traitée: {img.size} -> {len(features)} features")
@@ -317,6 +415,7 @@ def process_video():
         
         frame_count = 0
         processed_frames = 0
+        frame_tensors = []
         
         logger.info(f"🎬 Traitement vidéo: {total_frames} frames, {duration:.1f}s, sampling chaque {frame_interval} frames")
         
@@ -332,15 +431,8 @@ def process_video():
                     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                     img = Image.fromarray(frame_rgb)
                     
-                    # Préprocessing
-                    img_tensor = preprocess(img)
-                    batch_tensor = torch.unsqueeze(img_tensor, 0)
-                    
-                    # Extraction features
-                    with torch.no_grad():
-                        frame_features = image_model(batch_tensor)
-                    
-                    features_list.append(frame_features.squeeze().numpy())
+                    # Préprocessing (features extraites en lot après la lecture)
+                    frame_tensors.append(preprocess(img))
                     processed_frames += 1
                     
                 except Exception as frame_error:
@@ -351,6 +443,9 @@ def process_video():
         
         cap.release()
         
+        if frame_tensors:
+            features_list = image_batcher.run_many(frame_tensors)
+        
         if not features_list:
             return jsonify({'error': 'Aucune frame traitée avec succès'}), 500
         
@@ -505,17 +600,21 @@ def categorize():
 def health_check():
     """Vérification de l'état du service"""
     try:
-        # Test rapide des modèles
-        test_text = "test"
-        test_inputs = tokenizer(test_text, return_tensors="pt", max_length=10)
-        
-        with torch.no_grad():
-            _ = text_model(**test_inputs)
+        # État du registre (sans forcer le chargement des modèles paresseux)
+        models_info = registry.info()
+        endpoints = ['/process_text', '/process_image', '/process_video', '/validate', '/categorize']
+        if 'priority' in MODEL_CAPABILITIES:
+            endpoints.append('/calculate_priority')
+        if 'moderation' in MODEL_CAPABILITIES:
+            endpoints.append('/moderate')
         
         return jsonify({
             'status': 'healthy',
-            'models_loaded': True,
-            'endpoints': ['/process_text', '/process_image', '/process_video', '/validate', '/categorize'],
+            'models_loaded': models_info['capabilities'],
+            'models': models_info['models'],
+            'endpoints': endpoints,
+            'batching': {'text': text_batcher.info(), 'image': image_batcher.info()},
+            'torch_threads': torch.get_num_threads(),
             'timestamp': str(torch.cuda.get_device_name(0)) if torch.cuda.is_available() else 'CPU'
         })
     except Exception as e:
@@ -533,8 +632,11 @@ def service_info():
         'models': {
             'text': 'bert-base-uncased',
             'image': 'resnet50',
-            'video': 'resnet50 (frame sampling)'
+            'video': 'resnet50 (frame sampling)',
+            'priority': 'sentiment + dslim/bert-base-NER + google/vit-base-patch16-224',
+            'moderation': 'spaCy fr_core_news_sm + google/vit-base-patch16-224 (partagé)'
         },
+        'capabilities': MODEL_CAPABILITIES,
         'categories': list(CATEGORIES.keys()),
         'max_file_size': '50MB',
         'supported_formats': {
@@ -558,6 +660,15 @@ def not_found(e):
 def server_error(e):
     return jsonify({'error': 'Erreur interne du serveur'}), 500
 
+# ========== PRÉCHAUFFAGE ==========
+# Au chargement du module, donc aussi sous gunicorn / WSGI, avant les premières requêtes.
+# MODEL_WARMUP vide : aucun préchargement, chaque modèle est chargé à sa première requête.
+WARM_UP_STATUS = registry.warm_up([c for c in MODEL_WARMUP if c in MODEL_CAPABILITIES]) if MODEL_WARMUP else {}
+logger.info(f"📦 Modèles préchargés: {', '.join(name for name, ok in WARM_UP_STATUS.items() if ok) or 'aucun'}")
+if not all(WARM_UP_STATUS.values()):
+    failed = [name for name, ok in WARM_UP_STATUS.items() if not ok]
+    logger.warning(f"⚠️ Préchargement échoué: {', '.join(failed)} (nouvel essai à la première requête)")
+
 if __name__ == '__main__':
     print("🚀 Démarrage du modèle de validation et catégorisation amélioré")
     print("📡 Accessible sur:")
@@ -568,8 +679,17 @@ if __name__ == '__main__':
     print("     * POST /process_video")
     print("     * POST /validate")
     print("     * POST /categorize")
+    if 'priority' in MODEL_CAPABILITIES:
+        print("     * POST /calculate_priority")
+    if 'moderation' in MODEL_CAPABILITIES:
+        print("     * POST /moderate")
     print("     * GET /health")
     print("     * GET /info")
+    # Préchauffage fait à l'import : les modèles des autres capacités sont chargés à leur première requête
+    print(f"📦 Modèles préchargés: {', '.join(name for name, ok in WARM_UP_STATUS.items() if ok) or 'aucun'}")
     print("🔥 Serveur prêt pour les requêtes !")
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    print(f"⚙️ Micro-lots: {BATCH_MAX_SIZE} max, fenêtre {BATCH_WINDOW_MS}ms, {TORCH_NUM_THREADS} threads torch")
+    
+    # Serveur multi-thread : les requêtes concurrentes alimentent les micro-lots
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False, threaded=True)
\ No newline at end of file
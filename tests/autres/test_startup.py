@@ -0,0 +1,24 @@
+from app import create_app
+
+TEST_CONFIG = {'TESTING': True, 'SQLALCHEMY_DATABASE_URI': "sqlite:///:memory:", 'CACHE_TYPE': 'SimpleCache'}
+
+
+def test_lazy_startup_defers_media_service():
+    app = create_app({**TEST_CONFIG, 'LAZY_EXTENSIONS': True})
+
+    # Aucun client Supabase créé au démarrage
+    assert 'media_service' not in app.extensions
+
+    profile = app.test_client().get('/health/startup').get_json()
+    assert profile['lazy_extensions'] is True
+    assert {'extensions', 'models', 'blueprints'} <= set(profile['steps'])
+    assert profile['total_ms'] >= sum(profile['steps'].values()) - 1
+
+
+def test_create_app_can_be_called_repeatedly():
+    # Les tests créent une application par test (métriques Prometheus globales)
+    first = create_app(TEST_CONFIG)
+    second = create_app({**TEST_CONFIG, 'SWAGGER_ENABLED': False})
+
+    assert first is not second
+    assert 'flasgger.apidocs' not in second.view_functions
@@ -0,0 +1,39 @@
+import base64
+import hashlib
+import io
+import os
+
+import pytest
+
+from app.utils.media_buffer import MediaBuffer, MediaTooLarge
+
+
+def test_small_media_stays_in_memory():
+    buffer = MediaBuffer.from_stream(io.BytesIO(b'abc'), spool_max_memory=1024)
+
+    assert not buffer.on_disk
+    assert buffer.size == 3
+    assert buffer.upload_source() == b'abc'
+    assert buffer.md5 == hashlib.md5(b'abc').hexdigest()
+    assert buffer.sha256 == hashlib.sha256(b'abc').hexdigest()
+
+
+def test_large_media_spills_to_disk():
+    data = os.urandom(200 * 1024 + 1)
+    buffer = MediaBuffer.from_stream(io.BytesIO(data), spool_max_memory=64 * 1024)
+
+    assert buffer.on_disk
+    assert len(buffer) == len(data)
+    assert buffer.getvalue() == data
+    assert buffer.sha256 == hashlib.sha256(data).hexdigest()
+    # Encodage par blocs identique à l'encodage en une fois
+    assert buffer.to_base64() == base64.b64encode(data).decode('ascii')
+
+    path = buffer._path
+    buffer.close()
+    assert not os.path.exists(path)
+
+
+def test_max_size_is_enforced_while_streaming():
+    with pytest.raises(MediaTooLarge):
+        MediaBuffer.from_stream(io.BytesIO(b'x' * 1000), max_size=100)
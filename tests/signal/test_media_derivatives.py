@@ -0,0 +1,39 @@
+import io
+
+import pytest
+
+from app.services.signal.media_derivative_service import (
+    IMAGE_DERIVATIVES,
+    apply_derivatives,
+    derivative_path,
+    render_image_derivatives
+)
+
+
+def test_derivative_path_sits_next_to_original():
+    assert derivative_path('users/1/images/photo.jpg', 'thumbnail') == 'users/1/images/photo.jpg__thumbnail.webp'
+
+
+def test_apply_derivatives_points_urls_to_webp():
+    element = {'url': 'https://cdn/photo.jpg', 'thumbnail_url': 'https://cdn/photo.jpg?width=150'}
+    apply_derivatives(element, {'thumbnail': {'url': 'https://cdn/photo.jpg__thumbnail.webp'}})
+
+    assert element['thumbnail_url'] == 'https://cdn/photo.jpg__thumbnail.webp'
+    assert element['url'] == 'https://cdn/photo.jpg'  # L'original reste accessible
+
+
+def test_render_image_derivatives_sizes():
+    Image = pytest.importorskip('PIL.Image')
+    source = io.BytesIO()
+    Image.new('RGB', (3000, 2000), (200, 10, 10)).save(source, 'JPEG')
+
+    rendered = render_image_derivatives(source.getvalue())
+
+    assert set(rendered) == set(IMAGE_DERIVATIVES)
+    assert (rendered['thumbnail']['width'], rendered['thumbnail']['height']) == (150, 150)
+    assert (rendered['display']['width'], rendered['display']['height']) == (1080, 720)
+    # Petite image : jamais agrandie
+    small = io.BytesIO()
+    Image.new('RGB', (100, 50)).save(small, 'PNG')
+    assert render_image_derivatives(small.getvalue())['display']['width'] == 100
+    assert Image.open(io.BytesIO(rendered['preview']['data'])).format == 'WEBP'
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from model_registry.registry import ModelRegistry, registry
+
+
+def _counting_registry():
+    loads = []
+    models = ModelRegistry()
+    for name in ('sentiment', 'vit', 'spacy'):
+        models.register(name, lambda name=name: loads.append(name) or object())
+    models.capability('priority', ['sentiment', 'vit'])
+    models.capability('moderation', ['spacy', 'vit'])
+    return models, loads
+
+
+def test_models_are_loaded_lazily_and_once():
+    models, loads = _counting_registry()
+    assert loads == []
+
+    threads = [threading.Thread(target=models.get, args=('vit',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert models.get('vit') is models.get('vit')
+    assert loads == ['vit']
+
+
+def test_warm_up_shares_models_between_capabilities():
+    models, loads = _counting_registry()
+
+    assert models.warm_up(['priority']) == {'sentiment': True, 'vit': True}
+    models.warm_up(['moderation'])
+
+    assert sorted(loads) == ['sentiment', 'spacy', 'vit']
+    assert models.info()['capabilities'] == {'priority': True, 'moderation': True}
+
+
+def test_failed_load_is_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("téléchargement interrompu")
+        return 'model'
+
+    models = ModelRegistry()
+    models.register('flaky', flaky)
+    assert models.warm_up() == {}
+    models.capability('c', ['flaky'])
+
+    assert models.warm_up(['c']) == {'flaky': False}
+    assert models.info()['models']['flaky']['error']
+    assert models.get('flaky') == 'model'
+    assert models.info()['models']['flaky']['error'] is None
+
+
+def test_image_classifier_is_shared_by_priority_and_moderation():
+    assert 'image_classifier' in registry.capabilities['priority']
+    assert 'image_classifier' in registry.capabilities['moderation']
+    with pytest.raises(KeyError):
+        registry.models_for(['unknown'])
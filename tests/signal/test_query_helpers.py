@@ -0,0 +1,61 @@
+from sqlalchemy import create_engine, text
+
+from app.utils.query_helpers import citizen_display_name, citizen_display_names, count_queries
+
+
+def test_count_queries_records_statements():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.connect() as conn:
+        with count_queries(engine) as counter:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))  # Hors du bloc : non compté
+
+    assert counter.count == 2
+    assert counter.statements == ["SELECT 1", "SELECT 2"]
+
+
+def test_list_endpoint_query_count_is_constant():
+    # La liste des signalements ne doit pas émettre une requête par élément (N+1)
+    from app import create_app, db, invalidate_tags
+    from app.models import Signalement
+
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': "sqlite:///:memory:", 'CACHE_TYPE': 'SimpleCache'})
+
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+
+        def list_queries(total):
+            for _ in range(total - Signalement.query.count()):
+                db.session.add(Signalement(typeSignalement='voirie', description='d', elements='e', cible='c', citoyenID=1))
+            db.session.commit()
+            invalidate_tags('signalements')  # Vue en cache : forcer l'exécution des requêtes
+            with count_queries(db.engine) as counter:
+                assert client.get('/api/signalement/all').status_code == 200
+            return counter.count
+
+        assert list_queries(2) == list_queries(20)
+        db.session.remove()
+        db.drop_all()
+
+
+def test_citizen_display_names():
+    from app import create_app, db
+    from app.models import Citoyen
+
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': "sqlite:///:memory:", 'CACHE_TYPE': 'SimpleCache'})
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(Citoyen(IDuser=1, prenom='Awa', nom='Diallo', adresse='a', password='p', role='citoyen',
+                               username='awa', telephone='0600000001'))
+        db.session.commit()
+
+        with count_queries(db.engine) as counter:
+            assert citizen_display_names([1, 2, None]) == {1: 'Awa Diallo'}
+        assert counter.count == 1
+        assert citizen_display_name(1) == 'Awa Diallo'
+        assert citizen_display_name(2) == "Quelqu'un"
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,79 @@
+from app.utils.geo import (
+    SpatialIndex,
+    bounding_box,
+    dbscan_labels,
+    encode_geohash,
+    geohash_cells_for_bbox,
+    geohash_precision_for_radius,
+    geohash_precision_for_tile,
+    haversine_km,
+    tile_bounds,
+    tile_for_point
+)
+
+
+def test_encode_geohash():
+    # Valeur de référence connue
+    assert encode_geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+
+
+def test_geohash_cells_cover_radius():
+    # Toutes les positions du cercle doivent tomber dans une cellule couverte
+    lat, lng, radius = 14.6928, -17.4467, 2
+    precision = geohash_precision_for_radius(radius, lat)
+    cells = geohash_cells_for_bbox(*bounding_box(lat, lng, radius), precision)
+    for dlat, dlng in [(0.017, 0), (-0.017, 0), (0, 0.018), (0, -0.018)]:
+        assert encode_geohash(lat + dlat, lng + dlng, precision) in cells
+
+
+def test_spatial_index_query_radius():
+    index = SpatialIndex()
+    index.load([(1, 14.6928, -17.4467), (2, 14.7000, -17.4500), (3, 15.5000, -17.0000)])
+
+    results = index.query_radius(14.6928, -17.4467, 5)
+    assert [item_id for item_id, _ in results] == [1, 2]
+    assert abs(results[1][1] - haversine_km(14.6928, -17.4467, 14.7, -17.45)) < 1e-9
+
+
+def test_spatial_index_incremental_updates():
+    index = SpatialIndex()
+    index.load([(1, 14.6928, -17.4467)])
+
+    # Déplacement d'un point lointain dans la zone
+    index.upsert(2, 15.5, -17.0)
+    assert [i for i, _ in index.query_radius(14.6928, -17.4467, 5)] == [1]
+    index.upsert(2, 14.6930, -17.4470)
+    assert [i for i, _ in index.query_radius(14.6928, -17.4467, 5)] == [1, 2]
+
+    index.remove(1)
+    assert 1 not in index
+    assert [i for i, _ in index.query_radius(14.6928, -17.4467, 5)] == [2]
+    assert index.max_id == 2
+
+
+def test_dbscan_labels_groups_dense_zones():
+    # Deux zones denses et un point isolé
+    latitudes = [14.6900, 14.6905, 14.6910, 15.5000, 15.5001, 15.5002, 14.0000]
+    longitudes = [-17.4400, -17.4405, -17.4410, -17.0000, -17.0001, -17.0002, -16.0000]
+
+    labels = dbscan_labels(latitudes, longitudes, eps_km=1, min_samples=3)
+
+    assert labels[0] == labels[1] == labels[2] != -1
+    assert labels[3] == labels[4] == labels[5] != -1
+    assert labels[0] != labels[3]
+    assert labels[6] == -1
+
+
+def test_tile_for_point_matches_tile_bounds():
+    lat, lng = 14.6928, -17.4467
+    for z in (0, 6, 12, 18):
+        x, y = tile_for_point(lat, lng, z)
+        min_lat, min_lng, max_lat, max_lng = tile_bounds(z, x, y)
+        assert min_lat <= lat < max_lat
+        assert min_lng <= lng < max_lng
+
+
+def test_geohash_precision_follows_zoom():
+    precisions = [geohash_precision_for_tile(z) for z in range(21)]
+    assert precisions == sorted(precisions)
+    assert precisions[0] == 1 and precisions[-1] == 9
@@ -0,0 +1,59 @@
+import app.supabase_media_service as sms
+
+
+class FakeBucket:
+    name = 'signalements'
+
+
+class FakeStorage:
+    def __init__(self):
+        self.list_calls = 0
+
+    def list_buckets(self):
+        self.list_calls += 1
+        return [FakeBucket()]
+
+
+class FakeClient:
+    def __init__(self):
+        self.storage = FakeStorage()
+
+
+def _setup(monkeypatch):
+    created = []
+
+    def create_client(url, key):
+        created.append((url, key))
+        return FakeClient()
+
+    monkeypatch.setattr(sms, 'SUPABASE_AVAILABLE', True)
+    monkeypatch.setattr(sms, 'create_client', create_client)
+    monkeypatch.setattr(sms, '_clients', {})
+    monkeypatch.setattr(sms, '_services', {})
+    monkeypatch.setattr(sms, '_bucket_checks', {})
+    monkeypatch.setenv('SUPABASE_URL', 'https://example.supabase.co')
+    monkeypatch.setenv('SUPABASE_SERVICE_ROLE_KEY', 'service-key')
+    monkeypatch.setenv('SUPABASE_BUCKET_NAME', 'signalements')
+    return created
+
+
+def test_media_service_and_client_are_shared(monkeypatch):
+    created = _setup(monkeypatch)
+
+    service = sms.get_media_service()
+    assert sms.get_media_service() is service
+    assert sms.get_supabase_client('https://example.supabase.co', 'service-key') is service.supabase
+    assert len(created) == 1
+
+
+def test_bucket_check_is_memoized(monkeypatch):
+    _setup(monkeypatch)
+    service = sms.get_media_service()
+
+    for _ in range(5):
+        assert service.ensure_bucket()
+    assert service.supabase.storage.list_calls == 1
+
+    # Une fois expirée, la vérification est refaite
+    assert service.bucket_status(max_age=0)['bucket_exists']
+    assert service.supabase.storage.list_calls == 2
@@ -0,0 +1,20 @@
+from app.utils.text_analyzer import analyze, normalize, weighted_terms
+
+
+def test_normalize_strips_accents_and_ligatures():
+    assert normalize('Écœurant Été') == 'ecoeurant ete'
+
+
+def test_analyze_removes_stopwords_and_elisions():
+    assert analyze("Poubelles débordantes près de l'école") == ['poubel', 'debordant', 'pre', 'ecol']
+
+
+def test_singular_and_plural_share_a_stem():
+    for singular, plural in [('route', 'routes'), ('déchet', 'déchets'), ('inondation', 'inondations')]:
+        assert analyze(singular) == analyze(plural)
+
+
+def test_weighted_terms_apply_field_weights():
+    weights = weighted_terms([('Trou sur la route', 3.0), ('Un trou profond', 1.0)])
+    assert weights['trou'] == 4.0
+    assert weights['rout'] == 3.0